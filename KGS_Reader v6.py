@@ -1,17 +1,36 @@
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+import abc
+import bisect
+import csv
 import datetime
+import hashlib
+import html
+import io
 import json
+import math
+import multiprocessing
+import operator
 import os
 import re
 import shutil
+import sqlite3
+import subprocess
 import sys
 import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import deque
+from itertools import compress, islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
 import tkinter as tk
 import webbrowser
 from tkinter import filedialog, messagebox
 from tkinter import ttk
 from tkinter.scrolledtext import ScrolledText
 from datetime import datetime as dt
+from xml.sax.saxutils import escape as xml_escape
 import locale
 
 # Попытка установить локаль для правильной сортировки (для дат на русском)
@@ -33,21 +52,29 @@ except ImportError:
     print("Внимание: Библиотека PyMuPDF (fitz) не установлена. Обработка PDF будет недоступна.")
 
 try:
-    import pytesseract
-    from PIL import Image, ImageEnhance, ImageFilter
-    OCR_SUPPORTED = True
+    from PIL import Image, ImageFilter
 except ImportError:
-    pytesseract = None
     Image = None
-    ImageEnhance = None
     ImageFilter = None
-    OCR_SUPPORTED = False
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+OCR_SUPPORTED = pytesseract is not None and Image is not None
+if not OCR_SUPPORTED:
     print("Внимание: Библиотеки pytesseract и/или PIL не установлены. OCR будет недоступен.")
 
+try:
+    import tesserocr  # необязательный OCR-движок внутри процесса ("ocr_backend" в settings.json)
+except ImportError:
+    tesserocr = None
+
 try:
     from openpyxl import Workbook, load_workbook
     from openpyxl.utils import get_column_letter
-    from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
+    from openpyxl.styles import Alignment, Font, PatternFill, Border, Side, NamedStyle
     EXCEL_SUPPORTED = True
 except ImportError:
     Workbook = None
@@ -126,13 +153,2115 @@ class Tooltip:
 # --- ВСТАВЬ СЮДА ТВОЙ ИСХОДНЫЙ КОД PDFProcessor БЕЗ ИЗМЕНЕНИЙ ---
 # (полностью как в первом файле, начиная с `class PDFProcessor:` и до конца его определения)
 
+PAGE_SOURCE_TEXT = "text"  # текстовый слой PDF
+PAGE_SOURCE_OCR = "ocr"
+
+# words — слова текстового слоя (page.get_text("words")) для разбора каталога по
+# геометрии; None у страниц OCR и когда точки не импортируются
+PageText = namedtuple("PageText", "index text source words", defaults=(None,))
+# Результат OCR одного рендера: текст, средняя уверенность Tesseract (0–100), DPI
+OcrResult = namedtuple("OcrResult", "text confidence dpi")
+
+
+# Предобработка для OCR: контраст x2, резкость x2, медианный фильтр 3x3, порог 140.
+# Контраст и порог — таблицы для Image.point, резкость — одно ядро свёртки:
+# ImageEnhance.Sharpness(2.0) = 2*x - SMOOTH(x), где SMOOTH = [1]*4 + [5] + [1]*4 / 13.
+OCR_CONTRAST = 2.0
+OCR_THRESHOLD = 140
+OCR_THRESHOLD_LUT = [0 if x < OCR_THRESHOLD else 255 for x in range(256)]
+OCR_SHARPEN_KERNEL = (-1, -1, -1, -1, 21, -1, -1, -1, -1)
+OCR_SHARPEN_SCALE = 13
+
+
+def contrast_lut(image, factor=OCR_CONTRAST):
+    # То же, что ImageEnhance.Contrast для полутонового изображения: среднее по гистограмме,
+    # затем mean + factor * (x - mean) с отсечением в 0..255
+    hist = image.histogram()[:256]
+    total = sum(hist)
+    mean = int(sum(i * n for i, n in enumerate(hist)) / total + 0.5) if total else 0
+    return [min(255, max(0, int(mean + factor * (x - mean)))) for x in range(256)]
+
+
+TSV_INT_COLUMNS = ("level", "page_num", "block_num", "par_num", "line_num", "word_num",
+                   "left", "top", "width", "height")
+
+
+def tesseract_tsv_to_data(tsv):
+    # TSV-вывод tesseract (конфиг tsv) в словарь списков, как image_to_data(output_type=DICT)
+    rows = tsv.splitlines()
+    if not rows:
+        return {}
+    header = rows[0].split("\t")
+    data = {name: [] for name in header}
+    for row in rows[1:]:
+        cells = row.split("\t")
+        if len(cells) < len(header) - 1:
+            continue
+        cells += [""] * (len(header) - len(cells))
+        for name, value in zip(header, cells):
+            if name in TSV_INT_COLUMNS:
+                value = int(value or 0)
+            elif name == "conf":
+                value = float(value or -1)
+            data[name].append(value)
+    return data
+
+
+def hidden_subprocess_kwargs():
+    # Без мигающего окна консоли у дочернего процесса в сборке --noconsole
+    if sys.platform != "win32":
+        return {}
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return {"startupinfo": startupinfo, "creationflags": getattr(subprocess, "CREATE_NO_WINDOW", 0)}
+
+
+def tesseract_data_to_text(data):
+    # Собирает текст из словаря image_to_data так же, как image_to_string: слова строки
+    # через пробел, строки через перевод строки, абзацы и блоки через пустую строку.
+    # Возвращает (text, mean_confidence) по распознанным словам.
+    lines = []
+    current_key = None
+    current_para = None
+    words = []
+    confidences = []
+    for i, word in enumerate(data.get("text", [])):
+        word = (word or "").strip()
+        if not word:
+            continue
+        try:
+            conf = float(data["conf"][i])
+        except (KeyError, TypeError, ValueError):
+            conf = -1.0
+        if conf >= 0:
+            confidences.append(conf)
+        para = (data["block_num"][i], data["par_num"][i])
+        key = para + (data["line_num"][i],)
+        if key != current_key:
+            if words:
+                lines.append(" ".join(words))
+            if current_para is not None and para != current_para:
+                lines.append("")
+            words = []
+            current_key = key
+            current_para = para
+        words.append(word)
+    if words:
+        lines.append(" ".join(words))
+    text = "\n".join(lines) + "\n" if lines else ""
+    confidence = sum(confidences) / len(confidences) if confidences else 0.0
+    return text, confidence
+
+
+CATALOG_OCR_WHITELIST = "0123456789.,-"
+# Области страницы для OCR по разметке: вид -> (psm, whitelist)
+OCR_REGION_PROFILES = {
+    "header": (6, None),  # подписи и значения полей реестра
+    "catalog_title": (6, None),  # заголовок каталога и шапка таблицы
+    "catalog": (6, CATALOG_OCR_WHITELIST),  # строки каталога, только числа
+    "catalog_text": (6, None),  # строки каталога с текстовыми описаниями точек
+}
+OCR_REGION_NAMES = {"header": "шапка", "catalog_title": "заголовок каталога",
+                    "catalog": "каталог", "catalog_text": "каталог"}
+OCR_HEADER_LABEL_RE = re.compile(r"коммуникац|договор|контракт|кгс|съ[её]мк", re.IGNORECASE)
+OCR_CATALOG_TITLE_RE = re.compile(r"каталог|ведомость|координат|точк|по\s*съ[её]мке", re.IGNORECASE)
+OCR_NUMERIC_WORD_RE = re.compile(r"^[-–—−]?\d+(?:[.,]\d+)?$")
+OCR_ALPHA_WORD_RE = re.compile(r"[A-Za-zА-Яа-яЁё]{3,}")
+OCR_REGIONS_MAX_AREA = 0.6  # при большей доле площади страницы дешевле распознать её целиком
+
+OcrRegion = namedtuple("OcrRegion", "kind rect psm whitelist")
+
+
+def tesseract_data_lines(data):
+    # Строки image_to_data с рамками: [(left, top, right, bottom, words)]
+    lines = {}
+    for i, word in enumerate(data.get("text", [])):
+        word = (word or "").strip()
+        if not word:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        left, top = data["left"][i], data["top"][i]
+        right, bottom = left + data["width"][i], top + data["height"][i]
+        line = lines.get(key)
+        if line is None:
+            lines[key] = [left, top, right, bottom, [word]]
+        else:
+            line[0], line[1] = min(line[0], left), min(line[1], top)
+            line[2], line[3] = max(line[2], right), max(line[3], bottom)
+            line[4].append(word)
+    return [tuple(line) for line in lines.values()]
+
+
+def _boxes_intersect(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def find_ocr_regions(data, width, height):
+    # Разметка страницы по OCR уменьшенного рендера: [(вид, (x0, y0, x1, y1))] в пикселях
+    # этого рендера или None, если шапка и каталог не найдены либо занимают почти всю
+    # страницу. Шапка — строки с подписями полей реестра (значение справа или строкой ниже),
+    # каталог — плотная группа строк минимум с двумя числами и полоса заголовка над ней.
+    lines = sorted(tesseract_data_lines(data), key=lambda line: (line[1], line[0]))
+    if not lines:
+        return None
+    heights = sorted(line[3] - line[1] for line in lines)
+    line_h = max(4, heights[len(heights) // 2])
+
+    catalogs = []
+    cluster = []
+    for line in lines:
+        if sum(1 for w in line[4] if OCR_NUMERIC_WORD_RE.match(w)) < 2:
+            continue
+        if cluster and line[1] - cluster[-1][3] > 3 * line_h:
+            catalogs.append(cluster)
+            cluster = []
+        cluster.append(line)
+    catalogs.append(cluster)
+    regions = []
+    for cluster in catalogs:
+        if len(cluster) < 3:
+            continue
+        left = min(line[0] for line in cluster) - 2 * line_h
+        right = max(line[2] for line in cluster) + 2 * line_h
+        top = min(line[1] for line in cluster)
+        bottom = max(line[3] for line in cluster) + line_h
+        titles = [line for line in lines
+                  if line[3] <= top and top - line[3] <= 8 * line_h and OCR_CATALOG_TITLE_RE.search(" ".join(line[4]))]
+        title_top = min([line[1] for line in titles] + [top - 6 * line_h]) - line_h // 2
+        title_left = min([line[0] for line in titles] + [left])
+        title_right = max([line[2] for line in titles] + [right])
+        regions.append(("catalog_title", (title_left, title_top, title_right, top - line_h // 4)))
+        with_text = sum(1 for line in cluster if any(OCR_ALPHA_WORD_RE.search(w) for w in line[4]))
+        kind = "catalog_text" if with_text > len(cluster) // 5 else "catalog"
+        regions.append((kind, (left, top - line_h // 4, right, bottom)))
+    catalog_boxes = [box for kind, box in regions if kind != "catalog_title"]
+
+    headers = []
+    for line in lines:
+        text = " ".join(line[4])
+        if not OCR_HEADER_LABEL_RE.search(text) or OCR_CATALOG_TITLE_RE.search(text):
+            continue
+        box = [line[0] - line_h, line[1] - line_h, width, line[3] + 2 * line_h]
+        for catalog in catalog_boxes:
+            if _boxes_intersect(box, catalog):
+                if catalog[0] <= line[2]:
+                    return None  # подпись внутри каталога: разметка ненадёжна
+                box[2] = catalog[0]
+        merged = True
+        while merged:
+            merged = False
+            for other in headers:
+                if _boxes_intersect(box, other):
+                    headers.remove(other)
+                    box = [min(box[0], other[0]), min(box[1], other[1]), max(box[2], other[2]), max(box[3], other[3])]
+                    merged = True
+                    break
+        headers.append(box)
+    regions += [("header", tuple(box)) for box in headers]
+    if not regions:
+        return None
+    clipped = []
+    for kind, (x0, y0, x1, y1) in regions:
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(width, x1), min(height, y1)
+        if x1 > x0 and y1 > y0:
+            clipped.append((kind, (x0, y0, x1, y1)))
+    area = sum((x1 - x0) * (y1 - y0) for _, (x0, y0, x1, y1) in clipped)
+    if not clipped or area > OCR_REGIONS_MAX_AREA * width * height:
+        return None
+    return sorted(clipped, key=lambda region: (region[1][1], region[1][0]))
+
+
+def ocr_probe_relevant(data):
+    # Есть ли на уменьшенном рендере подписи шапки, заголовок каталога или строки каталога
+    # (не меньше трёх строк с двумя числами) — иначе полное OCR страницы не нужно
+    numeric = 0
+    for line in tesseract_data_lines(data):
+        text = " ".join(line[4])
+        if OCR_HEADER_LABEL_RE.search(text) or OCR_CATALOG_TITLE_RE.search(text):
+            return True
+        if sum(1 for w in line[4] if OCR_NUMERIC_WORD_RE.match(w)) >= 2:
+            numeric += 1
+            if numeric >= 3:
+                return True
+    return False
+
+
+# Проверка OCR числового каталога: строка — номер точки (и второй номер) и 2–3 числа
+CATALOG_OCR_ROW_RE = re.compile(r"\d+(?: \d+)?(?: -?\d+[.,]\d+){2,3}")
+CATALOG_OCR_DECIMAL_RE = re.compile(r"-?\d+[.,](\d+)")
+CATALOG_OCR_MIN_VALID = 0.6  # меньшая доля таких строк — область распознаётся без ограничения символов
+
+
+def validate_catalog_ocr(text):
+    # (исправленный текст, доля строк каталога). Без пробелов между столбцами OCR склеивает
+    # числа (1234.565678.90): они разделяются по числу знаков после запятой, которое
+    # преобладает в области
+    rows = [line.split() for line in text.splitlines()]
+    rows = [row for row in rows if row]
+    if not rows:
+        return text, 0.0
+    decimals = defaultdict(int)
+    for row in rows:
+        for token in row:
+            m = CATALOG_OCR_DECIMAL_RE.fullmatch(token)
+            if m:
+                decimals[len(m.group(1))] += 1
+    if decimals:
+        piece_re = re.compile(r"-?\d+[.,]\d{%d}" % max(decimals, key=decimals.get))
+        for row in rows:
+            for k, token in enumerate(row):
+                if token.count(".") + token.count(",") > 1:
+                    pieces = piece_re.findall(token)
+                    if "".join(pieces) == token:
+                        row[k] = " ".join(pieces)
+    lines = [" ".join(row) for row in rows]
+    valid = sum(1 for line in lines if CATALOG_OCR_ROW_RE.fullmatch(line))
+    return "\n".join(lines) + "\n", valid / len(lines)
+
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+
+class OcrBackend:
+    """OCR-движок: image_to_data возвращает словарь списков, как pytesseract.image_to_data."""
+
+    name = ""
+
+    def image_to_data(self, img, dpi, psm=3, whitelist=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# Сообщения tesseract/leptonica о том, что изображение из stdin не читается (нет поддержки PNM)
+TESSERACT_INPUT_ERROR_RE = re.compile(
+    r"unknown format|unsupported (image|format)|cannot be read|function not present|pixReadStream|pixReadMem",
+    re.IGNORECASE,
+)
+
+
+class TesseractInputError(RuntimeError):
+    """tesseract не принимает изображение PGM из stdin."""
+
+
+class TesseractCliBackend(OcrBackend):
+    # Отдельный процесс tesseract на каждое изображение. Изображение уходит в stdin как PGM
+    # (заголовок + сырые байты) вместо временного PNG, который пишет pytesseract. Если
+    # tesseract не читает такой формат, дальше всегда используется pytesseract.image_to_data;
+    # при других ошибках через pytesseract распознаётся только это изображение.
+    # single_thread: OMP_THREAD_LIMIT=1 передаётся только запущенному tesseract, окружение
+    # приложения не меняется.
+    name = "tesseract"
+
+    def __init__(self, tessdata_dir="", lang="rus+eng", log=print):
+        self.tessdata_dir = tessdata_dir
+        self.lang = lang
+        self.log = log
+        self.raw_input = True
+        self.single_thread = False
+
+    def args(self, dpi, psm=3, whitelist=None):
+        args = ["--oem", "3", "--psm", str(psm), "-l", self.lang, "--dpi", str(dpi)]
+        if whitelist:
+            args += ["-c", f"tessedit_char_whitelist={whitelist}"]
+        if self.tessdata_dir:
+            args = ["--tessdata-dir", self.tessdata_dir] + args
+        return args
+
+    def config(self, dpi, psm=3, whitelist=None):
+        return " ".join(f'"{arg}"' if " " in arg else arg for arg in self.args(dpi, psm, whitelist))
+
+    def image_to_data(self, img, dpi, psm=3, whitelist=None):
+        if self.raw_input:
+            try:
+                return self._run_raw(img, self.args(dpi, psm, whitelist))
+            except TesseractInputError as e:
+                self.raw_input = False
+                self.log(f"Tesseract не принял изображение напрямую ({e}), дальше через pytesseract")
+            except Exception as e:
+                self.log(f"Ошибка tesseract ({e}), изображение распознаётся через pytesseract")
+        return pytesseract.image_to_data(
+            img, config=self.config(dpi, psm, whitelist), output_type=pytesseract.Output.DICT)
+
+    def _run_raw(self, img, args):
+        if img.mode != "L":
+            img = img.convert("L")
+        width, height = img.size
+        cmd = [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout"] + args + ["tsv"]
+        env = None
+        if self.single_thread:
+            env = dict(os.environ)
+            env.setdefault("OMP_THREAD_LIMIT", "1")
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            **hidden_subprocess_kwargs(),
+        )
+        try:
+            proc.stdin.write(b"P5\n%d %d\n255\n" % (width, height))
+            proc.stdin.write(img.tobytes())
+        except (BrokenPipeError, OSError):
+            pass  # причину покажет код возврата и stderr
+        out, err = proc.communicate()
+        if proc.returncode != 0:
+            message = err.decode("utf-8", errors="replace").strip()
+            if TESSERACT_INPUT_ERROR_RE.search(message):
+                raise TesseractInputError(message)
+            raise RuntimeError(message or f"код возврата {proc.returncode}")
+        return tesseract_tsv_to_data(out.decode("utf-8", errors="replace"))
+
+
+class TesserocrBackend(OcrBackend):
+    # Tesseract внутри процесса через tesserocr: traineddata загружается один раз на поток
+    # (PyTessBaseAPI не потокобезопасен), и запуск процесса на каждую страницу не нужен
+    name = "tesserocr"
+
+    def __init__(self, tessdata_dir="", lang="rus+eng"):
+        self.tessdata_dir = tessdata_dir
+        self.lang = lang
+        self._local = threading.local()
+        self._apis = []
+        self._lock = threading.Lock()
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            kwargs = {"lang": self.lang, "oem": tesserocr.OEM.DEFAULT}
+            if self.tessdata_dir:
+                kwargs["path"] = self.tessdata_dir
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+            with self._lock:
+                self._apis.append(api)
+        return api
+
+    def image_to_data(self, img, dpi, psm=3, whitelist=None):
+        api = self._api()
+        api.SetPageSegMode(psm)
+        api.SetVariable("tessedit_char_whitelist", whitelist or "")
+        api.SetImage(img)
+        api.SetSourceResolution(dpi)
+        return tesseract_tsv_to_data(TSV_HEADER + "\n" + (api.GetTSVText(0) or ""))
+
+    def close(self):
+        with self._lock:
+            apis, self._apis = self._apis, []
+        for api in apis:
+            try:
+                api.End()
+            except Exception:
+                pass
+
+
+class FakeOcrBackend(OcrBackend):
+    # Детерминированный движок без Tesseract для проверки и бенчмарков конвейера: одна строка
+    # с размером и хэшем изображения, уверенность 95; delay имитирует время распознавания
+    name = "fake"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def image_to_data(self, img, dpi, psm=3, whitelist=None):
+        if self.delay:
+            time.sleep(self.delay)
+        width, height = img.size
+        words = ["FAKE", "OCR", f"{width}x{height}", f"dpi{dpi}", f"psm{psm}",
+                 hashlib.sha1(img.tobytes()).hexdigest()]
+        n = len(words)
+        return {
+            "level": [5] * n, "page_num": [1] * n, "block_num": [1] * n, "par_num": [1] * n,
+            "line_num": [1] * n, "word_num": list(range(1, n + 1)),
+            "left": [i * width // n for i in range(n)], "top": [0] * n,
+            "width": [width // n] * n, "height": [height] * n,
+            "conf": [95.0] * n, "text": words,
+        }
+
+
+OCR_BACKENDS = {
+    TesseractCliBackend.name: TesseractCliBackend,
+    TesserocrBackend.name: TesserocrBackend,
+    FakeOcrBackend.name: FakeOcrBackend,
+}
+
+
+class _PendingPage:
+    # Страница в очереди iter_pages; future — незавершённый OCR (или разметка, пока probing),
+    # tier — индекс текущего DPI, regions — области OCR (None — вся страница)
+    __slots__ = ("index", "text", "source", "future", "tier", "best", "probing", "regions", "words")
+
+    def __init__(self, index, text, source, future=None, words=None):
+        self.index = index
+        self.text = text
+        self.source = source
+        self.future = future
+        self.words = words
+        self.tier = 0
+        self.best = None
+        self.probing = False
+        self.regions = None
+
+
+def _match_value(m):
+    return (m.group(1) if (m.groups() and m.group(1)) else m.group(0)).strip()
+
+
+# ---- Правила извлечения полей реестра (field_rules.json рядом с программой) ----
+# Шаблоны регистронезависимы; у поля шаблоны идут в порядке приоритета. value — как из
+# совпадения получить значение: match (группа 1 или всё совпадение), contract, kgs,
+# communication (приведение к типу из comm_types.json). allowed_types — дописать шаблоны
+# включённых типов коммуникаций. communication_synonyms — шаблоны для приведения
+# найденного текста к стандартному типу, проверяются по порядку.
+FIELD_RULES_VERSION = 1
+FIELD_VALUE_KINDS = ("match", "contract", "kgs", "communication")
+REGISTRY_FIELDS = ("Тип коммуникации", "Номер договора", "КГС", "Дата съемки")
+# Колонки реестра Excel; «Пересечения» — съёмки из сводной базы точек с совпадающими точками
+REGISTRY_HEADERS = (
+    "Файл", "Тип коммуникации", "Номер договора", "КГС", "Дата съемки",
+    "Количество точек", "Статус", "Точки", "Пересечения",
+)
+# Именованные стили ячеек реестра: регистрируются в книге один раз, ячейке назначается имя
+REGISTRY_STYLE_HEADER = "Реестр: заголовок"
+REGISTRY_STYLE_BODY = "Реестр: ячейка"
+REGISTRY_STYLE_DATE = "Реестр: дата"
+REGISTRY_MAX_COLUMN_WIDTH = 50
+
+
+def registry_column_width(value):
+    # Ширина колонки реестра под значение (в символах, с запасом 2)
+    return min(len(str(value)) + 2, REGISTRY_MAX_COLUMN_WIDTH)
+
+
+DEFAULT_FIELD_RULES = {
+    "version": FIELD_RULES_VERSION,
+    "fields": [
+        {
+            "name": "Тип коммуникации",
+            "value": "communication",
+            "allowed_types": True,
+            "patterns": [
+                r"Вид\s*коммуникации/здания,\s*сооружения:\s*([^\n]+)",
+                r"Вид\s*коммуникации[^\n:]*[:\s]*([^\n]+)",
+                r"Тип\s*коммуникации[^\n:]*[:\s]*([^\n]+)",
+                r"Коммуникац[ияи][^\n:]*[:\s]*([^\n]+)",
+                r"Кабель\s*связи\b", r"Тел\s*канализац[ия]{2,4}\b", r"Кабельная\s*канализац[ия]{2,4}\b",
+                r"ВОЛС\b", r"КТВ\b", r"Эл\s*кабель\b", r"Кабель\s*техн\.?\s*и\s*очаг\.?\s*заземл\b",
+                r"Контур\s*заземл\b", r"Кабель\s*н[оo0]\b", r"Водосток\b", r"Вод-?д\b", r"Трубопровод\b",
+                r"Канализац[ия]{2,4}\s*хоз-?быт\b", r"ЛОС\b", r"Дренаж\b", r"Воздухопровод\b",
+                r"Вент\.?\s*ветки\b", r"Теплотрасса\b", r"Коллектор\b", r"Газопровод\b", r"Нефтепровод\b",
+                r"Продуктопровод\b", r"СОУЭ\b", r"СКУД\b", r'\bКанализац(ия)?\b', r'Нап\s*канализац',
+                r'Сам\s*канализац', r'Водовыпуск\b', r'Кабель\s*защ\b', r'\bГаз\b', r'\bТепл\b',
+            ],
+        },
+        {
+            "name": "Номер договора",
+            "value": "contract",
+            "patterns": [
+                r"№\s*договора\s*\(?соглашения\)?\s*на\s*проведение\s*работ[^\n:]*[:\s]*([^\n,;]+)",
+                r"№\s*договора[^\n:]*[:\s]*([^\n,;]+)",
+                r"Договор\s*№\s*(\S+)",
+                r"№\s*контракта[^\n:]*[:\s]*(\S+)",
+            ],
+        },
+        {
+            "name": "КГС",
+            "value": "kgs",
+            "patterns": [
+                r"№ КГС:\s*(\d{2,5}[-\/]\d{2,5})",
+                r"№ КГС:\s*([A-ZА-Я]?\d+[A-ZА-Я]?)",
+                r"(?:КГС|№|N)\s*[:\-]?\s*(\d{2,5}[-\/]\d{2,5})",
+                r"(?:КГС|№|N)\s*[:\-]?\s*([A-ZА-Я]?\d+[A-ZА-Я]?)",
+                r"КГС\s*([^\n,;]+)",
+                r"\b(\d{2,5}-\d{2,5})\b",
+                r"\b(\d{5}-\d{2})\b",
+            ],
+        },
+        {
+            "name": "Дата съемки",
+            "value": "match",
+            "patterns": [
+                r"Дата\s*съ[её]мки\s*[:\s]*([0-9]{2}\.[0-9]{2}\.[0-9]{4})",
+                r"Съемка\s*от\s*([0-9]{2}\.[0-9]{2}\.[0-9]{4})",
+                r"\b\d{2}\.\d{2}\.\d{4}\b",
+            ],
+        },
+    ],
+    "communication_synonyms": [
+        {"pattern": p, "type": t} for p, t in (
+            (r'кабел[ьи]?\с*связ[и]?', 'Кабель связи'),
+            (r'тел[е]?\с*канализац[ия]{2,4}', 'Тел канализация'),
+            (r'кабел[ьи]?\с*канализац[ия]{2,4}', 'Кабельная канализация'),
+            (r'волоконно-?\с*оптическ[ая]?\с*лини[яи]?\с*связ[и]?', 'ВОЛС'),
+            (r'кабел[ьное]?\с*телевидени[е]?', 'КТВ'),
+            (r'эл[ек]?\с*кабел[ья]?', 'Эл кабель'),
+            (r'кабел[ь]?\с*техн[\.]?\с*и\s*очаг[\.]?\с*заземл[ения]?', 'Кабель техн. и очаг. заземл'),
+            (r'контур\s*заземл[ения]?', 'Контур заземл'),
+            (r'кабел[ь]?\с*н[оo0]', 'Кабель но'),
+            (r'наружн[ое]?\с*освещени[е]', 'Кабель но'),
+            (r'ливнев[ая]?\с*канализац[ия]{2,4}', 'Водосток'),
+            (r'вод-?д', 'Вод-д'),
+            (r'водопровод', 'Вод-д'),
+            (r'трубопровод', 'Трубопровод'),
+            (r'канализац[ия]{2,4}\с*хоз-?быт', 'Канализация'),
+            (r'хоз-?бытов[ая]?\с*канализац[ия]{2,4}', 'Канализация'),
+            (r'лос\b', 'ЛОС'),
+            (r'локальн[ые]?\с*очистн[ые]?\с*сооружени[я]', 'ЛОС'),
+            (r'дренаж', 'Дренаж'),
+            (r'воздухопровод', 'Воздухопровод'),
+            (r'вент[\.]?\s*ветк[и]?', 'Вент. ветки'),
+            (r'вентиляционн[ые]?\с*ветк[и]?', 'Вент. ветки'),
+            (r'теплотрасса', 'Теплотрасса'),
+            (r'теплов[ые]?\с*сет[и]?', 'Теплотрасса'),
+            (r'коллектор', 'Коллектор'),
+            (r'газопровод', 'Газопровод'),
+            (r'нефтепровод', 'Нефтепровод'),
+            (r'продуктопровод', 'Продуктопровод'),
+            (r'соуэ\b', 'СОУЭ'),
+            (r'систем[аы]?\с*оповещени[я]?\с*и\s*управлен[ие]?\с*эвакуаци[ей]', 'СОУЭ'),
+            (r'скуд\b', 'СКУД'),
+            (r'систем[аы]?\с*контрол[я]?\с*управлени[я]?\с*доступом', 'СКУД'),
+            (r'\bканализац(ия)?\b', 'Канализация'),
+            (r'нап[оо]рн[аяые]?\с*канализац[ия]{2,4}|нап\.?\s*канализац', 'Нап канализация'),
+            (r'сам[о]?течн[аяые]?\с*канализац[ия]{2,4}|сам\.?\s*канализац', 'Сам канализация'),
+            (r'водо[вв]ыпуск', 'Водовыпуск'),
+            (r'кабел[ьи]?\с*защ', 'Кабель защ'),
+            (r'\bгаз\b', 'Газ'),
+            (r'тепл(о|\.|\b)', 'Теплотрасса'),
+        )
+    ],
+}
+
+# Символы, которые re с IGNORECASE считает равными, хотя str.lower() их различает
+CASE_FOLD_EXTRA = str.maketrans({
+    "ı": "i", "ſ": "s", "µ": "μ", "ͅ": "ι", "\u1fbe": "ι", "\u1fd3": "\u0390", "\u1fe3": "\u03b0",
+    "ϐ": "β", "ϵ": "ε", "ϑ": "θ", "ϰ": "κ", "ϖ": "π", "ϱ": "ρ", "ς": "σ", "ϕ": "φ",
+    "ᲀ": "в", "ᲁ": "д", "ᲂ": "о", "ᲃ": "с", "ᲄ": "т", "ᲅ": "т", "ᲆ": "ъ", "ᲇ": "ѣ", "ᲈ": "ꙋ",
+    "ẛ": "ṡ", "ﬅ": "ﬆ",
+})
+CASE_FOLD_EXTRA_RE = re.compile("[" + "".join(chr(c) for c in CASE_FOLD_EXTRA) + "]")
+REGEX_META = set(".^$*+?{}[]|()")
+
+
+def fold_case(text):
+    # Регистр свёрнут так же, как его сравнивает re.IGNORECASE; длина и позиции символов
+    # совпадают с исходным текстом (İ — единственный символ, который lower() удлиняет)
+    folded = text.lower()
+    if len(folded) != len(text):
+        folded = text.replace("İ", "i").lower()
+    if CASE_FOLD_EXTRA_RE.search(folded):
+        folded = folded.translate(CASE_FOLD_EXTRA)
+    return folded
+
+
+# Нормализация текста для шаблонов полей и каталога (после fold_case): ё → е, латинские
+# двойники кириллических букв (в том числе заглавных: K, M, T, H, B) → кириллица,
+# варианты тире → "-", пробельные символы внутри строки → пробел. Переводы строк не трогаются
+TEXT_FOLD = {
+    "ё": "е", "a": "а", "c": "с", "e": "е", "o": "о", "p": "р", "x": "х", "y": "у",
+    "k": "к", "m": "м", "t": "т", "h": "н", "b": "в",
+    "\u2010": "-", "\u2011": "-", "\u2012": "-", "\u2013": "-", "\u2014": "-", "\u2212": "-",
+    "\t": " ", "\xa0": " ", "\u1680": " ", "\u2000": " ", "\u2001": " ", "\u2002": " ",
+    "\u2003": " ", "\u2004": " ", "\u2005": " ", "\u2006": " ", "\u2007": " ", "\u2008": " ",
+    "\u2009": " ", "\u200a": " ", "\u202f": " ", "\u205f": " ", "\u3000": " ",
+}
+SPACE_RUN_RE = re.compile(" {2,}")
+
+
+def fold_text(text):
+    # fold_case и замены TEXT_FOLD; длина не меняется. str.replace только для символов,
+    # которые есть в тексте, — для кириллического текста это намного быстрее translate
+    text = fold_case(text)
+    for char, repl in TEXT_FOLD.items():
+        if char in text:
+            text = text.replace(char, repl)
+    return text
+
+
+def normalize_text(text):
+    # То же, что NormalizedText(text).text, без карты позиций
+    return SPACE_RUN_RE.sub(" ", fold_text(text))
+
+
+class NormalizedText:
+    """Нормализованный текст страницы (или документа) для шаблонов полей и каталога.
+
+    text — результат normalize_text: нижний регистр, ё → е, латинские двойники →
+    кириллица, тире → "-", пробелы внутри строки схлопнуты; строки те же, что в исходном
+    тексте. Позиции в text переводятся обратно в original, поэтому значения полей и
+    описания точек берутся из исходного текста без изменений.
+    """
+
+    def __init__(self, original):
+        self.original = original
+        folded = fold_text(original)
+        # начала участков, внутри которых позиции text и original сдвинуты одинаково
+        self._text_starts = [0]
+        self._original_starts = [0]
+        parts = []
+        last = shift = 0
+        for m in SPACE_RUN_RE.finditer(folded):
+            start, end = m.span()
+            parts.append(folded[last:start + 1])
+            last = end
+            shift += end - start - 1
+            self._text_starts.append(end - shift)
+            self._original_starts.append(end)
+        if parts:
+            parts.append(folded[last:])
+            folded = "".join(parts)
+        self.text = folded
+
+    def to_original(self, pos):
+        if len(self._text_starts) == 1:
+            return pos
+        k = bisect.bisect_right(self._text_starts, pos) - 1
+        return self._original_starts[k] + pos - self._text_starts[k]
+
+    def original_slice(self, start, end):
+        if start >= end:
+            return ""
+        return self.original[self.to_original(start):self.to_original(end - 1) + 1]
+
+    def original_match(self, match):
+        return OriginalMatch(self, match)
+
+    @classmethod
+    def concat(cls, first, second):
+        # Склейка без повторной нормализации: first должен заканчиваться переводом строки
+        # (пробелы схлопываются только внутри строки, замены символов не меняют длину)
+        view = cls.__new__(cls)
+        view.original = first.original + second.original
+        view.text = first.text + second.text
+        view._text_starts = first._text_starts + [len(first.text) + s for s in second._text_starts]
+        view._original_starts = first._original_starts + [
+            len(first.original) + s for s in second._original_starts]
+        return view
+
+
+class OriginalMatch:
+    """Совпадение шаблона в NormalizedText.text; группы — фрагменты исходного текста."""
+
+    __slots__ = ("view", "match")
+
+    def __init__(self, view, match):
+        self.view = view
+        self.match = match
+
+    def groups(self):
+        return tuple(self.group(i) for i in range(1, self.match.re.groups + 1))
+
+    def group(self, index=0):
+        start, end = self.match.span(index)
+        return None if start < 0 else self.view.original_slice(start, end)
+
+
+def _has_top_level_alternation(pattern):
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            i += 2 if pattern[i + 1:i + 2] == "]" or pattern[i + 1:i + 3] == "^]" else 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def regex_literal_prefix(pattern):
+    # Обязательное литеральное начало каждого совпадения шаблона (нормализованное, как
+    # NormalizedText.text) или "", если его нет: группа или класс в начале, альтернативы на верхнем уровне
+    if _has_top_level_alternation(pattern):
+        return ""
+    literal = []
+    i = 0
+    while pattern.startswith("\\b", i) and not literal:
+        i += 2
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            if i + 1 >= len(pattern) or (pattern[i + 1].isascii() and pattern[i + 1].isalnum()):
+                break  # \s, \d, \b, ссылки на группы
+            char, step = pattern[i + 1], 2
+        elif c in REGEX_META:
+            break
+        else:
+            char, step = c, 1
+        quantifier = pattern[i + step:i + step + 1]
+        if quantifier and quantifier in "*?{+":
+            if quantifier == "+":
+                literal.append(char)
+            break
+        literal.append(char)
+        i += step
+    return normalize_text("".join(literal))
+
+
+# name — поле реестра; patterns — скомпилированные шаблоны по приоритету; literals — их
+# литеральные начала (normalize_text) для быстрой проверки подстрокой; value_of(match) —
+# значение или None (совпадение отвергнуто); match — OriginalMatch
+FieldRule = namedtuple("FieldRule", "name patterns literals value_of")
+
+
+class FieldRuleSet:
+    """Проверенные и скомпилированные правила из field_rules.json."""
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise ValueError("ожидается объект JSON")
+        version = spec.get("version")
+        if not isinstance(version, int) or version < 1 or version > FIELD_RULES_VERSION:
+            raise ValueError(f"неподдерживаемая версия {version!r} (ожидается {FIELD_RULES_VERSION})")
+        fields = spec.get("fields")
+        if not isinstance(fields, list):
+            raise ValueError("fields должен быть списком")
+        self.fields = []
+        for n, field in enumerate(fields, 1):
+            where = f"fields[{n}]"
+            if not isinstance(field, dict):
+                raise ValueError(f"{where}: ожидается объект")
+            name = field.get("name")
+            if name not in REGISTRY_FIELDS:
+                raise ValueError(f"{where}: неизвестное поле {name!r}")
+            if any(existing[0] == name for existing in self.fields):
+                raise ValueError(f"{where}: поле {name!r} задано дважды")
+            kind = field.get("value", "match")
+            if kind not in FIELD_VALUE_KINDS:
+                raise ValueError(f"{where}: value должен быть одним из {', '.join(FIELD_VALUE_KINDS)}")
+            patterns = field.get("patterns")
+            if not isinstance(patterns, list) or not patterns:
+                raise ValueError(f"{where}: patterns должен быть непустым списком")
+            compiled = [self._compile(p, f"{where}.patterns[{k}]") for k, p in enumerate(patterns, 1)]
+            self.fields.append((name, kind, compiled, bool(field.get("allowed_types", False))))
+        missing = [name for name in REGISTRY_FIELDS if not any(f[0] == name for f in self.fields)]
+        if missing:
+            raise ValueError(f"не заданы поля: {', '.join(missing)}")
+        synonyms = spec.get("communication_synonyms", [])
+        if not isinstance(synonyms, list):
+            raise ValueError("communication_synonyms должен быть списком")
+        self.synonyms = []
+        for n, item in enumerate(synonyms, 1):
+            where = f"communication_synonyms[{n}]"
+            if not isinstance(item, dict) or not isinstance(item.get("type"), str) or not item["type"].strip():
+                raise ValueError(f"{where}: ожидается объект с pattern и type")
+            self.synonyms.append((self._compile(item.get("pattern"), where), item["type"].strip()))
+        self.version = version
+        self._patterns_cache = {}
+
+    @staticmethod
+    def _compile(pattern, where):
+        if not isinstance(pattern, str) or not pattern:
+            raise ValueError(f"{where}: шаблон должен быть непустой строкой")
+        try:
+            return re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"{where}: ошибка в шаблоне {pattern!r}: {e}")
+
+    def patterns_for(self, allowed_communications):
+        # [(name, kind, patterns, literals)] с шаблонами включённых типов; кэш по списку типов
+        key = tuple(allowed_communications)
+        cached = self._patterns_cache.get(key)
+        if cached is None:
+            allowed_patterns = [re.compile(rf"{re.escape(normalize_text(ct))}\b", re.IGNORECASE) for ct in key if ct]
+            cached = []
+            for name, kind, patterns, with_allowed in self.fields:
+                patterns = patterns + allowed_patterns if with_allowed else patterns
+                literals = [regex_literal_prefix(p.pattern) for p in patterns]
+                cached.append((name, kind, patterns, literals))
+            self._patterns_cache[key] = cached
+        return cached
+
+
+def communication_phrases(text):
+    # Фразы из 2 и 3 соседних слов строки — кандидаты на тип коммуникации
+    for line in text.split('\n'):
+        words = line.strip().split()
+        for i in range(len(words) - 1):
+            phrase = ' '.join(words[i:i+2])
+            if len(phrase) > 5:
+                yield phrase
+            if i < len(words) - 2:
+                phrase = ' '.join(words[i:i+3])
+                if len(phrase) > 8:
+                    yield phrase
+
+
+class CommunicationTypeIndex:
+    """Индекс включённых типов коммуникаций для нечёткого сравнения с фразами текста.
+
+    Оценка совпадает с PDFProcessor.similarity, но считается только для типов, которые
+    могут получить ненулевую: с общим словом, с теми же первыми буквами слов или
+    входящих во фразу (содержащих её) подстрокой. Кандидаты на подстроку отбираются
+    по 3-граммам: тип во фразе — по первой 3-грамме типа, фраза в типе — по первой 3-грамме фразы.
+    """
+
+    GRAM = 3
+
+    def __init__(self, comm_types):
+        self.names = list(comm_types)
+        self.types = []  # (строка в нижнем регистре, множество слов, первые буквы слов или None)
+        self.by_word = defaultdict(list)
+        self.by_initials = defaultdict(list)
+        self.by_gram = defaultdict(list)
+        self.by_first_gram = defaultdict(list)
+        self.short = []  # короче 3-граммы — проверяются всегда
+        for i, name in enumerate(self.names):
+            lowered = normalize_text(name)
+            words = lowered.split()
+            initials = ''.join(word[0] for word in words) if len(lowered) > 3 and words else None
+            self.types.append((lowered, set(words), initials))
+            for word in set(words):
+                self.by_word[word].append(i)
+            if initials:
+                self.by_initials[initials].append(i)
+            if len(lowered) < self.GRAM:
+                self.short.append(i)
+                continue
+            self.by_first_gram[lowered[:self.GRAM]].append(i)
+            for gram in {lowered[k:k + self.GRAM] for k in range(len(lowered) - self.GRAM + 1)}:
+                self.by_gram[gram].append(i)
+        self.first_grams = frozenset(self.by_first_gram)
+        self.words = frozenset(self.by_word)
+
+    def candidates(self, phrase, words):
+        # Номера типов (по порядку списка), у которых оценка с фразой может быть больше нуля
+        found = set(self.short)
+        for word in words & self.words:
+            found.update(self.by_word[word])
+        if len(phrase) > 3 and words:
+            found.update(self.by_initials.get(''.join(word[0] for word in phrase.split()), ()))
+        n = self.GRAM
+        if len(phrase) >= n:
+            found.update(self.by_gram.get(phrase[:n], ()))
+            grams = {phrase[k:k + n] for k in range(len(phrase) - n + 1)}
+            for gram in grams & self.first_grams:
+                found.update(self.by_first_gram[gram])
+        return sorted(found)
+
+    def score(self, phrase, words, i):
+        # То же, что PDFProcessor.similarity(phrase, names[i]) для нормализованных фразы и типа
+        lowered, type_words, type_initials = self.types[i]
+        if phrase in lowered or lowered in phrase:
+            return 0.9
+        if not words or not type_words:
+            return 0.0
+        score = len(words & type_words) / len(words | type_words)
+        if type_initials and len(phrase) > 3 and ''.join(word[0] for word in phrase.split()) == type_initials:
+            score = max(score, 0.7)
+        return score
+
+    def best_match(self, phrases, best_score):
+        # Первый (по фразам, затем по типам) тип с наибольшей оценкой выше best_score —
+        # как полный перебор «каждая фраза × каждый тип»; фразы — из нормализованного текста
+        best_match = None
+        seen = set()
+        for phrase in phrases:
+            if phrase in seen:
+                continue  # повтор фразы не может дать строго большую оценку
+            seen.add(phrase)
+            words = set(phrase.split())
+            for i in self.candidates(phrase, words):
+                score = self.score(phrase, words, i)
+                if score > best_score:
+                    best_score = score
+                    best_match = self.names[i]
+        return best_match, best_score
+
+    def first_above(self, text, threshold):
+        words = set(text.split())
+        for i in self.candidates(text, words):
+            if self.score(text, words, i) > threshold:
+                return self.names[i]
+        return None
+
+
+class StreamingFieldExtractor:
+    """Поля реестра по мере поступления страниц.
+
+    Для каждого шаблона запоминается его первое совпадение, поэтому результат такой же,
+    как при поиске по всему тексту документа сразу (страницы в нём разделены переводом
+    строки). Последние строки предыдущей страницы ищутся вместе со следующей,
+    поэтому подпись и значение, разорванные переносом страницы, тоже находятся. Отличие
+    остаётся только для совпадения, которое начинается раньше этих строк.
+    """
+
+    COMM_FIELD = "Тип коммуникации"
+    TAIL_LINES = 3
+    _UNDECIDED = object()
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.allowed_communications = processor.get_allowed_comm_types()
+        self.rules = processor.build_field_rules(self.allowed_communications)
+        # значение по каждому шаблону: _UNDECIDED, None (отвергнуто) или найденное значение
+        self.outcomes = {rule.name: [self._UNDECIDED] * len(rule.patterns) for rule in self.rules}
+        self.best_comm_match = None
+        self.best_comm_score = 0.6
+        self._tail = None  # NormalizedText последних строк предыдущей страницы
+
+    def _accepted(self, name):
+        for outcome in self.outcomes[name]:
+            if outcome is not self._UNDECIDED and outcome is not None:
+                return True
+        return False
+
+    def feed(self, view):
+        # view — NormalizedText страницы. Шаблон с литеральным началом ищется регулярным
+        # выражением только с первого вхождения этого литерала (и не ищется вовсе, если
+        # литерала нет) — результат тот же, что у поиска по всему тексту
+        search = None  # хвост предыдущей страницы + эта страница, склеивается по требованию
+        for rule in self.rules:
+            outcomes = self.outcomes[rule.name]
+            for k, pattern in enumerate(rule.patterns):
+                if outcomes[k] is self._UNDECIDED:
+                    if search is None:
+                        search = view if self._tail is None else NormalizedText.concat(self._tail, view)
+                    text = search.text
+                    literal = rule.literals[k]
+                    start = text.find(literal) if literal else 0
+                    m = pattern.search(text, start) if start >= 0 else None
+                    if m:
+                        outcomes[k] = rule.value_of(search.original_match(m))
+                if outcomes[k] is not self._UNDECIDED and outcomes[k] is not None:
+                    break
+        if not self._accepted(self.COMM_FIELD):
+            match, score = self.processor.score_communication_phrases(
+                view.text, self.allowed_communications, self.best_comm_score
+            )
+            if match:
+                self.best_comm_match, self.best_comm_score = match, score
+        self._tail = self._page_tail(view.original)
+
+    def _page_tail(self, original):
+        # Последние строки страницы с разделителем страниц, как в тексте документа
+        lines = original.rsplit("\n", self.TAIL_LINES)
+        if len(lines) > self.TAIL_LINES:
+            lines = lines[1:]
+        return NormalizedText("\n".join(lines) + "\n")
+
+    def is_complete(self):
+        # Все поля заполнены (не обязательно шаблоном наивысшего приоритета)
+        return all(
+            self._accepted(rule.name) or (rule.name == self.COMM_FIELD and self.best_comm_match)
+            for rule in self.rules
+        )
+
+    def result(self):
+        data = {}
+        for rule in self.rules:
+            name = rule.name
+            value = None
+            for outcome in self.outcomes[name]:
+                if outcome is not self._UNDECIDED and outcome is not None:
+                    value = outcome
+                    break
+            if value is None and name == self.COMM_FIELD and self.best_comm_match:
+                value = self.best_comm_match
+                self.processor.log_message(
+                    f"Определен тип коммуникации: '{value}' (схожесть: {self.best_comm_score:.1%})"
+                )
+            data[name] = value
+        return data
+
+
+# Подпись номера съёмки, по которой сборный PDF делится на отдельные КГС
+KGS_LABEL_RE = re.compile(r"(?:№\s*КГС|КГС\s*№)\s*:?\s*([А-ЯA-Z]?\d+(?:[-/]\d+)?[А-ЯA-Z]?)", re.IGNORECASE)
+
+
+def kgs_label(text):
+    m = KGS_LABEL_RE.search(text)
+    return m.group(1).upper() if m else None
+
+
+class KgsDocument:
+    """Одна съёмка (КГС) в PDF: поля реестра и каталог точек со своих страниц.
+
+    В сборном PDF новая съёмка начинается со страницы, где подпись «№ КГС» указывает
+    на другой номер; у каждой съёмки своё состояние разбора, результаты не смешиваются.
+    """
+
+    def __init__(self, processor, first_page, label=None, multiple_catalogs=False):
+        self.fields = StreamingFieldExtractor(processor)
+        self.catalog = CoordinateCatalogParser(multiple_catalogs) if processor.import_points else None
+        self.first_page = self.last_page = first_page
+        self.label = label
+
+    def claims(self, label):
+        # False — страница с подписью label относится уже к другой съёмке
+        if label is None:
+            return True
+        if self.label is None:
+            self.label = label
+        return label == self.label
+
+    def feed(self, page, view):
+        self.last_page = page.index + 1
+        self.fields.feed(view)
+        if self.catalog is not None:
+            if page.words:
+                self.catalog.feed_words(page.words)
+            else:
+                self.catalog.feed(view)
+
+    def is_complete(self):
+        return self.fields.is_complete() and (self.catalog is None or self.catalog.done)
+
+    def pages(self):
+        if self.first_page == self.last_page:
+            return f"стр. {self.first_page}"
+        return f"стр. {self.first_page}–{self.last_page}"
+
+
+CATALOG_START_KEYS = [re.compile(k, re.IGNORECASE) for k in (
+    r"каталог\s+(?:исполнительных\s+|фактических\s+)?координат",
+    r"ведомость\s+(?:исполнительных\s+|фактических\s+)?координат",
+    r"координаты\s+точек", r"координаты\s+пунктов",
+    r"№\s*точки.*[XХ].*[YУ].*[HН]?", r"n/n\s*по\s*съемке\s*[xх]\s*,\s*[мМm]\s*[yу]\s*,\s*[мМm]\s*[hн]\s*,\s*[мМm]",
+)]
+CATALOG_HEADER_PATTERNS = [re.compile(k, re.IGNORECASE) for k in (
+    r"n/n\s*по\s*съемке\s*[xх]\s*,\s*[мmМ]\s*[yу]\s*,\s*[мmМ]\s*[hн]\s*,\s*[мmМ]?",
+    r"n/n\s*по\s*съемке\s*[xх]\s*,?\s*[мmМ]?\s*[yу]\s*,?\s*[мmМ]?\s*[hн]\s*,?\s*[мmМ]?",
+    r"№\s*точки.*[xхyуhн]",
+    r"№\s*точки.*координаты",
+)]
+# Шаблоны каталога применяются к NormalizedText.text: тире там уже "-"
+CATALOG_ROW_RE = re.compile(
+    r"^\s*(\d+)(?:\s+\d+)?\s+(-?\d{1,3}(?:\s*\d{3})*[.,]\d{1,3})\s+(-?\d{1,3}(?:\s*\d{3})*[.,]\d{1,3})(?:\s+(-?\d{1,3}(?:\s*\d{3})*[.,]\d{1,3}))?(?:\s+(.*))?$",
+    re.IGNORECASE
+)
+CATALOG_NUM_TOKEN_RE = re.compile(r"-?\d+(?:\s?\d{3})*(?:[.,]\d+)?")
+# Буквы, которые OCR путает с цифрами, в нормализованном виде (О/O → о, B/В → в, ...)
+CATALOG_DIGIT_FOLD = str.maketrans({
+    "о": "0", "i": "1", "l": "1", "е": "1", "z": "2", "з": "3", "s": "5", "б": "6", "в": "8",
+    "°": "0", "=": "-", "_": "-",
+})
+CATALOG_MAX_SKIP = 10  # столько пустых/нераспознанных строк подряд завершают каталог
+
+
+CLEAN_NUM_RE = re.compile(r"-?\d+(?:\.\d+)?")
+WHITESPACE_RE = re.compile(r"\s+")
+NOT_NUM_CHAR_RE = re.compile(r"[^\d\.-]")
+DIGIT_RE = re.compile(r"\d")
+
+
+def clean_num_string(v):
+    if not v: return ""
+    s = str(v).strip()
+    if CLEAN_NUM_RE.fullmatch(s):
+        return s  # обычный случай: чинить нечего
+    s = WHITESPACE_RE.sub('', s.translate(CATALOG_DIGIT_FOLD)).replace(',', '.')
+    if s.count('-')>1:
+        s = ('-'+s.replace('-','')) if s.startswith('-') else s.replace('-','')
+    if s.count('.')>1:
+        p = s.split('.'); s = p[0]+'.'+''.join(p[1:])
+    s = NOT_NUM_CHAR_RE.sub('', s)
+    return s if DIGIT_RE.search(s) else ""
+
+
+def as_float(s):
+    try:
+        return float(s)
+    except:
+        return None
+
+
+# ---- Постобработка каталога по столбцам (списки pid/x/y/h/описание одинаковой длины) ----
+# Проходы по столбцам идут через map/compress/zip (цикл на C); пропуск в числовом
+# столбце — NaN, с ним любое сравнение ложно
+CATALOG_FIX_THRESHOLD = 500.0  # больше этого по модулю без минуса при «минусовом» большинстве — потерянный минус
+CATALOG_HEIGHT_DIGITS_RE = re.compile(r"\d{4,6}")
+NAN = float("nan")
+
+
+def column_floats(values):
+    try:
+        if "" not in values:
+            return list(map(float, values))
+        return [float(v) if v else NAN for v in values]
+    except ValueError:  # есть нечисловые строки — медленный путь
+        return [NAN if v is None else v for v in map(as_float, values)]
+
+
+def column_missing(values):
+    # True там, где числа нет (NaN != NaN)
+    return map(float.__ne__, values, values)
+
+
+def column_majority_negative(values):
+    return sum(map((0.0).__gt__, values)) > sum(map((0.0).__lt__, values))
+
+
+def column_fix_lost_minus(strings, values):
+    # Номера строк, где у положительного значения больше порога дописан минус (на месте)
+    fixed = list(compress(range(len(values)), map(CATALOG_FIX_THRESHOLD.__lt__, values)))
+    for i in fixed:
+        s = strings[i]
+        if not s.startswith("-"):
+            strings[i] = "-" + s
+        values[i] = -values[i]
+    return fixed
+
+
+def column_fix_heights(strings, values):
+    # Высоты без десятичной точки (12345 -> 123.45); {номер строки: прежняя строка}
+    fixed = {}
+    for i in compress(range(len(values)), map(CATALOG_FIX_THRESHOLD.__lt__, values)):
+        h_s = strings[i]
+        if CATALOG_HEIGHT_DIGITS_RE.fullmatch(h_s):
+            h_s_fixed = h_s[:-2] + "." + h_s[-2:]
+            h_fixed = as_float(h_s_fixed)
+            if h_fixed is not None and 0 < h_fixed < CATALOG_FIX_THRESHOLD:
+                fixed[i] = h_s
+                strings[i], values[i] = h_s_fixed, h_fixed
+    return fixed
+
+
+
+def fuzzy_parse_catalog_row(line):
+    m_id = re.match(r"\s*(\d+)(?:\s+\d+)?", line)
+    if not m_id:
+        return None
+    pid = m_id.group(1)
+    rest = line[m_id.end():]
+    nums = [clean_num_string(t.group(0)) for t in CATALOG_NUM_TOKEN_RE.finditer(rest)]
+    nums = [n for n in nums if n]
+    x = y = h = ""
+    if len(nums) >= 2:
+        x, y = nums[0], nums[1]
+        if len(nums) >= 3:
+            h = nums[2]
+    desc = ""
+    if nums:
+        last = None
+        for m in CATALOG_NUM_TOKEN_RE.finditer(rest):
+            last = m
+        if last:
+            desc = rest[last.end():].strip()
+    else:
+        desc = rest.strip()
+    return pid, x, y, h, desc
+
+
+CATALOG_AXIS_LABEL_RE = re.compile(r"([хун])[\s,.:()]*(?:м[,.:()]*)?")  # "X, м", "Y", "H(м)" после normalize_text
+# Другие подписи столбца высот: "Отметка, м", "Z", "Hг"
+CATALOG_HEIGHT_LABEL_RE = re.compile(r"(?:отметка|отм|высота|нг|z)[\s,.:()]*(?:м[,.:()]*)?")
+CATALOG_NUM_WORD_RE = re.compile(r"[-–—−]?\d[\d.,]*")
+# Высота в столбце без подписи — число с дробной частью, как H в CATALOG_ROW_RE
+CATALOG_HEIGHT_WORD_RE = re.compile(r"[-–—−]?\d+[.,]\d{1,3}")
+DASH_FOLD = str.maketrans({"–": "-", "—": "-", "−": "-"})
+# Столбцы координат по подписям шапки: axes — "х"/"у"/"н" слева направо, bounds — границы
+# между соседними столбцами, left/right — края области чисел (левее — номера точек)
+CatalogColumns = namedtuple("CatalogColumns", "axes bounds left right")
+
+
+def catalog_word_lines(words):
+    # Слова страницы -> строки: слово попадает в строку, если его середина по высоте не
+    # дальше половины высоты от середины первого слова строки; внутри строки — слева направо
+    items = sorted(((w[1] + w[3]) / 2, w[0], w[2], w[3] - w[1], w[4]) for w in words if w[4].strip())
+    lines = []
+    current = []
+    line_middle = line_height = 0
+    for middle, x0, x1, height, text in items:
+        if current and middle - line_middle > max(line_height, height) / 2:
+            lines.append(sorted(current))
+            current = []
+        if not current:
+            line_middle, line_height = middle, height
+        current.append((x0, x1, text))
+    if current:
+        lines.append(sorted(current))
+    return lines
+
+
+def catalog_axis_columns(line):
+    # CatalogColumns по подписям X, Y (и H) в строке слов или None
+    centers = {}
+    for x0, x1, word in line:
+        word = normalize_text(word)
+        m = CATALOG_AXIS_LABEL_RE.fullmatch(word)
+        axis = m.group(1) if m else ("н" if CATALOG_HEIGHT_LABEL_RE.fullmatch(word) else None)
+        if axis and axis not in centers:
+            centers[axis] = (x0 + x1) / 2
+    if "х" not in centers or "у" not in centers:
+        return None
+    axes = sorted(centers, key=centers.get)
+    xs = [centers[axis] for axis in axes]
+    bounds = [(a + b) / 2 for a, b in zip(xs, xs[1:])]
+    return CatalogColumns(axes, bounds, xs[0] - (xs[1] - xs[0]) / 2, xs[-1] + (xs[-1] - xs[-2]) / 2)
+
+
+def catalog_geometry_row(line, columns):
+    # (pid, x, y, h, описание) строки точки по положению слов или None. Число — в столбце,
+    # к подписи которого ближе его середина; части числа с пробелом-разделителем
+    # (12 345.67) склеиваются; слова правее столбцов — описание. Если подписи высот
+    # в шапке нет, первое дробное число правее столбцов — высота, как в разборе текста
+    pid = line[0][2]
+    if not pid.isdigit():
+        return None
+    cells = {"х": [], "у": [], "н": []}
+    desc = []
+    for x0, x1, word in line[1:]:
+        center = (x0 + x1) / 2
+        if desc or center > columns.right:
+            if not desc and not cells["н"] and "н" not in columns.axes and CATALOG_HEIGHT_WORD_RE.fullmatch(word):
+                cells["н"].append(word)
+            else:
+                desc.append(word)
+        elif center >= columns.left and CATALOG_NUM_WORD_RE.fullmatch(word):
+            cells[columns.axes[bisect.bisect(columns.bounds, center)]].append(word)
+    if not cells["х"] and not cells["у"]:
+        return None
+    x, y, h = ("".join(cells[axis]).translate(DASH_FOLD) for axis in "хун")
+    return pid, x, y, h, " ".join(desc)
+
+
+class CoordinateCatalogParser:
+    """Построчный разбор каталога координат; текст можно подавать по страницам.
+
+    Страницы с текстовым слоем разбираются по словам с координатами (feed_words):
+    значения раскладываются по столбцам X/Y/H по положению подписей шапки. Текст OCR
+    (feed) — регулярными выражениями. Точки хранятся по столбцам: pids, xs, ys, hs
+    (очищенные строки чисел) и descs. С multiple=True после конца каталога разбор снова
+    ждёт начала каталога, и точки следующих каталогов дописываются к уже найденным.
+    """
+
+    def __init__(self, multiple=False):
+        self.multiple = multiple
+        self.pids = []
+        self.xs = []
+        self.ys = []
+        self.hs = []
+        self.descs = []
+        self.max_id = 0
+        self.parsing = False
+        self.skip = 0
+        self.table_header_found = False
+        self.columns = None  # CatalogColumns из шапки таблицы текстового слоя
+        self.done = False
+
+    def feed(self, view):
+        # view — NormalizedText; описания точек берутся из исходного текста
+        if self.done:
+            return
+        offset = 0
+        for line in view.text.splitlines(keepends=True):
+            self.feed_line(line, view, offset)
+            if self.done:
+                return
+            offset += len(line)
+
+    def feed_words(self, words):
+        if self.done:
+            return
+        for line in catalog_word_lines(words):
+            self.feed_word_line(line)
+            if self.done:
+                return
+
+    def feed_word_line(self, line):
+        if self.parsing and self.table_header_found:
+            if self.columns is None:
+                self.columns = catalog_axis_columns(line)
+                if self.columns is not None:
+                    self.skip = 0
+                    return
+            else:
+                row = catalog_geometry_row(line, self.columns)
+                if row is None:
+                    self._unparsed_line()
+                else:
+                    self.skip = 0
+                    self._add_row(*row)
+                return
+        # до шапки (или без подписей столбцов) — как строка текста
+        header_expected = self.parsing and not self.table_header_found
+        view = NormalizedText(" ".join(word for _, _, word in line))
+        self.feed_line(view.text, view, 0)
+        if header_expected and self.table_header_found:
+            self.columns = catalog_axis_columns(line)
+
+    def _unparsed_line(self):
+        self.skip += 1
+        if self.pids and self.skip >= CATALOG_MAX_SKIP:
+            if self.multiple:
+                self.parsing = self.table_header_found = False
+                self.columns = None
+                self.skip = 0
+            else:
+                self.done = True
+
+    def feed_line(self, line, view, offset):
+        t = line.strip()
+        if not t:
+            if self.parsing:
+                self._unparsed_line()
+            return
+        if not self.parsing:
+            if any(k.search(t) for k in CATALOG_START_KEYS):
+                self.parsing, self.skip = True, 0
+            return
+        if not self.table_header_found:
+            if any(p.search(t) for p in CATALOG_HEADER_PATTERNS):
+                self.table_header_found = True
+                self.skip = 0
+            return
+        m = CATALOG_ROW_RE.match(t)
+        if m:
+            self.skip = 0
+            pid, x, y, h, d = m.groups()
+        else:
+            parsed = fuzzy_parse_catalog_row(t)
+            if not parsed:
+                self._unparsed_line()
+                return
+            self.skip += 1
+            pid, x, y, h, d = parsed
+        if d:
+            # описание — хвост строки t; из исходного текста по тем же позициям
+            t_end = offset + len(line) - len(line.lstrip()) + len(t)
+            d = view.original_slice(t_end - len(d), t_end).strip()
+        self._add_row(pid, x, y, h, d)
+
+    def _add_row(self, pid, x, y, h, d):
+        if pid and pid.isdigit():
+            self.max_id = max(self.max_id, int(pid))
+        self.pids.append(pid)
+        self.xs.append(clean_num_string(x))
+        self.ys.append(clean_num_string(y))
+        self.hs.append(clean_num_string(h))
+        self.descs.append(d or "")
+
+
+def file_content_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class PageTextCache:
+    """Кэш текста страниц в SQLite: ключ — хэш содержимого PDF, номер страницы и настройки OCR."""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " doc_hash TEXT NOT NULL, page_index INTEGER NOT NULL, settings TEXT NOT NULL,"
+                " text TEXT NOT NULL, source TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (doc_hash, page_index, settings))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_document(self, doc_hash, settings):
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT page_index, text, source FROM pages WHERE doc_hash = ? AND settings = ?",
+                (doc_hash, settings),
+            ).fetchall()
+            if rows:
+                conn.execute(
+                    "UPDATE pages SET last_used = ? WHERE doc_hash = ? AND settings = ?",
+                    (time.time(), doc_hash, settings),
+                )
+                conn.commit()
+        return {page_index: (text, source) for page_index, text, source in rows}
+
+    def put(self, doc_hash, page_index, settings, text, source):
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (doc_hash, page_index, settings, text, source, size, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_hash, page_index, settings, text, source, size, time.time()),
+            )
+            conn.commit()
+
+    def evict(self):
+        # LRU: удаляем давно не использованные страницы, пока кэш не влезет в лимит
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            excess = total - self.max_bytes
+            freed = 0
+            cutoff = None
+            for last_used, size in conn.execute("SELECT last_used, size FROM pages ORDER BY last_used"):
+                freed += size
+                cutoff = last_used
+                if freed >= excess:
+                    break
+            deleted = conn.execute("DELETE FROM pages WHERE last_used <= ?", (cutoff,)).rowcount
+            conn.commit()
+            return deleted
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM pages")
+            conn.commit()
+            conn.execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class PointsStore:
+    """Сводное хранилище точек всех каталогов (SQLite) с сеточным индексом.
+
+    Точка относится к ячейке сетки со стороной cell метров; запросы по прямоугольнику,
+    по радиусу и поиск совпадающих точек других съёмок читают только нужные ячейки.
+    Съёмка (КГС) при повторной обработке перезаписывается.
+    """
+
+    def __init__(self, path, cell=100.0):
+        self.path = path
+        self.cell = float(cell)
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS surveys ("
+                " id INTEGER PRIMARY KEY, kgs TEXT NOT NULL UNIQUE, source TEXT NOT NULL,"
+                " min_x REAL, min_y REAL, max_x REAL, max_y REAL, points INTEGER NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS points ("
+                " survey INTEGER NOT NULL, pid TEXT NOT NULL, x REAL NOT NULL, y REAL NOT NULL, h REAL,"
+                " cx INTEGER NOT NULL, cy INTEGER NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS points_cell ON points (cx, cy);"
+                "CREATE INDEX IF NOT EXISTS points_survey ON points (survey);"
+            )
+            # размер ячейки задаётся при создании базы: по нему уже посчитаны ячейки точек.
+            # Нулевой размер мог записаться, но точек с ним нет (запись падала на делении)
+            row = conn.execute("SELECT value FROM meta WHERE key = 'cell'").fetchone()
+            if row and float(row[0]) > 0:
+                self.cell = float(row[0])
+            else:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('cell', ?)", (repr(self.cell),))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _cell(self, v):
+        return math.floor(v / self.cell)
+
+    def add_survey(self, kgs, source, points):
+        # points — (pid, x, y, h); h может быть None
+        cell = self._cell
+        rows = [(pid, x, y, h, cell(x), cell(y)) for pid, x, y, h in points]
+        conn = self._connect()
+        with conn:
+            old = conn.execute("SELECT id FROM surveys WHERE kgs = ?", (kgs,)).fetchone()
+            if old:
+                conn.execute("DELETE FROM points WHERE survey = ?", old)
+                conn.execute("DELETE FROM surveys WHERE id = ?", old)
+            xs = [r[1] for r in rows]
+            ys = [r[2] for r in rows]
+            survey = conn.execute(
+                "INSERT INTO surveys (kgs, source, min_x, min_y, max_x, max_y, points) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kgs, source, min(xs, default=None), min(ys, default=None),
+                 max(xs, default=None), max(ys, default=None), len(rows)),
+            ).lastrowid
+            conn.executemany(
+                f"INSERT INTO points (survey, pid, x, y, h, cx, cy) VALUES ({survey}, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return survey
+
+    def bbox(self, min_x, min_y, max_x, max_y):
+        # [(kgs, pid, x, y, h)] точек в прямоугольнике
+        cell = self._cell
+        return self._connect().execute(
+            "SELECT s.kgs, p.pid, p.x, p.y, p.h FROM points p JOIN surveys s ON s.id = p.survey"
+            " WHERE p.cx BETWEEN ? AND ? AND p.cy BETWEEN ? AND ?"
+            " AND p.x BETWEEN ? AND ? AND p.y BETWEEN ? AND ?",
+            (cell(min_x), cell(max_x), cell(min_y), cell(max_y), min_x, max_x, min_y, max_y),
+        ).fetchall()
+
+    def radius(self, x, y, r):
+        r2 = r * r
+        return [
+            row for row in self.bbox(x - r, y - r, x + r, y + r)
+            if (row[2] - x) ** 2 + (row[3] - y) ** 2 <= r2
+        ]
+
+    def duplicates(self, kgs, tolerance=0.5):
+        # {КГС другой съёмки: сколько точек съёмки kgs совпадают с её точками (ближе tolerance)}
+        conn = self._connect()
+        row = conn.execute("SELECT id FROM surveys WHERE kgs = ?", (kgs,)).fetchone()
+        if not row:
+            return {}
+        survey = row[0]
+        own = conn.execute("SELECT x, y, cx, cy FROM points WHERE survey = ?", (survey,)).fetchall()
+        # соседние ячейки нужны, только если допуск дотягивается до края ячейки
+        reach = math.ceil(tolerance / self.cell)
+        cells = {(cx + dx, cy + dy) for _, _, cx, cy in own
+                 for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)}
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_cells (cx INTEGER NOT NULL, cy INTEGER NOT NULL)")
+        conn.execute("DELETE FROM query_cells")
+        conn.executemany("INSERT INTO query_cells (cx, cy) VALUES (?, ?)", cells)
+        by_cell = defaultdict(list)
+        for other, x, y, cx, cy in conn.execute(
+            "SELECT p.survey, p.x, p.y, p.cx, p.cy FROM query_cells c"
+            " JOIN points p ON p.cx = c.cx AND p.cy = c.cy WHERE p.survey != ?",
+            (survey,),
+        ):
+            by_cell[(cx, cy)].append((other, x, y))
+        conn.commit()
+        counts = defaultdict(int)
+        t2 = tolerance * tolerance
+        for x, y, cx, cy in own:
+            matched = set()
+            for dx in range(-reach, reach + 1):
+                for dy in range(-reach, reach + 1):
+                    for other, ox, oy in by_cell.get((cx + dx, cy + dy), ()):
+                        if other not in matched and (ox - x) ** 2 + (oy - y) ** 2 <= t2:
+                            matched.add(other)
+            for other in matched:
+                counts[other] += 1
+        if not counts:
+            return {}
+        names = dict(conn.execute(
+            f"SELECT id, kgs FROM surveys WHERE id IN ({','.join('?' * len(counts))})", list(counts)
+        ))
+        return {names[other]: n for other, n in sorted(counts.items(), key=lambda item: -item[1])}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def format_duplicates(duplicates):
+    # Текст колонки реестра «Пересечения»
+    return "; ".join(f"{kgs}: {n} т." for kgs, n in duplicates.items())
+
+
+XLSX_NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+XLSX_REL_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+XML_ILLEGAL_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+XLSX_CELL_RE = re.compile(rb"<c\b([^>]*?)/?>")
+XLSX_ATTR_RE = re.compile(rb'([\w:]+)="([^"]*)"')
+XLSX_HEADER_CELL_RE = re.compile(rb'<c r="([A-Z]+)1"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+XLSX_FIRST_COLUMN_RE = re.compile(rb'<c r="A(\d+)"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+XLSX_TEXT_RE = re.compile(rb"<([vt])(?:\s[^>]*)?>([^<]*)</\1>")
+XLSX_TYPE_RE = re.compile(rb'\bt="(\w+)"')
+XLSX_COL_RE = re.compile(rb"<col\b([^>]*?)/>")
+
+
+class RegistryAppender:
+    """Дописывает строки в существующий реестр xlsx, не загружая книгу целиком.
+
+    Заголовки и имена уже внесённых файлов (колонка A) берутся поиском по XML листа, без
+    разбора остальных ячеек. При сохранении в архиве меняется только XML активного листа: новые строки (строки
+    inline, стили ячеек — как у последней строки листа) вставляются перед </sheetData>,
+    диапазоны листа и автофильтра продлеваются, ширины колонок увеличиваются под новые
+    значения; остальные части копируются как есть.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = []
+        with zipfile.ZipFile(path) as zf:
+            self.sheet_part = self._active_sheet_part(zf)
+            shared = self._shared_strings(zf)
+            xml = zf.read(self.sheet_part)
+        header = {}
+        for column, attrs, body in XLSX_HEADER_CELL_RE.findall(xml):
+            header[column.decode()] = self._cell_value(attrs, body, shared)
+        columns = sorted(header, key=lambda column: (len(column), column))
+        self.headers = [header[column] for column in columns if header[column]]
+        self.existing = set()
+        self.data_rows = 0
+        for row, attrs, body in XLSX_FIRST_COLUMN_RE.findall(xml):
+            value = self._cell_value(attrs, body, shared)
+            if value and row != b"1":
+                self.existing.add(value)
+                self.data_rows += 1
+
+    @staticmethod
+    def _active_sheet_part(zf):
+        workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+        view = workbook.find("main:bookViews/main:workbookView", XLSX_NS)
+        active = int(view.get("activeTab", 0)) if view is not None else 0
+        sheets = workbook.findall("main:sheets/main:sheet", XLSX_NS)
+        rel_id = sheets[min(active, len(sheets) - 1)].get(XLSX_REL_ID)
+        rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        for rel in rels.findall("rel:Relationship", XLSX_NS):
+            if rel.get("Id") == rel_id:
+                target = rel.get("Target")
+                return target.lstrip("/") if target.startswith("/") else "xl/" + target
+        raise ValueError("лист реестра не найден в xlsx")
+
+    @staticmethod
+    def _shared_strings(zf):
+        if "xl/sharedStrings.xml" not in zf.namelist():
+            return []
+        si, t = f"{{{XLSX_NS['main']}}}si", f"{{{XLSX_NS['main']}}}t"
+        strings = []
+        with zf.open("xl/sharedStrings.xml") as f:
+            for _, elem in ET.iterparse(f):
+                if elem.tag == si:
+                    strings.append("".join(node.text or "" for node in elem.iter(t)))
+                    elem.clear()
+        return strings
+
+    @staticmethod
+    def _cell_value(attrs, body, shared):
+        texts = [text for _, text in XLSX_TEXT_RE.findall(body or b"")]
+        if not texts:
+            return None
+        kind = XLSX_TYPE_RE.search(attrs)
+        if kind and kind.group(1) == b"s":
+            return shared[int(texts[0])]
+        return html.unescape(b"".join(texts).decode("utf-8"))
+
+    def append(self, row):
+        self.rows.append(row)
+
+    def save(self):
+        if not self.rows:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with zipfile.ZipFile(self.path) as src, zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as dst:
+                for item in src.infolist():
+                    data = src.read(item.filename)
+                    if item.filename == self.sheet_part:
+                        data = self._with_rows(data)
+                    dst.writestr(item, data)
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.rows = []
+
+    def _with_rows(self, xml):
+        end = xml.rfind(b"</sheetData>")
+        start = xml.rfind(b"<row ", 0, end)
+        if end < 0 or start < 0:
+            raise ValueError("в листе реестра нет строк")
+        last_row = xml[start:end]
+        n = int(re.search(rb'\br="(\d+)"', last_row).group(1))
+        styles = {}
+        for attrs in XLSX_CELL_RE.findall(last_row):
+            attrs = dict(XLSX_ATTR_RE.findall(attrs))
+            column = re.match(rb"[A-Z]+", attrs.get(b"r", b""))
+            if column and b"s" in attrs:
+                styles[column.group(0).decode()] = attrs[b"s"].decode()
+        default_style = max(styles.values(), key=list(styles.values()).count) if styles else None
+        width = max(len(REGISTRY_HEADERS), max(len(row) for row in self.rows))
+        columns = [get_column_letter(k + 1) for k in range(width)]
+        parts = []
+        widths = {}
+        for row in self.rows:
+            n += 1
+            cells = []
+            for col_idx, (column, value) in enumerate(zip(columns, row), 1):
+                style = styles.get(column, default_style)
+                style = f' s="{style}"' if style else ""
+                value = XML_ILLEGAL_CHARS_RE.sub("", "" if value is None else str(value))
+                if value:
+                    widths[col_idx] = max(widths.get(col_idx, 0), registry_column_width(value))
+                    cells.append(f'<c r="{column}{n}"{style} t="inlineStr"><is><t xml:space="preserve">'
+                                 f'{xml_escape(value)}</t></is></c>')
+                else:
+                    cells.append(f'<c r="{column}{n}"{style}/>')
+            parts.append(f'<row r="{n}">{"".join(cells)}</row>')
+        xml = self._with_widths(xml[:end], widths) + "".join(parts).encode("utf-8") + xml[end:]
+        last = f"{columns[-1]}{n}".encode()
+        xml = re.sub(rb'(<dimension ref=")([A-Z]+\d+)(?::[A-Z]+\d+)?(")', lambda m: m.group(1) + m.group(2) + b":" + last + m.group(3), xml, count=1)
+        return re.sub(rb'(<autoFilter ref="[A-Z]+\d+:)[A-Z]+\d+(")', lambda m: m.group(1) + last + m.group(2), xml, count=1)
+
+    @staticmethod
+    def _with_widths(xml, widths):
+        # Сохранённая ширина колонки (<col>) увеличивается, если новое значение шире;
+        # колонки без своей записи <col> не меняются
+        def widen(match):
+            attrs = dict(XLSX_ATTR_RE.findall(match.group(1)))
+            col_idx = int(attrs.get(b"min", 0))
+            if col_idx != int(attrs.get(b"max", -1)) or col_idx not in widths:
+                return match.group(0)
+            if float(attrs.get(b"width", 0)) >= widths[col_idx]:
+                return match.group(0)
+            attrs[b"width"] = str(widths[col_idx]).encode()
+            attrs[b"customWidth"] = b"1"
+            return b"<col " + b" ".join(key + b'="' + value + b'"' for key, value in attrs.items()) + b"/>"
+        start = xml.find(b"<cols>")
+        if start < 0 or not widths:
+            return xml
+        stop = xml.find(b"</cols>", start)
+        return xml[:start] + XLSX_COL_RE.sub(widen, xml[start:stop]) + xml[stop:]
+
+
+class RegistryIndex:
+    """Индекс файлов реестра в SQLite рядом с xlsx: имя файла, размер, mtime и хэш содержимого.
+
+    Проверка «файл уже в реестре» — запрос по ключу вместо чтения листа. Индекс помнит
+    размер и mtime реестра на момент последнего сохранения: если реестр изменён вне
+    программы или индекса нет, он перестраивается по колонке A реестра.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS files ("
+                " name TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT);"
+                "CREATE INDEX IF NOT EXISTS files_hash ON files (hash);"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _stamp(registry_path):
+        try:
+            st = os.stat(registry_path)
+        except OSError:
+            return None
+        return f"{st.st_size}:{st.st_mtime_ns}"
+
+    def in_sync(self, registry_path):
+        stamp = self._stamp(registry_path)
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'registry'").fetchone()
+        return stamp is not None and row is not None and row[0] == stamp
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def get(self, name):
+        # (size, mtime_ns, hash) или None; у строк, восстановленных из xlsx, значения пустые
+        return self._connect().execute(
+            "SELECT size, mtime_ns, hash FROM files WHERE name = ?", (name,)
+        ).fetchone()
+
+    def rebuild(self, names, registry_path):
+        # размер, mtime и хэш уже известных файлов сохраняются
+        conn = self._connect()
+        with conn:
+            known = {row[0]: row for row in conn.execute("SELECT name, size, mtime_ns, hash FROM files")}
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM meta WHERE key = 'registry'")
+            conn.executemany(
+                "INSERT OR IGNORE INTO files (name, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                (known.get(name, (name, None, None, None)) for name in names),
+            )
+            self._mark(conn, registry_path)
+
+    def add(self, records, registry_path):
+        # records — (name, size, mtime_ns, hash); вызывается после сохранения реестра
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO files (name, size, mtime_ns, hash) VALUES (?, ?, ?, ?)", records)
+            self._mark(conn, registry_path)
+
+    def _mark(self, conn, registry_path):
+        stamp = self._stamp(registry_path)
+        if stamp is not None:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('registry', ?)", (stamp,))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class RegistryJournal:
+    """Журнал строк реестра (JSON Lines), ещё не сохранённых в xlsx.
+
+    Запись о каждом обработанном файле (строки реестра и запись индекса) дописывается и
+    сбрасывается на диск сразу; после сохранения реестра журнал удаляется. Если обработка
+    прервалась, при следующем запуске записи журнала дописываются в реестр.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def read(self):
+        entries = {}
+        try:
+            f = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return []
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # строка, не дописанная при сбое
+                if isinstance(entry, dict) and entry.get("file") and entry.get("rows"):
+                    entries.setdefault(entry["file"], entry)
+        return list(entries.values())
+
+    def append(self, fname, rows, record):
+        if self._file is None:
+            self._file = open(self.path, "a+b")
+            # после сбоя последняя строка может быть не дописана
+            if self._file.tell():
+                self._file.seek(-1, os.SEEK_END)
+                if self._file.read(1) != b"\n":
+                    self._file.write(b"\n")
+        line = json.dumps({"file": fname, "rows": rows, "record": record}, ensure_ascii=False)
+        self._file.write(line.encode("utf-8") + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def clear(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RegistrySink(abc.ABC):
+    """Дополнительный вывод строк реестра: строки пишутся по мере обработки файлов.
+
+    Файл дописывается между запусками; write получает строки одного файла (их может быть
+    несколько — по строке на КГС), после чего они сбрасываются на диск. Строки файла,
+    который уже есть в выводе, заменяются новыми: остаётся результат последней обработки.
+    """
+
+    name = ""
+    label = ""
+    extension = ""
+
+    def __init__(self, path, headers):
+        self.path = path
+        self.headers = list(headers)
+
+    @abc.abstractmethod
+    def write(self, rows):
+        pass
+
+    def close(self):
+        pass
+
+
+class LineRegistrySink(RegistrySink):
+    # Текстовый вывод по строке на строку реестра. Строки вывода держатся и в памяти: при
+    # повторной обработке файла его прежние строки убираются, и вывод перезаписывается
+    # через временный файл; новые файлы просто дописываются
+    encoding = "utf-8"
+
+    def __init__(self, path, headers):
+        super().__init__(path, headers)
+        self.lines = []  # [(имя PDF, строка вывода с переводом строки)] в порядке файла
+        content = ""
+        if os.path.exists(path):
+            with open(path, encoding=self.encoding, newline="") as f:
+                content = f.read()
+            self.lines = list(self._parse(content))
+        self.files = {name for name, _ in self.lines}
+        self._file = None
+        if content and not content.endswith("\n"):
+            self._rewrite()  # последняя строка не дописана при сбое
+        else:
+            self._open(new=not content)
+
+    def _open(self, new=False):
+        self._file = open(self.path, "a", encoding=self.encoding, newline="")
+        if new:
+            self._file.write(self._header())
+            self._file.flush()
+
+    def _rewrite(self):
+        if self._file is not None:
+            self._file.close()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding=self.encoding, newline="") as f:
+            f.write(self._header())
+            f.writelines(line for _, line in self.lines)
+        os.replace(tmp, self.path)
+        self._open()
+
+    def _header(self):
+        return ""
+
+    def _parse(self, content):
+        # (имя PDF, строка вывода) для строк существующего файла
+        raise NotImplementedError
+
+    def _format(self, row):
+        raise NotImplementedError
+
+    def write(self, rows):
+        if not rows:
+            return
+        name = str(rows[0][0])
+        lines = [(name, self._format(row)) for row in rows]
+        if name in self.files:
+            self.lines = [item for item in self.lines if item[0] != name] + lines
+            self._rewrite()
+            return
+        self._file.writelines(line for _, line in lines)
+        self._file.flush()
+        self.lines.extend(lines)
+        self.files.add(name)
+
+    def close(self):
+        self._file.close()
+
+
+class CsvSink(LineRegistrySink):
+    # UTF-8 с BOM, чтобы кириллица открывалась в Excel; шапка — при создании файла
+    name = "csv"
+    label = "CSV"
+    extension = ".csv"
+    encoding = "utf-8-sig"
+
+    def _header(self):
+        return self._format(self.headers)
+
+    def _parse(self, content):
+        for row in islice(csv.reader(content.splitlines(keepends=True)), 1, None):
+            if row:
+                yield row[0], self._format(row)
+
+    def _format(self, row):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(row)
+        return buffer.getvalue()
+
+
+class JsonlSink(LineRegistrySink):
+    # Одна строка реестра — один JSON-объект с колонками реестра
+    name = "jsonl"
+    label = "JSONL"
+    extension = ".jsonl"
+
+    def _parse(self, content):
+        for line in content.splitlines(keepends=True):
+            try:
+                name = json.loads(line)[self.headers[0]]
+            except (ValueError, KeyError, TypeError):
+                continue
+            yield str(name), line if line.endswith("\n") else line + "\n"
+
+    def _format(self, row):
+        return json.dumps(dict(zip(self.headers, row)), ensure_ascii=False) + "\n"
+
+
+class SqliteSink(RegistrySink):
+    # Таблица registry с колонками реестра (имена колонок — заголовки реестра); строки
+    # файла при повторной обработке заменяются новыми
+    name = "sqlite"
+    label = "SQLite"
+    extension = ".sqlite"
+
+    def __init__(self, path, headers):
+        super().__init__(path, headers)
+        columns = ['"' + h.replace('"', '""') + '"' for h in self.headers]
+        self._insert = f"INSERT INTO registry ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        self._delete = f"DELETE FROM registry WHERE {columns[0]} = ?"
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS registry ({', '.join(c + ' TEXT' for c in columns)})")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS registry_file ON registry ({columns[0]})")
+        self._conn.commit()
+
+    def write(self, rows):
+        if not rows:
+            return
+        with self._conn:
+            self._conn.execute(self._delete, (str(rows[0][0]),))
+            self._conn.executemany(self._insert, [[None if v is None else str(v) for v in row] for row in rows])
+
+    def close(self):
+        self._conn.close()
+
+
+REGISTRY_SINKS = {
+    CsvSink.name: CsvSink,
+    JsonlSink.name: JsonlSink,
+    SqliteSink.name: SqliteSink,
+}
+
+
 class PDFProcessor:
-    def __init__(self, log_callback=None, progress_callback=None, cancel_event=None):
+    # Атрибуты, которые передаются в процессы-обработчики при параллельной обработке
+    WORKER_CONFIG_ATTRS = (
+        "import_points", "points_folder", "debug_mode", "sort_points_by_comm",
+        "tessdata_dir", "comm_types", "ocr_workers", "use_text_cache", "lazy_extraction",
+        "ocr_regions", "split_documents", "use_points_store", "ocr_prefilter",
+    )
+    # Параметры, которые задаются только в settings.json (значения по умолчанию)
+    SETTINGS_DEFAULTS = {
+        "text_cache_max_mb": 1024,
+        # Ступени DPI для OCR: следующая используется, только если результат предыдущей
+        # хуже порогов (средняя уверенность Tesseract, число символов)
+        "ocr_dpi_tiers": [200, 300],
+        "ocr_min_confidence": 70,
+        "ocr_min_chars": 50,
+        "ocr_probe_dpi": 100,  # разрешение рендера для поиска шапки и каталога
+        "ocr_backend": "tesseract",  # tesseract (процесс на страницу), tesserocr (в процессе), fake
+        "points_grid_m": 100,  # сторона ячейки сетки сводной базы точек, м
+        "points_duplicate_m": 0.5,  # точки разных съёмок ближе этого считаются совпадающими, м
+        # Промежуточное сохранение реестра во время обработки: после стольких файлов или
+        # минут (0 — не сохранять по этому признаку)
+        "registry_checkpoint_files": 25,
+        "registry_checkpoint_minutes": 10,
+    }
+    # Настройки, которые должны быть больше нуля; иначе остаётся значение по умолчанию
+    POSITIVE_SETTINGS = ("points_grid_m",)
+    # Версия распознавания: меняется вместе с рендерингом/предобработкой страниц,
+    # чтобы старые записи кэша не подходили
+    OCR_PIPELINE_VERSION = 4
+
+    def __init__(self, log_callback=None, progress_callback=None, cancel_event=None, worker_mode=False):
         self.log_callback = log_callback or print
         self.progress_callback = progress_callback
         self.cancel_event = cancel_event
         self.cancelled = False
-        self.log_file_path = "application_log.txt"
+        # В процессе-обработчике лог пишет родительский процесс, диалоги не показываются
+        self.worker_mode = worker_mode
+        self.log_file_path = "" if worker_mode else "application_log.txt"
         self.output_excel_path = ""
         self.problem_files = []
         self.field_stats = defaultdict(int)
@@ -140,16 +2269,41 @@ class PDFProcessor:
         self.points_folder = ""
         self.debug_mode = False
         self.ignore_excel = False
+        self.output_sinks = []  # дополнительный вывод реестра: имена из REGISTRY_SINKS
         self.tessdata_dir = ""
         self.sort_points_by_comm = False  # раскладывать каталоги по типам
+        self.workers = 1  # количество процессов для параллельной обработки файлов
+        self.ocr_workers = 1  # количество одновременных OCR страниц внутри одного PDF
+        self.use_text_cache = True  # кэш текста страниц рядом с settings.json
+        self.lazy_extraction = False  # прекращать чтение PDF, когда все поля и каталог найдены
+        self.ocr_regions = False  # распознавать только шапку и каталог, найденные на уменьшенном рендере
+        self.ocr_prefilter = False  # не распознавать страницы, где на уменьшенном рендере нет шапки и каталога
+        self.prefilter_skipped = 0  # сколько страниц всего пропущено предварительным отбором
+        self.split_documents = False  # в одном PDF несколько КГС: строка реестра и каталог на каждую
+        self.use_points_store = False  # сводная база точек points.sqlite в папке каталогов
+        self.text_cache_path = os.path.join(get_app_dir(), "text_cache.sqlite")
+        self._ocr_backend = None
+        self._ocr_backend_key = None
+        self._ocr_backend_lock = threading.Lock()
+        self._ocr_pool = None  # потоки OCR на всю обработку (ocr_workers > 1)
+        self._ocr_pool_workers = 0
+        self._text_cache = None
+        for name, default in self.SETTINGS_DEFAULTS.items():
+            setattr(self, name, default)
 
         # Конфиг типов коммуникаций
         self.comm_types_config_path = os.path.join(get_app_dir(), "comm_types.json")
+        self.field_rules_path = os.path.join(get_app_dir(), "field_rules.json")
+        self._field_rules = None
+        self._field_rules_mtime = None
+        self._comm_index = None
         self.default_comm_types = self._build_default_comm_types()
         self.comm_types = []  # список словарей: {"name": str, "enabled": bool}
         self.load_comm_types()
+        self.get_field_rules()
 
-        self.setup_tesseract()
+        if not worker_mode:
+            self.setup_tesseract()
 
     def _build_default_comm_types(self):
         types = [
@@ -254,6 +2408,42 @@ class PDFProcessor:
             self.cancelled = True
             raise ProcessingCancelled()
 
+    def apply_settings(self, data):
+        for name, default in self.SETTINGS_DEFAULTS.items():
+            if name not in data:
+                continue
+            try:
+                value = type(default)(data[name])
+            except (TypeError, ValueError):
+                self.log_message(f"Некорректное значение настройки {name}: {data[name]!r}")
+                continue
+            if name in self.POSITIVE_SETTINGS and not value > 0:
+                self.log_message(f"Некорректное значение настройки {name}: {data[name]!r}, используется {default}")
+                value = default
+            setattr(self, name, value)
+
+    def export_settings(self):
+        return {name: getattr(self, name) for name in self.SETTINGS_DEFAULTS}
+
+    def export_worker_config(self):
+        config = {name: getattr(self, name) for name in self.WORKER_CONFIG_ATTRS}
+        config.update(self.export_settings())
+        config["comm_types"] = self.get_comm_types()
+        if OCR_SUPPORTED and pytesseract is not None:
+            config["tesseract_cmd"] = pytesseract.pytesseract.tesseract_cmd
+        return config
+
+    def apply_worker_config(self, config):
+        for name in self.WORKER_CONFIG_ATTRS:
+            if name in config:
+                setattr(self, name, config[name])
+        self.apply_settings(config)
+        tesseract_cmd = config.get("tesseract_cmd")
+        if tesseract_cmd and OCR_SUPPORTED and pytesseract is not None:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        if self.tessdata_dir:
+            os.environ["TESSDATA_PREFIX"] = self.tessdata_dir
+
     def log_message(self, message):
         ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         line = f"[{ts}] {message}\n"
@@ -293,43 +2483,290 @@ class PDFProcessor:
             messagebox.showerror("Tesseract", f"Tesseract не найден/не работает: {e}")
             self.log_message(f"Tesseract ошибка: {e}")
     def enhance_image(self, image):
-        if not OCR_SUPPORTED or ImageEnhance is None or ImageFilter is None:
+        if Image is None or ImageFilter is None:
             return image
-        image = ImageEnhance.Contrast(image).enhance(2.0)
-        image = ImageEnhance.Sharpness(image).enhance(2.0)
-        image = image.convert('L')
+        if image.mode != "L":
+            image = image.convert("L")
+        image = image.point(contrast_lut(image))
+        image = image.filter(ImageFilter.Kernel((3, 3), OCR_SHARPEN_KERNEL, scale=OCR_SHARPEN_SCALE))
         image = image.filter(ImageFilter.MedianFilter(size=3))
-        image = image.point(lambda x: 0 if x < 140 else 255)
-        return image
+        return image.point(OCR_THRESHOLD_LUT)
+    def render_page_for_ocr(self, page, dpi=300, clip=None):
+        # Сразу в оттенках серого: OCR цвет не нужен, а пиксмап втрое меньше RGB.
+        # Пиксели копируются в изображение один раз (samples_mv — представление памяти
+        # пиксмапа без промежуточного bytes), и пиксмап освобождается здесь, в потоке
+        # документа: изображение уходит в потоки OCR, а объекты PyMuPDF не потокобезопасны
+        kwargs = {"clip": clip} if clip is not None else {}
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False, **kwargs)
+        img = Image.frombytes("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", pix.stride)
+        del pix
+        return img
+    def ocr_image(self, img, dpi=300, psm=3, whitelist=None):
+        data = self.tesseract_data(self.enhance_image(img), dpi, psm, whitelist)
+        text, confidence = tesseract_data_to_text(data)
+        return OcrResult(text, confidence, dpi)
+    def tesseract_data(self, img, dpi, psm=3, whitelist=None):
+        return self.get_ocr_backend().image_to_data(img, dpi, psm, whitelist)
+    def get_ocr_backend(self):
+        # Движок создаётся один раз и переиспользуется между страницами и файлами;
+        # None — выбранный движок (и запасной tesseract) недоступен
+        with self._ocr_backend_lock:
+            key = (self.ocr_backend, self.tessdata_dir)
+            if self._ocr_backend is not None and self._ocr_backend_key == key:
+                return self._ocr_backend
+            self.close_ocr_backend()
+            name = self.ocr_backend
+            if name not in OCR_BACKENDS:
+                self.log_message(f"Неизвестный OCR-движок {name!r}, используется tesseract")
+                name = TesseractCliBackend.name
+            if name == TesserocrBackend.name and tesserocr is None:
+                self.log_message("Библиотека tesserocr не установлена, используется tesseract")
+                name = TesseractCliBackend.name
+            if name == TesseractCliBackend.name and pytesseract is None:
+                return None
+            if name == TesseractCliBackend.name:
+                backend = TesseractCliBackend(self.tessdata_dir, log=self.log_message)
+            elif name == TesserocrBackend.name:
+                backend = TesserocrBackend(self.tessdata_dir)
+            else:
+                backend = OCR_BACKENDS[name]()
+            self._ocr_backend, self._ocr_backend_key = backend, key
+            return backend
+    def close_ocr_backend(self):
+        if self._ocr_backend is not None:
+            self._ocr_backend.close()
+            self._ocr_backend = None
+    def get_ocr_pool(self, workers):
+        # Один пул потоков OCR на всю обработку, а не на каждый PDF: движки, созданные
+        # в потоках пула (tesserocr — свой на поток), переиспользуются между файлами
+        if self._ocr_pool is not None and self._ocr_pool_workers != workers:
+            self.close_ocr_pool()
+        if self._ocr_pool is None:
+            self._ocr_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr")
+            self._ocr_pool_workers = workers
+        backend = self.get_ocr_backend()
+        if isinstance(backend, TesseractCliBackend):
+            # Параллелизм даёт пул, поэтому каждый tesseract работает в один поток;
+            # движок закрывается вместе с пулом, следующая обработка без пула его не наследует
+            backend.single_thread = True
+        return self._ocr_pool
+    def close_ocr_pool(self):
+        # Потоки пула завершаются, вместе с ними освобождаются их движки OCR
+        if self._ocr_pool is not None:
+            self._ocr_pool.shutdown(wait=True, cancel_futures=True)
+            self._ocr_pool = None
+            self.close_ocr_backend()
+    def render_ocr_crops(self, page, dpi, regions=None):
+        # [(изображение, psm, whitelist)]: вся страница или области из разметки
+        if not regions:
+            return [(self.render_page_for_ocr(page, dpi), 3, None)]
+        return [(self.render_page_for_ocr(page, dpi, region.rect), region.psm, region.whitelist)
+                for region in regions]
+    def ocr_crops(self, crops, dpi):
+        results = [self.ocr_crop(img, dpi, psm, whitelist) for img, psm, whitelist in crops]
+        if len(results) == 1:
+            return results[0]
+        chars = [len(result.text.strip()) for result in results]
+        total = sum(chars)
+        confidence = sum(r.confidence * n for r, n in zip(results, chars)) / total if total else 0.0
+        return OcrResult("\n".join(result.text for result in results), confidence, dpi)
+    def ocr_crop(self, img, dpi, psm=3, whitelist=None):
+        result = self.ocr_image(img, dpi, psm, whitelist)
+        if whitelist != CATALOG_OCR_WHITELIST:
+            return result
+        text, valid = validate_catalog_ocr(result.text)
+        if valid >= CATALOG_OCR_MIN_VALID or not result.text.strip():
+            return result._replace(text=text)
+        # в области не строки из чисел (описания точек, другая таблица) — без ограничения символов
+        self.log_message(f"Каталог: строк с числами {valid:.0%}, OCR области без ограничения символов")
+        return self.ocr_image(img, dpi, psm)
+    def _use_ocr_regions(self, page):
+        # clip задаётся в координатах неповёрнутой страницы, поэтому повёрнутые — целиком
+        return self.ocr_regions and not getattr(page, "rotation", 0)
+    def _needs_layout_probe(self, page, hint=""):
+        # hint — неполный текстовый слой страницы: если в нём уже есть подписи шапки или
+        # каталога, предварительный отбор не нужен
+        if self._use_ocr_regions(page):
+            return True
+        return self.ocr_prefilter and not (
+            hint and (OCR_HEADER_LABEL_RE.search(hint) or OCR_CATALOG_TITLE_RE.search(hint))
+        )
+    def render_layout_probe(self, page):
+        # (изображение, начало координат страницы) для detect_ocr_regions
+        rect = page.rect
+        return self.render_page_for_ocr(page, self.ocr_probe_dpi), (rect.x0, rect.y0)
+    def _render_layout_probe_safe(self, page):
+        try:
+            return self.render_layout_probe(page)
+        except Exception as e:
+            self.log_message(f"Разметка страницы не удалась: {e}")
+            return None
+    def detect_ocr_regions(self, img, origin=(0, 0)):
+        # Области шапки и каталога в координатах страницы по OCR уменьшенного рендера;
+        # None — распознавать страницу целиком
+        return self._regions_from_data(self.tesseract_data(self.enhance_image(img), self.ocr_probe_dpi), img, origin)
+    def probe_page(self, img, origin=(0, 0), find_regions=True):
+        # (нужно ли OCR страницы, области OCR или None) по одному OCR уменьшенного рендера
+        data = self.tesseract_data(self.enhance_image(img), self.ocr_probe_dpi)
+        if self.ocr_prefilter and not ocr_probe_relevant(data):
+            return False, None
+        return True, (self._regions_from_data(data, img, origin) if find_regions else None)
+    def _regions_from_data(self, data, img, origin):
+        boxes = find_ocr_regions(data, img.size[0], img.size[1])
+        if not boxes:
+            return None
+        scale = 72.0 / self.ocr_probe_dpi
+        regions = []
+        for kind, (x0, y0, x1, y1) in boxes:
+            psm, whitelist = OCR_REGION_PROFILES[kind]
+            rect = (origin[0] + x0 * scale, origin[1] + y0 * scale, origin[0] + x1 * scale, origin[1] + y1 * scale)
+            regions.append(OcrRegion(kind, rect, psm, whitelist))
+        return regions
+    def _probe_page_safe(self, img, origin, find_regions):
+        try:
+            return self.probe_page(img, origin, find_regions)
+        except Exception as e:
+            self.log_message(f"Разметка страницы не удалась: {e}")
+            return True, None
+    def _log_prefilter_skip(self, page_index):
+        self.prefilter_skipped += 1
+        self.log_message(f"Стр.{page_index+1}: шапка и каталог не найдены, OCR пропущен (предварительный отбор)")
+    def _log_ocr_regions(self, page_index, regions):
+        if not regions:
+            self.log_message(f"Стр.{page_index+1}: шапка и каталог не найдены, OCR всей страницы")
+            return
+        names = []
+        for region in regions:
+            name = OCR_REGION_NAMES.get(region.kind, region.kind)
+            if name not in names:
+                names.append(name)
+        self.log_message(f"Стр.{page_index+1}: OCR областей ({len(regions)}): {', '.join(names)}")
+    def _ocr_tiers(self):
+        tiers = []
+        for value in self.ocr_dpi_tiers:
+            try:
+                dpi = int(value)
+            except (TypeError, ValueError):
+                continue
+            if 50 <= dpi <= 1200 and dpi not in tiers:
+                tiers.append(dpi)
+        return sorted(tiers) or [300]
+    def _ocr_result_ok(self, result):
+        return (result.confidence >= self.ocr_min_confidence
+                and len(result.text.strip()) >= self.ocr_min_chars)
+    def _ocr_tier_final(self, result):
+        # Следующая ступень не нужна: результат прошёл пороги или текста почти нет
+        # (пустой лист, схема без подписей) — больший DPI его не добавит, а OCR дороже
+        return self._ocr_result_ok(result) or len(result.text.strip()) < self.ocr_min_chars / 4
+    def _better_ocr_result(self, best, result):
+        if best is None or result.confidence > best.confidence:
+            return result
+        return best
+    def _log_ocr_result(self, page_index, result, tiers):
+        tier = tiers.index(result.dpi) + 1 if result.dpi in tiers else "?"
+        self.log_message(
+            f"Стр.{page_index+1}: OCR {result.dpi} dpi (ступень {tier}/{len(tiers)}), "
+            f"уверенность {result.confidence:.0f}%, символов {len(result.text.strip())}"
+        )
+    def _ocr_supported(self):
+        return PDF_SUPPORTED and fitz is not None and Image is not None and self.get_ocr_backend() is not None
     def extract_text_with_ocr(self, page):
+        return self._ocr_page(page) or ""
+    def _ocr_page(self, page, page_index=None, hint=""):
+        # None — ошибка OCR (такой результат не кэшируется), "" — пустая страница
+        # или пропущенная предварительным отбором
         self.check_cancelled()
-        if not OCR_SUPPORTED or not PDF_SUPPORTED or fitz is None or pytesseract is None or Image is None:
+        if not self._ocr_supported():
             self.log_message("OCR не поддерживается: необходимые библиотеки не установлены")
-            return ""
+            return None
+        if page_index is None:
+            page_index = getattr(page, "number", 0)
+        regions = None
+        probe = self._render_layout_probe_safe(page) if self._needs_layout_probe(page, hint) else None
+        if probe is not None:
+            find_regions = self._use_ocr_regions(page)
+            relevant, regions = self._probe_page_safe(*probe, find_regions)
+            if not relevant:
+                self._log_prefilter_skip(page_index)
+                return ""
+            if find_regions:
+                self._log_ocr_regions(page_index, regions)
+        tiers = self._ocr_tiers()
+        best = None
+        for dpi in tiers:
+            self.check_cancelled()
+            try:
+                result = self.ocr_crops(self.render_ocr_crops(page, dpi, regions), dpi)
+            except Exception as e:
+                self.log_message(f"OCR ошибка: {e}")
+                break
+            best = self._better_ocr_result(best, result)
+            if self._ocr_tier_final(result):
+                break
+        if best is None:
+            return None
+        self._log_ocr_result(page_index, best, tiers)
+        return best.text
+    def _ocr_crops_safe(self, crops, dpi):
         try:
-            matrix = fitz.Matrix(4, 4)
-            pix = page.get_pixmap(matrix=matrix, dpi=300)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            img = self.enhance_image(img)
-            base_cfg = '--oem 3 --psm 3 -l rus+eng --dpi 300'
-            if self.tessdata_dir:
-                cfg = f'--tessdata-dir "{self.tessdata_dir}" {base_cfg}'
-            else:
-                cfg = base_cfg
-            return pytesseract.image_to_string(img, config=cfg)
+            return self.ocr_crops(crops, dpi)
         except Exception as e:
             self.log_message(f"OCR ошибка: {e}")
-            return ""
-    def process_pdf(self, file_path):
+            return None
+    def ocr_settings_key(self):
+        tiers = ",".join(str(dpi) for dpi in self._ocr_tiers())
+        regions = f"|roi{self.ocr_probe_dpi}" if self.ocr_regions else ""
+        if self.ocr_prefilter:  # пропущенные страницы кэшируются пустыми
+            regions += f"|pre{self.ocr_probe_dpi}"
+        backend = self.get_ocr_backend()
+        return (f"v{self.OCR_PIPELINE_VERSION}|{backend.name if backend else ''}|oem3|psm3|rus+eng|dpi{tiers}"
+                f"|conf{self.ocr_min_confidence}|chars{self.ocr_min_chars}{regions}")
+    def get_text_cache(self):
+        if not self.use_text_cache:
+            return None
+        if self._text_cache is None:
+            self._text_cache = PageTextCache(self.text_cache_path, max(1, self.text_cache_max_mb) * 1024 * 1024)
+        return self._text_cache
+    def clear_text_cache(self):
+        try:
+            if self._text_cache is None:
+                if not os.path.exists(self.text_cache_path):
+                    self.log_message("Кэш текста пуст.")
+                    return
+                self._text_cache = PageTextCache(self.text_cache_path, max(1, self.text_cache_max_mb) * 1024 * 1024)
+            self._text_cache.clear()
+            self.log_message(f"Кэш текста очищен: {self.text_cache_path}")
+        except Exception as e:
+            self.log_message(f"Не удалось очистить кэш текста: {e}")
+    def iter_pages(self, file_path, info=None):
+        # Генератор PageText(index, text, source, words) в порядке страниц. Сканированные страницы
+        # рендерятся в этом потоке (PyMuPDF не потокобезопасен) и распознаются в пуле;
+        # страницы отдаются, как только готовы все предыдущие. В info (если передан)
+        # записывается total_pages.
         if not PDF_SUPPORTED or fitz is None:
             self.log_message("Обработка PDF не поддерживается: библиотека PyMuPDF не установлена")
-            return None
-        doc = None
+            return
+        doc = fitz.open(file_path)
+        executor = None
+        pending = deque()  # _PendingPage
         try:
-            doc = fitz.open(file_path)
             total_pages = getattr(doc, "page_count", None) or len(doc)
-            full_text = ""
+            if info is not None:
+                info["total_pages"] = total_pages
             base = os.path.basename(file_path)
+            cache, doc_hash, cached = self._open_cached_document(file_path)
+            settings_key = self.ocr_settings_key()
+            ocr_workers = max(1, int(self.ocr_workers or 1))
+            if ocr_workers > 1 and self._ocr_supported():
+                executor = self.get_ocr_pool(ocr_workers)
+            tiers = self._ocr_tiers()
+
+            def resolve(entry):
+                self._resolve_ocr_entry(entry, doc, executor, tiers, cache, doc_hash, settings_key)
+
+            in_flight = 0
+            ocr_pages = 0
+            skipped_before = self.prefilter_skipped
             for i, page in enumerate(doc):
                 self.check_cancelled()
                 self._report_progress(
@@ -337,41 +2774,152 @@ class PDFProcessor:
                     page_index=i + 1,
                     total_pages=total_pages,
                 )
-                text = page.get_text("text")
-                if not text or len(text.strip()) < 50:
-                    self.log_message(f"Стр.{i+1}: OCR")
-                    text = self.extract_text_with_ocr(page)
-                full_text += text + "\n"
-            return full_text
+                if i in cached:
+                    text, source = cached[i]
+                    pending.append(_PendingPage(i, text, source, words=self._page_words(page, source)))
+                else:
+                    text = page.get_text("text")
+                    source = PAGE_SOURCE_TEXT
+                    future = None
+                    probing = False
+                    if not text or len(text.strip()) < 50:
+                        self.log_message(f"Стр.{i+1}: OCR")
+                        source = PAGE_SOURCE_OCR
+                        ocr_pages += 1
+                        if executor is None:
+                            text = self._ocr_page(page, i, text)
+                        else:
+                            probe = self._render_layout_probe_safe(page) if self._needs_layout_probe(page, text) else None
+                            text = None
+                            probing = probe is not None
+                            try:
+                                if probing:
+                                    future = executor.submit(self._probe_page_safe, *probe, self._use_ocr_regions(page))
+                                else:
+                                    crops = self.render_ocr_crops(page, tiers[0])
+                                    future = executor.submit(self._ocr_crops_safe, crops, tiers[0])
+                                in_flight += 1
+                            except Exception as e:
+                                self.log_message(f"OCR ошибка: {e}")
+                    if future is None and cache is not None and text is not None:
+                        self._cache_page(cache, doc_hash, i, settings_key, text, source)
+                    entry = _PendingPage(i, text, source, future, self._page_words(page, source))
+                    entry.probing = probing and future is not None
+                    pending.append(entry)
+                    # в очереди не больше 2 страниц на поток OCR
+                    while in_flight >= ocr_workers * 2:
+                        resolve(next(e for e in pending if e.future is not None))
+                        in_flight -= 1
+                while pending and (pending[0].future is None or pending[0].future.done()):
+                    entry = pending.popleft()
+                    if entry.future is not None:
+                        resolve(entry)
+                        in_flight -= 1
+                    yield PageText(entry.index, entry.text or "", entry.source, entry.words)
+            while pending:
+                entry = pending[0]
+                if entry.future is not None:
+                    resolve(entry)
+                pending.popleft()
+                yield PageText(entry.index, entry.text or "", entry.source, entry.words)
+            if cached:
+                self.log_message(f"Из кэша: {len(cached)} стр. из {total_pages}")
+            if self.ocr_prefilter and ocr_pages:
+                self.log_message(
+                    f"Предварительный отбор: OCR пропущен для {self.prefilter_skipped - skipped_before} "
+                    f"стр. из {ocr_pages} без текстового слоя"
+                )
+            if cache is not None and len(cached) < total_pages:
+                try:
+                    cache.evict()
+                except Exception as e:
+                    self.log_message(f"Не удалось сократить кэш текста: {e}")
+        finally:
+            # пул остаётся для следующих файлов; несделанный OCR этого файла отменяется
+            for entry in pending:
+                if entry.future is not None:
+                    entry.future.cancel()
+            try:
+                doc.close()
+            except Exception:
+                pass
+    def _page_words(self, page, source):
+        # Слова с координатами для каталога точек — только у страниц с текстовым слоем
+        if source != PAGE_SOURCE_TEXT or not self.import_points:
+            return None
+        try:
+            return page.get_text("words")
+        except Exception as e:
+            self.log_message(f"Не удалось получить слова страницы: {e}")
+            return None
+    def process_pdf(self, file_path):
+        try:
+            texts = [page.text for page in self.iter_pages(file_path)]
         except ProcessingCancelled:
             raise
         except Exception as e:
             self.log_message(f"Ошибка PDF {os.path.basename(file_path)}: {e}")
             return None
-        finally:
-            if doc is not None:
-                try:
-                    doc.close()
-                except Exception:
-                    pass
-    def extract_kgc_number(self, text):
-        patterns = [
-            r"№ КГС:\s*(\d{2,5}[-\/]\d{2,5})",
-            r"№ КГС:\s*([A-ZА-Я]?\d+[A-ZА-Я]?)",
-            r"(?:КГС|№|N)\s*[:\-]?\s*(\d{2,5}[-\/]\d{2,5})",
-            r"(?:КГС|№|N)\s*[:\-]?\s*([A-ZА-Я]?\d+[A-ZА-Я]?)",
-            r"КГС\s*([^\n,;]+)",
-            r"\b(\d{2,5}-\d{2,5})\b",
-            r"\b(\d{5}-\d{2})\b"
-        ]
-        for p in patterns:
-            m = re.search(p, text, re.IGNORECASE)
-            if m:
-                kgs = (m.group(1) if m.groups() else m.group(0)).strip()
-                kgs = re.sub(r'[^\dА-ЯA-Z\-/]', '', kgs)
-                if len(kgs) >= 4:
-                    return kgs
-        return None
+        if not texts:
+            return None
+        return "".join(text + "\n" for text in texts)
+    def _resolve_ocr_entry(self, entry, doc, executor, tiers, cache, doc_hash, settings_key):
+        # Дожидается OCR страницы: после разметки рендерит найденные области, а если
+        # результат хуже порогов — их же со следующим DPI (в этом потоке — PyMuPDF
+        # не потокобезопасен) и снова отправляет в пул
+        while entry.future is not None:
+            self.check_cancelled()
+            try:
+                result = entry.future.result(timeout=0.2)
+            except FuturesTimeout:
+                continue
+            entry.future = None
+            if entry.probing:
+                # разметка готова — теперь OCR областей (или всей страницы) на первой ступени
+                entry.probing = False
+                relevant, entry.regions = result
+                if not relevant:
+                    self._log_prefilter_skip(entry.index)
+                    entry.text = ""
+                    break
+                if self._use_ocr_regions(doc[entry.index]):
+                    self._log_ocr_regions(entry.index, entry.regions)
+            else:
+                if result is None:
+                    break
+                entry.best = self._better_ocr_result(entry.best, result)
+                if self._ocr_tier_final(result) or entry.tier + 1 >= len(tiers):
+                    break
+                entry.tier += 1
+            dpi = tiers[entry.tier]
+            try:
+                crops = self.render_ocr_crops(doc[entry.index], dpi, entry.regions)
+                entry.future = executor.submit(self._ocr_crops_safe, crops, dpi)
+            except Exception as e:
+                self.log_message(f"OCR ошибка: {e}")
+        if entry.best is not None:
+            entry.text = entry.best.text
+            self._log_ocr_result(entry.index, entry.best, tiers)
+        elif entry.text is None:
+            return
+        if cache is not None:
+            self._cache_page(cache, doc_hash, entry.index, settings_key, entry.text, entry.source)
+    def _cache_page(self, cache, doc_hash, page_index, settings_key, text, source):
+        try:
+            cache.put(doc_hash, page_index, settings_key, text, source)
+        except Exception as e:
+            self.log_message(f"Не удалось записать кэш текста: {e}")
+    def _open_cached_document(self, file_path):
+        try:
+            cache = self.get_text_cache()
+            if cache is None:
+                return None, None, {}
+            doc_hash = file_content_hash(file_path)
+            return cache, doc_hash, cache.get_document(doc_hash, self.ocr_settings_key())
+        except Exception as e:
+            self.log_message(f"Кэш текста недоступен: {e}")
+            self.use_text_cache = False
+            return None, None, {}
     def similarity(self, a, b):
         a, b = a.lower(), b.lower()
         if a in b or b in a:
@@ -392,140 +2940,85 @@ class PDFProcessor:
     def normalize_communication_type(self, text, allowed_communications):
         if not text:
             return None
-        text = text.strip()
-        normalization_map = {
-            r'кабел[ьи]?\с*связ[и]?': 'Кабель связи',
-            r'тел[е]?\с*канализац[ия]{2,4}': 'Тел канализация',
-            r'кабел[ьи]?\с*канализац[ия]{2,4}': 'Кабельная канализация',
-            r'волоконно-?\с*оптическ[ая]?\с*лини[яи]?\с*связ[и]?': 'ВОЛС',
-            r'кабел[ьное]?\с*телевидени[е]?': 'КТВ',
-            r'эл[ек]?\с*кабел[ья]?': 'Эл кабель',
-            r'кабел[ь]?\с*техн[\.]?\с*и\s*очаг[\.]?\с*заземл[ения]?': 'Кабель техн. и очаг. заземл',
-            r'контур\s*заземл[ения]?': 'Контур заземл',
-            r'кабел[ь]?\с*н[оo0]': 'Кабель но',
-            r'наружн[ое]?\с*освещени[е]': 'Кабель но',
-            r'ливнев[ая]?\с*канализац[ия]{2,4}': 'Водосток',
-            r'вод-?д': 'Вод-д',
-            r'водопровод': 'Вод-д',
-            r'трубопровод': 'Трубопровод',
-            r'канализац[ия]{2,4}\с*хоз-?быт': 'Канализация',
-            r'хоз-?бытов[ая]?\с*канализац[ия]{2,4}': 'Канализация',
-            r'лос\b': 'ЛОС',
-            r'локальн[ые]?\с*очистн[ые]?\с*сооружени[я]': 'ЛОС',
-            r'дренаж': 'Дренаж',
-            r'воздухопровод': 'Воздухопровод',
-            r'вент[\.]?\s*ветк[и]?': 'Вент. ветки',
-            r'вентиляционн[ые]?\с*ветк[и]?': 'Вент. ветки',
-            r'теплотрасса': 'Теплотрасса',
-            r'теплов[ые]?\с*сет[и]?': 'Теплотрасса',
-            r'коллектор': 'Коллектор',
-            r'газопровод': 'Газопровод',
-            r'нефтепровод': 'Нефтепровод',
-            r'продуктопровод': 'Продуктопровод',
-            r'соуэ\b': 'СОУЭ',
-            r'систем[аы]?\с*оповещени[я]?\с*и\s*управлен[ие]?\с*эвакуаци[ей]': 'СОУЭ',
-            r'скуд\b': 'СКУД',
-            r'систем[аы]?\с*контрол[я]?\с*управлени[я]?\с*доступом': 'СКУД',
-            r'\bканализац(ия)?\b': 'Канализация',
-            r'нап[оо]рн[аяые]?\с*канализац[ия]{2,4}|нап\.?\s*канализац': 'Нап канализация',
-            r'сам[о]?течн[аяые]?\с*канализац[ия]{2,4}|сам\.?\s*канализац': 'Сам канализация',
-            r'водо[вв]ыпуск': 'Водовыпуск',
-            r'кабел[ьи]?\с*защ': 'Кабель защ',
-            r'\bгаз\b': 'Газ',
-            r'газопровод': 'Газопровод',
-            r'тепл(о|\.|\b)': 'Теплотрасса',
-        }
-        for pattern, standard in normalization_map.items():
-            if re.search(pattern, text, re.IGNORECASE):
+        text = normalize_text(text.strip())
+        for pattern, standard in self.get_field_rules().synonyms:
+            if pattern.search(text):
                 if not allowed_communications or standard in allowed_communications:
                     return standard
-        for comm_type in allowed_communications:
-            if self.similarity(text.lower(), comm_type.lower()) > 0.9:
-                return comm_type
-        return None
+        return self.get_comm_type_index(allowed_communications).first_above(text, 0.9)
+    def get_comm_type_index(self, allowed_communications):
+        key = tuple(allowed_communications)
+        if self._comm_index is None or tuple(self._comm_index.names) != key:
+            self._comm_index = CommunicationTypeIndex(key)
+        return self._comm_index
+    def score_communication_phrases(self, text, allowed_communications, best_score=0.6):
+        # text — нормализованный (NormalizedText.text)
+        index = self.get_comm_type_index(allowed_communications)
+        return index.best_match(communication_phrases(text), best_score)
     def find_best_communication_match(self, text, allowed_communications):
-        best_match = None
-        best_score = 0.6
-        words_to_check = []
-        lines = text.split('\n')
-        for line in lines:
-            words = line.strip().split()
-            for i in range(len(words) - 1):
-                phrase = ' '.join(words[i:i+2])
-                if len(phrase) > 5:
-                    words_to_check.append(phrase)
-                if i < len(words) - 2:
-                    phrase = ' '.join(words[i:i+3])
-                    if len(phrase) > 8:
-                        words_to_check.append(phrase)
-        for phrase in words_to_check:
-            for comm_type in allowed_communications:
-                score = self.similarity(phrase.lower(), comm_type.lower())
-                if score > best_score:
-                    best_score = score
-                    best_match = comm_type
+        best_match, best_score = self.score_communication_phrases(normalize_text(text), allowed_communications)
         if best_match:
             self.log_message(f"Определен тип коммуникации: '{best_match}' (схожесть: {best_score:.1%})")
             return best_match
         return None
-    def extract_field(self, text, field_name, patterns):
-        if field_name == "Тип коммуникации":
-            allowed_communications = self.get_allowed_comm_types()
-            patterns += [
-                r"Кабель\s*связи\b", r"Тел\s*канализац[ия]{2,4}\b", r"Кабельная\s*канализац[ия]{2,4}\b",
-                r"ВОЛС\b", r"КТВ\b", r"Эл\s*кабель\b", r"Кабель\s*техн\.?\s*и\s*очаг\.?\s*заземл\b",
-                r"Контур\s*заземл\b", r"Кабель\s*н[оo0]\b", r"Водосток\b", r"Вод-?д\b", r"Трубопровод\b",
-                r"Канализац[ия]{2,4}\s*хоз-?быт\b", r"ЛОС\b", r"Дренаж\b", r"Воздухопровод\b",
-                r"Вент\.?\s*ветки\b", r"Теплотрасса\b", r"Коллектор\b", r"Газопровод\b", r"Нефтепровод\b",
-                r"Продуктопровод\b", r"СОУЭ\b", r"СКУД\b", r'\bКанализац(ия)?\b', r'Нап\s*канализац',
-                r'Сам\s*канализац', r'Водовыпуск\b', r'Кабель\s*защ\b', r'\bГаз\b', r'\bТепл\b'
-            ]
-            patterns += [rf"{re.escape(ct)}\b" for ct in allowed_communications if ct]
-            for p in patterns:
-                m = re.search(p, text, re.IGNORECASE)
-                if m:
-                    found_text = (m.group(1) if (m.groups() and m.group(1)) else m.group(0)).strip()
-                    normalized = self.normalize_communication_type(found_text, allowed_communications)
-                    if normalized:
-                        return normalized
-            best_match = self.find_best_communication_match(text, allowed_communications)
-            if best_match:
-                return best_match
-            return None
-        for p in patterns:
-            m = re.search(p, text, re.IGNORECASE)
-            if m:
-                val = (m.group(1) if (m.groups() and m.group(1)) else m.group(0)).strip()
-                if field_name == "Номер договора":
-                    val = re.sub(r'[^0-9A-Za-zА-Яа-я\/\-]', '', val)
-                    m2 = re.search(
-                        r'(\b\d+\/[A-ZА-Я]+\/[\wА-Яа-я]+\-?\d+\/\d+\b|\b\d+\/[A-ZА-Я]+\-?\d+\/\d+\b|\b\d+\/\d+\-?\d+\b|\b\d+\/[A-ZА-Я]+\-\d+\b|\b\d{1,2}\/\d{5}\-?\d{1,2}\b|\b\d{1,2}\/\d{5}\b|\b[A-ZА-Я]+\-\d+\/\d+\b|\b\d{1,5}[A-ZА-Я]*[-\/]\d{1,5}\b)',
-                        val, re.IGNORECASE
-                    )
-                    return m2.group(1) if m2 else val
-                return val
-        return None
+    def build_field_rules(self, allowed_communications):
+        value_functions = {
+            "match": _match_value,
+            "contract": self._contract_value,
+            "kgs": self._kgs_value,
+            "communication": lambda m: self.normalize_communication_type(_match_value(m), allowed_communications),
+        }
+        return [
+            FieldRule(name, patterns, literals, value_functions[kind])
+            for name, kind, patterns, literals in self.get_field_rules().patterns_for(allowed_communications)
+        ]
+    def get_field_rules(self):
+        # Правила перечитываются, когда меняется field_rules.json; при ошибке в файле
+        # остаются последние корректные (или встроенные) правила
+        path = self.field_rules_path
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._field_rules is not None and mtime == self._field_rules_mtime:
+            return self._field_rules
+        self._field_rules_mtime = mtime
+        if mtime is None:
+            self._field_rules = self._field_rules or FieldRuleSet(DEFAULT_FIELD_RULES)
+            self.save_default_field_rules()
+            return self._field_rules
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rules = FieldRuleSet(json.load(f))
+            if self._field_rules is not None:
+                self.log_message(f"Правила полей перечитаны: {path}")
+            self._field_rules = rules
+        except Exception as e:
+            self.log_message(f"Ошибка в {os.path.basename(path)}: {e}. Использую прежние правила.")
+            if self._field_rules is None:
+                self._field_rules = FieldRuleSet(DEFAULT_FIELD_RULES)
+        return self._field_rules
+    def save_default_field_rules(self):
+        try:
+            with open(self.field_rules_path, "w", encoding="utf-8") as f:
+                json.dump(DEFAULT_FIELD_RULES, f, ensure_ascii=False, indent=2)
+            self._field_rules_mtime = os.stat(self.field_rules_path).st_mtime_ns
+        except Exception as e:
+            self.log_message(f"Не удалось сохранить {os.path.basename(self.field_rules_path)}: {e}")
+    def _contract_value(self, m):
+        val = re.sub(r'[^0-9A-Za-zА-Яа-я\/\-]', '', _match_value(m))
+        m2 = re.search(
+            r'(\b\d+\/[A-ZА-Я]+\/[\wА-Яа-я]+\-?\d+\/\d+\b|\b\d+\/[A-ZА-Я]+\-?\d+\/\d+\b|\b\d+\/\d+\-?\d+\b|\b\d+\/[A-ZА-Я]+\-\d+\b|\b\d{1,2}\/\d{5}\-?\d{1,2}\b|\b\d{1,2}\/\d{5}\b|\b[A-ZА-Я]+\-\d+\/\d+\b|\b\d{1,5}[A-ZА-Я]*[-\/]\d{1,5}\b)',
+            val, re.IGNORECASE
+        )
+        return m2.group(1) if m2 else val
+    def _kgs_value(self, m):
+        kgs = re.sub(r'[^\dА-ЯA-Z\-/]', '', _match_value(m))
+        return kgs if len(kgs) >= 4 else None
     def extract_data(self, text):
-        data = {}
-        data["Тип коммуникации"] = self.extract_field(text, "Тип коммуникации", [
-            r"Вид\s*коммуникации/здания,\s*сооружения:\s*([^\n]+)",
-            r"Вид\s*коммуникации[^\n:]*[:\s]*([^\n]+)",
-            r"Тип\s*коммуникации[^\n:]*[:\s]*([^\n]+)",
-            r"Коммуникац[ияи][^\n:]*[:\s]*([^\n]+)",
-        ])
-        data["Номер договора"] = self.extract_field(text, "Номер договора", [
-            r"№\s*договора\s*\(?соглашения\)?\s*на\s*проведение\s*работ[^\n:]*[:\s]*([^\n,;]+)",
-            r"№\s*договора[^\n:]*[:\s]*([^\n,;]+)",
-            r"Договор\s*№\s*(\S+)",
-            r"№\s*контракта[^\n:]*[:\s]*(\S+)"
-        ])
-        data["КГС"] = self.extract_kgc_number(text)
-        data["Дата съемки"] = self.extract_field(text, "Дата съемки", [
-            r"Дата\s*съ[её]мки\s*[:\s]*([0-9]{2}\.[0-9]{2}\.[0-9]{4})",
-            r"Съемка\s*от\s*([0-9]{2}\.[0-9]{2}\.[0-9]{4})",
-            r"\b\d{2}\.\d{2}\.\d{4}\b"
-        ])
-        return data
+        fields = StreamingFieldExtractor(self)
+        fields.feed(NormalizedText(text))
+        return fields.result()
     def sanitize_filename(self, s):
         if not s: return "UNKNOWN_KGS"
         s = re.sub(r'[\\/*?:"<>|]', '_', str(s).strip())
@@ -536,212 +3029,430 @@ class PDFProcessor:
     def extract_and_save_coordinate_table(self, document_text, kgs, out_folder, src_pdf):
         if not kgs:
             return "Нет КГС", "0/0", 0, 0
+        catalog = CoordinateCatalogParser()
+        catalog.feed(NormalizedText(document_text))
+        return self.save_coordinate_table(catalog, kgs, out_folder, src_pdf)
+    def save_coordinate_table(self, catalog, kgs, out_folder, src_pdf, collect=None):
+        # collect — список, в который добавляются сохранённые точки (pid, x, y, h) для PointsStore
         fname = os.path.join(out_folder, f"{self.sanitize_filename(kgs)}.txt")
         issues_name = os.path.join(out_folder, f"{self.sanitize_filename(kgs)}_issues.txt")
-        start_keys = [
-            r"каталог\s+(?:исполнительных\s+|фактических\s+)?координат",
-            r"ведомость\s+(?:исполнительных\s+|фактических\s+)?координат",
-            r"координаты\s+точек", r"координаты\s+пунктов",
-            r"№\s*точки.*X.*[YУ].*[HН]?", r"n/n\s*по\s*съемке\s*[xх]\s*,\s*[мМm]\s*[yу]\s*,\s*[мМm]\s*[hн]\s*,\s*[мМm]"
-        ]
-        row_re = re.compile(
-            r"^\s*(\d+)(?:\s+\d+)?\s+([-–—−]?\d{1,3}(?:\s*\d{3})*[.,]\d{1,3})\s+([-–—−]?\d{1,3}(?:\s*\d{3})*[.,]\d{1,3})(?:\s+([-–—−]?\d{1,3}(?:\s*\d{3})*[.,]\d{1,3}))?(?:\s+(.*))?$",
-            re.IGNORECASE
-        )
-        num_token_re = re.compile(r"[-–—−]?\d+(?:\s?\d{3})*(?:[.,]\d+)?")
-        def clean_num_string(v: str) -> str:
-            if not v: return ""
-            s = str(v).strip()
-            repl = {'O':'0','О':'0','I':'1','L':'1','Е':'1','Z':'2','З':'3','S':'5','Б':'6',
-                    'B':'8','В':'8','°':'0','=':'-','−':'-','–':'-','—':'-','_':'-'}
-            for a,b in repl.items(): s = s.replace(a,b)
-            s = re.sub(r'\s+', '', s).replace(',', '.')
-            if s.count('-')>1:
-                s = ('-'+s.replace('-','')) if s.startswith('-') else s.replace('-','')
-            if s.count('.')>1:
-                p = s.split('.'); s = p[0]+'.'+''.join(p[1:])
-            s = re.sub(r'[^\d\.-]', '', s)
-            return s if re.search(r'\d', s) else ""
-        def as_float(s):
-            try:
-                return float(s)
-            except:
-                return None
-        def fuzzy_parse(line: str):
-            m_id = re.match(r"\s*(\d+)(?:\s+\d+)?", line)
-            if not m_id:
-                return None
-            pid = m_id.group(1)
-            rest = line[m_id.end():]
-            nums = [clean_num_string(t.group(0)) for t in num_token_re.finditer(rest)]
-            nums = [n for n in nums if n]
-            x = y = h = ""
-            if len(nums) >= 2:
-                x, y = nums[0], nums[1]
-                if len(nums) >= 3:
-                    h = nums[2]
-            desc = ""
-            if nums:
-                last = None
-                for m in num_token_re.finditer(rest):
-                    last = m
-                if last:
-                    desc = rest[last.end():].strip()
-            else:
-                desc = rest.strip()
-            return pid, x, y, h, desc
-        lines = document_text.splitlines()
-        raw_rows = []
-        parsing = False
-        skip = 0
-        MAX_SKIP = 10
-        issues = []
-        max_id = 0
-        table_header_found = False
-        for line in lines:
-            t = line.strip()
-            if not t:
-                if parsing: 
-                    skip += 1
-                    if skip >= MAX_SKIP and raw_rows:
-                        break
-                continue
-            if not parsing:
-                if any(re.search(k, t, re.IGNORECASE) for k in start_keys):
-                    parsing, skip = True, 0
-                continue
-            if parsing and not table_header_found:
-                table_header_patterns = [
-                    r"n/n\s*по\s*съемке\s*[xх]\s*,\s*[мmМ]\s*[yу]\s*,\s*[мmМ]\s*[hн]\s*,\s*[мmМ]?",
-                    r"n/n\s*по\s*съемке\s*[xх]\s*,?\s*[мmМ]?\s*[yу]\s*,?\s*[мmМ]?\s*[hн]\s*,?\s*[мmМ]?",
-                    r"№\s*точки.*[xхyуhн]",
-                    r"№\s*точки.*координаты"
-                ]
-                if any(re.search(pattern, t, re.IGNORECASE) for pattern in table_header_patterns):
-                    table_header_found = True
-                    skip = 0
-                continue
-            m = row_re.match(t)
-            if m:
-                skip = 0
-                pid, x, y, h, d = m.groups()
-                x, y, h = clean_num_string(x), clean_num_string(y), clean_num_string(h)
-            else:
-                skip += 1
-                parsed = fuzzy_parse(t)
-                if not parsed:
-                    if raw_rows and skip >= MAX_SKIP:
-                        break
-                    else:
-                        continue
-                pid, x, y, h, d = parsed
-                x, y, h = clean_num_string(x), clean_num_string(y), clean_num_string(h)
-            if pid and pid.isdigit():
-                max_id = max(max_id, int(pid))
-            raw_rows.append({"pid": pid, "x": x, "y": y, "h": h, "d": (d or "").strip(), "line": t})
-        if not raw_rows:
+        max_id = catalog.max_id
+        if not catalog.pids:
             self.log_message(f"Каталог координат не найден ({src_pdf})")
             return "Нет точек", "0/0", 0, 0
-        xs = [as_float(r["x"]) for r in raw_rows if r["x"]]
-        ys = [as_float(r["y"]) for r in raw_rows if r["y"]]
-        hs = [as_float(r["h"]) for r in raw_rows if r["h"]]
-        def majority_negative(values):
-            vs = [v for v in values if v is not None]
-            if not vs: return False
-            neg = sum(1 for v in vs if v < 0)
-            pos = sum(1 for v in vs if v > 0)
-            return neg > pos
-        x_should_be_negative = majority_negative(xs)
-        y_should_be_negative = majority_negative(ys)
-        fixed_rows = []
-        for r in raw_rows:
-            pid, x_s, y_s, h_s, d = r["pid"], r["x"], r["y"], r["h"], r["d"]
-            x, y, h = as_float(x_s), as_float(y_s), as_float(h_s)
-            notes = []
-            if x is None or y is None:
-                notes.append("неполная строка (нет X или Y)")
-            def maybe_fix_sign(val, s, should_neg, label):
-                if val is None: 
-                    return val, s, False
-                if should_neg and val > 0 and abs(val) > 500:
-                    s_fixed = "-" + s if not s.startswith("-") else s
-                    notes.append(f"возможен потерянный минус у {label} -> исправил")
-                    return -val, s_fixed, True
-                return val, s, False
-            x, x_s, _ = maybe_fix_sign(x, x_s, x_should_be_negative, "X")
-            y, y_s, _ = maybe_fix_sign(y, y_s, y_should_be_negative, "Y")
-            if h is not None and h > 500:
-                if re.fullmatch(r"\d{4,6}", h_s or ""):
-                    h_s_fixed = h_s[:-2] + "." + h_s[-2:]
-                    h_fixed = as_float(h_s_fixed)
-                    if h_fixed is not None and 0 < h_fixed < 500:
-                        notes.append(f"высота без точки ({h_s}) -> {h_s_fixed}")
-                        h, h_s = h_fixed, h_s_fixed
-            if ("неполная строка" in " ".join(notes)) or x is None or y is None:
-                issues.append(f"{pid}\t{x_s or ''}\t{y_s or ''}\t{h_s or ''}\t{d}    <-- ПРОБЛЕМА: {', '.join(notes) or 'не удалось распарсить'}")
-            fixed_rows.append((pid, x_s or "", y_s or "", h_s or "", d))
+        # Столбцы обрабатываются целиком: числа разбираются один раз, правки — по номерам строк
+        pids, descs = catalog.pids, catalog.descs
+        xs, ys, hs = list(catalog.xs), list(catalog.ys), list(catalog.hs)
+        xv, yv, hv = column_floats(xs), column_floats(ys), column_floats(hs)
+        x_fixed = column_fix_lost_minus(xs, xv) if column_majority_negative(xv) else []
+        y_fixed = column_fix_lost_minus(ys, yv) if column_majority_negative(yv) else []
+        h_fixed = column_fix_heights(hs, hv)
+        issues = []
+        n = len(pids)
+        bad_rows = list(compress(range(n), map(operator.or_, column_missing(xv), column_missing(yv))))
+        if bad_rows:
+            x_fixed, y_fixed = set(x_fixed), set(y_fixed)
+            for i in bad_rows:
+                notes = ["неполная строка (нет X или Y)"]
+                if i in x_fixed:
+                    notes.append("возможен потерянный минус у X -> исправил")
+                if i in y_fixed:
+                    notes.append("возможен потерянный минус у Y -> исправил")
+                if i in h_fixed:
+                    notes.append(f"высота без точки ({h_fixed[i]}) -> {hs[i]}")
+                issues.append(f"{pids[i]}\t{xs[i]}\t{ys[i]}\t{hs[i]}\t{descs[i]}    <-- ПРОБЛЕМА: {', '.join(notes)}")
+        columns = (pids, xs, ys, hs, descs)
+        written = list(map(all, zip(xs, ys)))  # в файл — строки, где есть X и Y
+        cnt = sum(written)
+        if cnt < n:
+            columns = [list(compress(column, written)) for column in columns]
+        if collect is not None:
+            collect.extend(
+                (pid, x, y, None if h != h else h)
+                for pid, x, y, h in zip(pids, xv, yv, hv)
+                if x == x and y == y  # без NaN
+            )
         os.makedirs(out_folder, exist_ok=True)
         with open(fname, 'w', encoding='utf-8') as f:
-            for pid, x_s, y_s, h_s, d in fixed_rows:
-                if x_s and y_s:
-                    f.write(f"{pid}\t{x_s}\t{y_s}\t{h_s}\t{d}\n")
+            if cnt:
+                f.write("\n".join(map("\t".join, zip(*columns))) + "\n")
         if issues:
             with open(issues_name, 'w', encoding='utf-8') as f:
                 f.write("Строки с подозрениями/ошибками (после грубых автоправок):\n")
                 for it in issues:
                     f.write(it + "\n")
             self.log_message(f"⚠ Обнаружены проблемные строки: {os.path.basename(issues_name)}")
-        cnt = sum(1 for pid, x_s, y_s, h_s, d in fixed_rows if x_s and y_s)
         count_str = f"{cnt}/{max_id if max_id else cnt}"
         self.log_message(f"Каталог: {os.path.basename(fname)} | Точек: {count_str}")
         return "Точки сохранены", count_str, cnt, max_id
-    def adjust_columns(self, ws):
+    def adjust_columns(self, ws, first_row=1):
+        # Ширины растут по значениям строк начиная с first_row; сохранённая ширина не уменьшается
         if not EXCEL_SUPPORTED:
             return
-        from openpyxl.utils import get_column_letter
-        for col in ws.columns:
-            width = min(max((len(str(c.value)) for c in col if c.value), default=0) + 2, 50)
-            ws.column_dimensions[get_column_letter(col[0].column)].width = width
-    def apply_standard_excel_style(self, ws, headers):
+        widths = {}
+        for row in ws.iter_rows(min_row=first_row, values_only=True):
+            for col_idx, value in enumerate(row, 1):
+                if value:
+                    widths[col_idx] = max(widths.get(col_idx, 0), registry_column_width(value))
+        for col_idx in range(1, ws.max_column + 1):
+            letter = get_column_letter(col_idx)
+            stored = ws.column_dimensions[letter].width if letter in ws.column_dimensions else None
+            ws.column_dimensions[letter].width = max(stored or 0, widths.get(col_idx, 2))
+    def _registry_styles(self, wb):
+        # Регистрирует именованные стили реестра в книге (если их ещё нет)
+        thin = Side(style="thin", color="9E9E9E")
+        border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        center = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        body_font = Font(size=11, name="Calibri")
+        styles = (
+            NamedStyle(REGISTRY_STYLE_HEADER, font=Font(bold=True, color="FFFFFF", size=11, name="Calibri"),
+                       fill=PatternFill("solid", fgColor="4F81BD"), border=border, alignment=center),
+            NamedStyle(REGISTRY_STYLE_BODY, font=body_font, border=border, alignment=center),
+            NamedStyle(REGISTRY_STYLE_DATE, font=body_font, border=border, alignment=center, number_format="DD.MM.YYYY"),
+        )
+        for style in styles:
+            if style.name not in wb.named_styles:
+                wb.add_named_style(style)
+    def apply_standard_excel_style(self, ws, headers, first_row=2):
+        # Стиль назначается шапке и строкам начиная с first_row (прежние строки уже оформлены)
         if not EXCEL_SUPPORTED:
             return
         try:
-            from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-            header_fill = PatternFill("solid", fgColor="4F81BD")
-            header_font = Font(bold=True, color="FFFFFF", size=11, name="Calibri")
-            body_font = Font(size=11, name="Calibri")
-            center = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            header_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            thin = Side(style="thin", color="9E9E9E")
-            border = Border(left=thin, right=thin, top=thin, bottom=thin)
             max_row = ws.max_row
             max_col = ws.max_column
             if max_row < 1 or max_col < 1:
                 return
+            self._registry_styles(ws.parent)
             for col_idx in range(1, max_col + 1):
-                cell = ws.cell(row=1, column=col_idx)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = header_align
-                cell.border = border
+                ws.cell(row=1, column=col_idx).style = REGISTRY_STYLE_HEADER
             ws.row_dimensions[1].height = 22
-            for r in range(2, max_row + 1):
-                for c in range(1, max_col + 1):
-                    cell = ws.cell(row=r, column=c)
-                    cell.font = body_font
-                    cell.alignment = center
-                    cell.border = border
-            try:
-                date_col_idx = headers.index("Дата съемки") + 1
-                for r in range(2, max_row + 1):
-                    ws.cell(row=r, column=date_col_idx).number_format = "DD.MM.YYYY"
-            except ValueError:
-                pass
+            date_col_idx = headers.index("Дата съемки") + 1 if "Дата съемки" in headers else None
+            for row in ws.iter_rows(min_row=max(first_row, 2), max_row=max_row, max_col=max_col):
+                for cell in row:
+                    cell.style = REGISTRY_STYLE_DATE if cell.column == date_col_idx else REGISTRY_STYLE_BODY
             ws.freeze_panes = "A2"
             if max_row > 1:
                 ws.auto_filter.ref = ws.dimensions
         except Exception as e:
             self.log_message(f"Не удалось применить стиль Excel: {e}")
+    def _open_registry_appender(self, output_path, headers):
+        # RegistryAppender, если реестр можно дописать без загрузки книги: та же структура
+        # колонок и есть хотя бы одна строка данных (по ней берутся стили новых строк)
+        try:
+            appender = RegistryAppender(output_path)
+        except Exception as e:
+            self.log_message(f"Реестр будет загружен целиком: {e}")
+            return None
+        if appender.headers != headers or not appender.data_rows:
+            return None
+        self.log_message(f"Реестр: {appender.data_rows} строк, новые строки будут дописаны")
+        return appender
+    def _open_registry(self, output_path, headers):
+        # (wb, ws, appender, existing, updated): существующий реестр дописывается через
+        # RegistryAppender, иначе загружается (с обновлением структуры) или создаётся
+        wb = ws = None
+        appender = None
+        existing = set()
+        excel_created_or_updated = False
+        if os.path.exists(output_path):
+            appender = self._open_registry_appender(output_path, headers)
+        if appender is not None:
+            existing = appender.existing
+        elif os.path.exists(output_path):
+            try:
+                wb = load_workbook(output_path)
+                if wb is not None:
+                    ws = wb.active
+                    if ws is not None:
+                        current_headers = [cell.value for cell in ws[1] if cell.value]
+                        if current_headers != headers:
+                            self.log_message("Обновляю структуру Excel файла...")
+                            new_ws = wb.create_sheet("Геодезия_новый")
+                            new_ws.append(headers)
+                            for row in ws.iter_rows(min_row=2, values_only=True):
+                                if row and row[0]:
+                                    adjusted_row = list(row)[:len(headers)]
+                                    while len(adjusted_row) < len(headers):
+                                        adjusted_row.append("")
+                                    new_ws.append(adjusted_row)
+                                    existing.add(adjusted_row[0])
+                            wb.remove(ws)
+                            new_ws.title = "Геодезия"
+                            ws = new_ws
+                            excel_created_or_updated = True
+                        else:
+                            for row in ws.iter_rows(min_row=2, values_only=True):
+                                if row and row[0]:
+                                    existing.add(row[0])
+                    else:
+                        raise Exception("Не удалось получить активный лист")
+            except Exception as e:
+                self.log_message(f"Ошибка загрузки Excel, создаю новый: {e}")
+                wb = Workbook()
+                if wb is not None:
+                    ws = wb.active
+                    if ws is not None:
+                        ws.title = "Геодезия"
+                        ws.append(headers)
+                        self.adjust_columns(ws)
+                        excel_created_or_updated = True
+        else:
+            wb = Workbook()
+            if wb is not None:
+                ws = wb.active
+                if ws is not None:
+                    ws.title = "Геодезия"
+                    ws.append(headers)
+                    self.adjust_columns(ws)
+                    excel_created_or_updated = True
+        return wb, ws, appender, existing, excel_created_or_updated
+    def process_file(self, folder_path, fname, index=None, total_files=None):
+        self.check_cancelled()
+        self._report_progress(
+            file_index=index,
+            total_files=total_files,
+            filename=fname,
+            page_index=0,
+            total_pages=0,
+        )
+        fpath = os.path.join(folder_path, fname)
+        self.log_message(f"— Обработка: {fname} ({index}/{total_files})")
+        # Страницы разбираются по мере распознавания, полный текст документа не собирается.
+        # В режиме split_documents PDF делится на съёмки по подписи «№ КГС»
+        document = KgsDocument(self, 1, multiple_catalogs=self.split_documents)
+        documents = [document]
+        debug_file = None
+        pages = 0
+        doc_info = {}
+        try:
+            if self.debug_mode:
+                dbg = os.path.join(self.points_folder or folder_path, f"DEBUG_FULL_OCR_{self.sanitize_filename(fname)}.txt")
+                try:
+                    debug_file = open(dbg, 'w', encoding='utf-8')
+                    self.log_message(f"DEBUG OCR: {dbg}")
+                except Exception as e:
+                    self.log_message(f"DEBUG save error: {e}")
+            for page in self.iter_pages(fpath, doc_info):
+                pages += 1
+                view = NormalizedText(page.text)  # один раз на страницу для полей и каталога
+                if self.split_documents:
+                    label = kgs_label(view.text)
+                    if not document.claims(label):
+                        self.log_message(f"Стр.{page.index + 1}: начало КГС {label}")
+                        document = KgsDocument(self, page.index + 1, label, multiple_catalogs=True)
+                        documents.append(document)
+                document.feed(page, view)
+                if debug_file is not None:
+                    debug_file.write(page.text + "\n")
+                if self.lazy_extraction and not self.split_documents and document.is_complete():
+                    skipped = doc_info.get("total_pages", pages) - pages
+                    if skipped > 0:
+                        self.log_message(
+                            f"Все поля{' и каталог' if self.import_points else ''} найдены на стр. {pages}: "
+                            f"пропущено страниц {skipped} из {doc_info['total_pages']}"
+                        )
+                    break
+        except ProcessingCancelled:
+            raise
+        except Exception as e:
+            self.log_message(f"Ошибка PDF {fname}: {e}")
+            return {"ok": False}
+        finally:
+            if debug_file is not None:
+                debug_file.close()
+        if not pages:
+            return {"ok": False}
+        if len(documents) > 1:
+            self.log_message(f"В файле {len(documents)} КГС")
+        return {
+            "ok": True,
+            "documents": [self._document_result(d, folder_path, fname, len(documents) > 1) for d in documents],
+        }
+    def _document_result(self, document, folder_path, fname, with_pages=False):
+        data = document.fields.result()
+        found = sum(1 for v in data.values() if v)
+        status = "Успешно" if found == 4 else ("Частично" if found > 0 else "Не распознано")
+        points_status = "Нет точек"
+        points_count_str = "0/0"
+        points = [] if self.use_points_store else None
+        if document.catalog is not None and data.get("КГС"):
+            out_folder = self.points_folder or folder_path
+            if self.sort_points_by_comm:
+                out_folder = self._comm_subfolder(out_folder, data.get("Тип коммуникации"))
+            points_status, points_count_str, _, _ = self.save_coordinate_table(
+                document.catalog, data["КГС"], out_folder, fname, points
+            )
+        if with_pages:
+            status = f"{status} ({document.pages()})"
+        return {
+            "data": data,
+            "status": status,
+            "points_status": points_status,
+            "points_count_str": points_count_str,
+            "points": points,
+        }
+    def open_points_store(self, folder_path):
+        if not (self.import_points and self.use_points_store):
+            return None
+        path = os.path.join(self.points_folder or folder_path, "points.sqlite")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)  # папка точек может ещё не существовать
+            store = PointsStore(path, self.points_grid_m)
+            store._connect()
+        except Exception as e:
+            self.log_message(f"Сводная база точек недоступна ({path}): {e}")
+            return None
+        self.log_message(f"Сводная база точек: {path}")
+        return store
+    def open_registry_index(self, output_path):
+        path = os.path.splitext(output_path)[0] + ".index.sqlite"
+        try:
+            index = RegistryIndex(path)
+            index._connect()
+        except Exception as e:
+            self.log_message(f"Индекс реестра недоступен ({path}): {e}")
+            return None
+        return index
+    def _rebuild_registry_index(self, index, names, output_path):
+        try:
+            index.rebuild(names, output_path)
+            self.log_message(f"Индекс реестра перестроен: {len(names)} файлов")
+        except Exception as e:
+            self.log_message(f"Индекс реестра не перестроен: {e}")
+    def _registry_record(self, folder_path, fname):
+        # (имя, размер, mtime, хэш) для индекса реестра; берётся до перемещения файла
+        path = os.path.join(folder_path, fname)
+        try:
+            st = os.stat(path)
+            return fname, st.st_size, st.st_mtime_ns, file_content_hash(path)
+        except OSError:
+            return fname, None, None, None
+    def _registry_file_changed(self, existing, folder_path, fname):
+        # Файл с тем же именем, но другим содержимым, чем при внесении в реестр
+        if not isinstance(existing, RegistryIndex):
+            return False
+        known = existing.get(fname)
+        if not known or known[2] is None:
+            return False
+        path = os.path.join(folder_path, fname)
+        try:
+            st = os.stat(path)
+            # хэш считается, только если изменились размер или mtime
+            return (st.st_size, st.st_mtime_ns) != tuple(known[:2]) and file_content_hash(path) != known[2]
+        except OSError:
+            return False
+    def store_survey_points(self, store, document, fname):
+        # Точки съёмки в сводную базу; текст для колонки «Пересечения»
+        kgs = document["data"].get("КГС")
+        if store is None or not kgs or not document.get("points"):
+            return ""
+        try:
+            store.add_survey(kgs, fname, document["points"])
+            duplicates = store.duplicates(kgs, self.points_duplicate_m)
+        except Exception as e:
+            self.log_message(f"Сводная база точек: ошибка записи {kgs}: {e}")
+            return ""
+        if duplicates:
+            self.log_message(f"КГС {kgs}: совпадающие точки с {format_duplicates(duplicates)}")
+        return format_duplicates(duplicates)
+    def _iter_file_results(self, folder_path, jobs, total_files):
+        workers = max(1, min(int(self.workers or 1), len(jobs)))
+        if workers <= 1:
+            for index, fname in jobs:
+                yield index, fname, self.process_file(folder_path, fname, index, total_files)
+            return
+        yield from self._iter_parallel_file_results(folder_path, jobs, total_files, workers)
+    def _start_file_pool(self, ctx, workers, worker_cancel, messages):
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_file_worker,
+            initargs=(self.export_worker_config(), worker_cancel, messages),
+        )
+    def _iter_parallel_file_results(self, folder_path, jobs, total_files, workers):
+        # Файлы обрабатываются в отдельных процессах, а книга Excel, статистика и список
+        # проблемных файлов остаются здесь: результаты забираются строго в порядке jobs.
+        # Если процесс-обработчик аварийно завершился (падение на PDF), пул ломается: файлы,
+        # отправленные в него и ещё не обработанные, считаются ошибкой, а остальные
+        # уходят в новый пул.
+        self.check_cancelled()
+        self.log_message(f"Параллельная обработка: процессов {workers}")
+        ctx = multiprocessing.get_context("spawn")
+        worker_cancel = ctx.Event()
+        messages = ctx.SimpleQueue()
+        executor = self._start_file_pool(ctx, workers, worker_cancel, messages)
+        broken = False
+        pending = deque()
+        job_iter = iter(jobs)
+        retry = None  # файл, который не удалось отправить в сломанный пул
+        try:
+            while True:
+                while not broken and len(pending) < workers * 2:
+                    job = retry or next(job_iter, None)
+                    if job is None:
+                        break
+                    index, fname = job
+                    try:
+                        future = executor.submit(_run_file_worker, folder_path, fname, index, total_files)
+                    except BrokenProcessPool:
+                        broken = True
+                        retry = job
+                        break
+                    retry = None
+                    pending.append((index, fname, future))
+                if not pending:
+                    if not broken:
+                        break
+                    executor.shutdown(wait=True)
+                    self.log_message("Процесс-обработчик аварийно завершился, пул процессов перезапущен")
+                    executor = self._start_file_pool(ctx, workers, worker_cancel, messages)
+                    broken = False
+                    continue
+                index, fname, future = pending[0]
+                while True:
+                    self._drain_worker_messages(messages)
+                    if self.cancel_event is not None and self.cancel_event.is_set():
+                        worker_cancel.set()
+                        self.check_cancelled()
+                    try:
+                        result = future.result(timeout=0.2)
+                        break
+                    except FuturesTimeout:
+                        continue
+                    except BrokenProcessPool:
+                        self.log_message(f"Процесс-обработчик аварийно завершился, файл не обработан: {fname}")
+                        broken = True
+                        result = {"ok": False}
+                        break
+                    except Exception as e:
+                        self.log_message(f"Ошибка процесса-обработчика ({fname}): {e}")
+                        result = {"ok": False}
+                        break
+                pending.popleft()
+                self._drain_worker_messages(messages)
+                if result.get("cancelled"):
+                    worker_cancel.set()
+                    self.cancelled = True
+                    raise ProcessingCancelled()
+                yield index, fname, result
+        finally:
+            if pending:
+                worker_cancel.set()
+            for _, _, future in pending:
+                future.cancel()
+            for _, _, future in pending:
+                while not future.done():
+                    self._drain_worker_messages(messages)
+                    time.sleep(0.1)
+            executor.shutdown(wait=True)
+            self._drain_worker_messages(messages)
+    def _drain_worker_messages(self, messages):
+        while not messages.empty():
+            kind, fname, payload = messages.get()
+            if kind == "log":
+                self.log_message(f"[{fname}] {payload}" if fname else payload)
+            elif kind == "progress":
+                self._report_progress(**payload)
     def analyze_results(self, total):
         self.log_message("--- Сводка ---")
         if not total:
@@ -750,6 +3461,68 @@ class PDFProcessor:
         for f in ["Тип коммуникации", "Номер договора", "КГС", "Дата съемки"]:
             c = self.field_stats.get(f, 0)
             self.log_message(f"{f}: {c}/{total} ({(c/total*100):.1f}%)")
+    def open_output_sinks(self, output_path):
+        sinks = []
+        for name in self.output_sinks:
+            sink_cls = REGISTRY_SINKS.get(name)
+            if sink_cls is None:
+                self.log_message(f"Неизвестный формат вывода реестра: {name}")
+                continue
+            path = os.path.splitext(output_path)[0] + sink_cls.extension
+            try:
+                sinks.append(sink_cls(path, REGISTRY_HEADERS))
+                self.log_message(f"Реестр {sink_cls.label}: {path}")
+            except Exception as e:
+                self.log_message(f"Реестр {sink_cls.label} недоступен ({path}): {e}")
+        return sinks
+    def _write_sinks(self, sinks, rows):
+        # Формат, в который не удалось записать, отключается до конца обработки
+        for sink in list(sinks):
+            try:
+                sink.write(rows)
+            except Exception as e:
+                self.log_message(f"Реестр {sink.label}: ошибка записи, вывод отключён: {e}")
+                sinks.remove(sink)
+                try:
+                    sink.close()
+                except Exception:
+                    pass
+    def _checkpoint_due(self, files, since):
+        by_files = self.registry_checkpoint_files and files >= self.registry_checkpoint_files
+        by_time = self.registry_checkpoint_minutes and time.monotonic() - since >= self.registry_checkpoint_minutes * 60
+        return bool(by_files or by_time)
+    def _save_registry(self, wb, ws, appender, headers, output_path, first_new_row):
+        # Сохраняет реестр через временный файл и замену; возвращает первую неоформленную строку
+        if appender is not None:
+            added = len(appender.rows)
+            appender.save()
+            self.log_message(f"В реестр дописано строк: {added}")
+            return first_new_row
+        if ws is not None:  # оформляются только новые строки
+            self.adjust_columns(ws, first_new_row)
+            if ws.max_row > 1:
+                try:
+                    self.apply_standard_excel_style(ws, headers, first_new_row)
+                except Exception as e:
+                    self.log_message(f"Не удалось применить стиль Excel: {e}")
+        tmp = output_path + ".tmp"
+        try:
+            wb.save(tmp)
+            os.replace(tmp, output_path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return ws.max_row + 1 if ws is not None else first_new_row
+    def _registry_saved(self, registry_index, registered, journal, output_path):
+        # Реестр сохранён: записи попадают в индекс, журнал больше не нужен
+        if registry_index is not None:
+            try:
+                registry_index.add(registered, output_path)
+            except Exception as e:
+                self.log_message(f"Индекс реестра не обновлён: {e}")
+        registered.clear()
+        if journal is not None:
+            journal.clear()
     def process_selected_files(self, folder_path, selected_filenames, target_move_folder=None):
         if not os.path.exists(folder_path):
             messagebox.showerror("Ошибка", "Папка не существует!")
@@ -757,155 +3530,159 @@ class PDFProcessor:
         output_path = os.path.join(folder_path, "Реестр_геодезических_съемок.xlsx")
         self.output_excel_path = output_path
         self.log_file_path = os.path.join(folder_path, "application_log.txt")
-        headers = ["Файл", "Тип коммуникации", "Номер договора", "КГС", "Дата съемки", "Количество точек", "Статус", "Точки"]
+        headers = list(REGISTRY_HEADERS)
         wb = ws = None
+        appender = None  # дозапись в существующий реестр без загрузки книги
+        registry_index = None  # имена файлов реестра в SQLite рядом с xlsx
         existing = set()
+        registry_loaded = False
         processed = 0
+        documents = 0  # строк реестра: в файле может быть несколько КГС
         moved = 0
         excel_created_or_updated = False
         if not self.ignore_excel:
             if not EXCEL_SUPPORTED:
                 self.log_message("Работа с Excel не поддерживается: библиотека openpyxl не установлена")
             else:
-                if os.path.exists(output_path):
-                    try:
-                        wb = load_workbook(output_path)
-                        if wb is not None:
-                            ws = wb.active
-                            if ws is not None:
-                                current_headers = [cell.value for cell in ws[1] if cell.value]
-                                if current_headers != headers:
-                                    self.log_message("Обновляю структуру Excel файла...")
-                                    new_ws = wb.create_sheet("Геодезия_новый")
-                                    new_ws.append(headers)
-                                    for row in ws.iter_rows(min_row=2, values_only=True):
-                                        if row and row[0]:
-                                            adjusted_row = list(row)[:len(headers)]
-                                            while len(adjusted_row) < len(headers):
-                                                adjusted_row.append("")
-                                            new_ws.append(adjusted_row)
-                                            existing.add(adjusted_row[0])
-                                    wb.remove(ws)
-                                    new_ws.title = "Геодезия"
-                                    ws = new_ws
-                                    excel_created_or_updated = True
-                                else:
-                                    for row in ws.iter_rows(min_row=2, values_only=True):
-                                        if row and row[0]:
-                                            existing.add(row[0])
-                            else:
-                                raise Exception("Не удалось получить активный лист")
-                    except Exception as e:
-                        self.log_message(f"Ошибка загрузки Excel, создаю новый: {e}")
-                        wb = Workbook()
-                        if wb is not None:
-                            ws = wb.active
-                            if ws is not None:
-                                ws.title = "Геодезия"
-                                ws.append(headers)
-                                self.adjust_columns(ws)
-                                excel_created_or_updated = True
+                registry_index = self.open_registry_index(output_path)
+                if registry_index is not None and registry_index.in_sync(output_path):
+                    existing = registry_index
                 else:
-                    wb = Workbook()
-                    if wb is not None:
-                        ws = wb.active
-                        if ws is not None:
-                            ws.title = "Геодезия"
-                            ws.append(headers)
-                            self.adjust_columns(ws)
-                            excel_created_or_updated = True
+                    wb, ws, appender, existing, excel_created_or_updated = self._open_registry(output_path, headers)
+                    registry_loaded = True
+                    if registry_index is not None:
+                        self._rebuild_registry_index(registry_index, existing, output_path)
         else:
             self.log_message("Режим: Excel отключён.")
+        journal = None  # строки, ещё не сохранённые в реестр
+        recovered = []
+        if not self.ignore_excel and EXCEL_SUPPORTED:
+            journal = RegistryJournal(os.path.splitext(output_path)[0] + ".journal.jsonl")
+            try:
+                recovered = [entry for entry in journal.read() if entry["file"] not in existing]
+            except Exception as e:
+                self.log_message(f"Журнал реестра не прочитан: {e}")
+        recovered_names = {entry["file"] for entry in recovered}
         total_files = len(selected_filenames)
         cancelled = False
+        error = None  # ошибка, прервавшая обработку: поднимается после сохранения реестра
+        jobs = []
         for index, fname in enumerate(selected_filenames, 1):
-            try:
-                self.check_cancelled()
-                self._report_progress(
-                    file_index=index,
-                    total_files=total_files,
-                    filename=fname,
-                    page_index=0,
-                    total_pages=0,
-                )
-                if not self.ignore_excel and EXCEL_SUPPORTED and fname in existing:
-                    self.log_message(f"Пропуск (уже в Excel): {fname}")
-                    if target_move_folder and target_move_folder != folder_path:
+            if not self.ignore_excel and EXCEL_SUPPORTED and (fname in existing or fname in recovered_names):
+                changed = self._registry_file_changed(existing, folder_path, fname)
+                self.log_message(f"Пропуск (уже в Excel{', файл изменён после внесения' if changed else ''}): {fname}")
+                if target_move_folder and target_move_folder != folder_path:
+                    try:
+                        shutil.move(os.path.join(folder_path, fname), os.path.join(target_move_folder, fname))
+                        moved += 1
+                    except Exception as e:
+                        self.log_message(f"Не переместил {fname}: {e}")
+                continue
+            jobs.append((index, fname))
+        if not self.ignore_excel and EXCEL_SUPPORTED and (jobs or recovered) and not registry_loaded:
+            # индекс актуален: реестр открывается, только когда есть что дописать
+            wb, ws, appender, names, excel_created_or_updated = self._open_registry(output_path, headers)
+            if appender is None and registry_index is not None:  # реестр пересоздан или перестроен
+                self._rebuild_registry_index(registry_index, names, output_path)
+        store = self.open_points_store(folder_path) if jobs else None
+        sinks = self.open_output_sinks(output_path) if jobs else []
+        registry = appender if appender is not None else ws
+        # первая строка, которую нужно оформить: новый или перестроенный лист — целиком
+        first_new_row = 1 if excel_created_or_updated or ws is None else ws.max_row + 1
+        registered = []  # записи индекса реестра для строк, ещё не сохранённых в xlsx
+        if registry is None:
+            journal = None
+        elif recovered:
+            # строки файлов из журнала прерванной обработки
+            for entry in recovered:
+                for row in entry["rows"]:
+                    registry.append(row)
+                registered.append(tuple(entry.get("record") or (entry["file"], None, None, None)))
+            excel_created_or_updated = True
+            self.log_message(f"Восстановлено из журнала реестра: {len(recovered)} файлов")
+        excel_saved = False
+        checkpoint_files = 0
+        checkpoint_time = time.monotonic()
+        try:
+            for index, fname, result in self._iter_file_results(folder_path, jobs, total_files):
+                rows = []
+                if not result.get("ok"):
+                    rows.append([fname, "", "", "", "", "", "Ошибка обработки", "", ""])
+                    self.problem_files.append(fname)
+                else:
+                    for document in result["documents"]:
+                        data = document["data"]
+                        status = document["status"]
+                        points_status = document["points_status"]
+                        points_count_str = document["points_count_str"]
+                        overlaps = self.store_survey_points(store, document, fname)
+                        for k in ["Тип коммуникации", "Номер договора", "КГС", "Дата съемки"]:
+                            if data.get(k):
+                                self.field_stats[k] += 1
+                        rows.append([
+                            fname,
+                            data.get("Тип коммуникации", ""),
+                            data.get("Номер договора", ""),
+                            data.get("КГС", ""),
+                            data.get("Дата съемки", ""),
+                            points_count_str,
+                            status,
+                            points_status,
+                            overlaps,
+                        ])
+                        self.log_message(f"Готово: {status}; точки {points_count_str}; {points_status} ({index}/{total_files})")
+                        documents += 1
+                if sinks and rows:
+                    self._write_sinks(sinks, rows)
+                if registry is not None and rows:
+                    for row in rows:
+                        registry.append(row)
+                    record = self._registry_record(folder_path, fname)
+                    registered.append(record)
+                    excel_created_or_updated = True
+                    try:
+                        journal.append(fname, rows, record)
+                    except Exception as e:
+                        self.log_message(f"Журнал реестра: ошибка записи {fname}: {e}")
+                    checkpoint_files += 1
+                    if self._checkpoint_due(checkpoint_files, checkpoint_time):
                         try:
-                            shutil.move(os.path.join(folder_path, fname), os.path.join(target_move_folder, fname))
-                            moved += 1
+                            first_new_row = self._save_registry(wb, ws, appender, headers, output_path, first_new_row)
+                            self._registry_saved(registry_index, registered, journal, output_path)
+                            excel_saved = True
+                            excel_created_or_updated = False
+                            self.log_message(f"Реестр сохранён (промежуточно): {output_path}")
                         except Exception as e:
-                            self.log_message(f"Не переместил {fname}: {e}")
+                            self.log_message(f"Промежуточное сохранение реестра не удалось, строки остаются в журнале: {e}")
+                        checkpoint_files = 0
+                        checkpoint_time = time.monotonic()
+                if not result.get("ok"):
                     continue
-                fpath = os.path.join(folder_path, fname)
-                self.log_message(f"— Обработка: {fname} ({index}/{total_files})")
-                text = self.process_pdf(fpath)
-                if not text:
-                    if not self.ignore_excel and EXCEL_SUPPORTED and ws is not None:
-                        ws.append([fname, "", "", "", "", "", "Ошибка обработки", ""])
-                        excel_created_or_updated = True
-                    self.problem_files.append(fname)
-                    continue
-            except ProcessingCancelled:
-                cancelled = True
-                self.log_message("Отмена пользователем. Останавливаю обработку.")
-                break
-            if self.debug_mode:
-                try:
-                    dbg = os.path.join(self.points_folder or folder_path, f"DEBUG_FULL_OCR_{self.sanitize_filename(fname)}.txt")
-                    with open(dbg, 'w', encoding='utf-8') as f:
-                        f.write(text)
-                    self.log_message(f"DEBUG OCR: {dbg}")
-                except Exception as e:
-                    self.log_message(f"DEBUG save error: {e}")
-            data = self.extract_data(text)
-            found = sum(1 for v in data.values() if v)
-            for k in ["Тип коммуникации", "Номер договора", "КГС", "Дата съемки"]:
-                if data.get(k):
-                    self.field_stats[k] += 1
-            status = "Успешно" if found == 4 else ("Частично" if found > 0 else "Не распознано")
-            points_status = "Нет точек"
-            points_count_str = "0/0"
-            if self.import_points and data.get("КГС"):
-                out_folder = self.points_folder or folder_path
-                if self.sort_points_by_comm:
-                    out_folder = self._comm_subfolder(out_folder, data.get("Тип коммуникации"))
-                points_status, points_count_str, _, _ = self.extract_and_save_coordinate_table(
-                    text, data["КГС"], out_folder, fname
-                )
-            if not self.ignore_excel and EXCEL_SUPPORTED and ws is not None:
-                ws.append([
-                    fname,
-                    data.get("Тип коммуникации", ""),
-                    data.get("Номер договора", ""),
-                    data.get("КГС", ""),
-                    data.get("Дата съемки", ""),
-                    points_count_str,
-                    status,
-                    points_status
-                ])
-                excel_created_or_updated = True
-            self.log_message(f"Готово: {status}; точки {points_count_str}; {points_status} ({index}/{total_files})")
-            processed += 1
-            if target_move_folder and target_move_folder != folder_path:
-                try:
-                    shutil.move(fpath, os.path.join(target_move_folder, fname))
-                    moved += 1
-                except Exception as e:
-                    self.log_message(f"Не переместил {fname}: {e}")
-        excel_saved = False
-        if not self.ignore_excel and EXCEL_SUPPORTED and excel_created_or_updated and wb is not None:
-            if ws is not None:
-                self.adjust_columns(ws)
-                if ws.max_row > 1:
+                processed += 1
+                if target_move_folder and target_move_folder != folder_path:
                     try:
-                        self.apply_standard_excel_style(ws, headers)
+                        shutil.move(os.path.join(folder_path, fname), os.path.join(target_move_folder, fname))
+                        moved += 1
                     except Exception as e:
-                        self.log_message(f"Не удалось применить стиль Excel: {e}")
+                        self.log_message(f"Не переместил {fname}: {e}")
+        except ProcessingCancelled:
+            cancelled = True
+            self.log_message("Отмена пользователем. Останавливаю обработку.")
+        except Exception as e:
+            error = e
+            self.log_message(f"Обработка прервана ошибкой: {e}")
+        finally:
+            if store is not None:
+                store.close()
+            for sink in sinks:
+                sink.close()
+            self.close_ocr_pool()
+        if not self.ignore_excel and EXCEL_SUPPORTED and excel_created_or_updated and (wb is not None or appender is not None):
             try:
-                wb.save(output_path)
+                self._save_registry(wb, ws, appender, headers, output_path, first_new_row)
                 self.log_message(f"Excel сохранен: {output_path}")
                 excel_saved = True
+                self._registry_saved(registry_index, registered, journal, output_path)
             except PermissionError:
                 error_msg = f"Не удалось сохранить Excel файл: {output_path}. Файл может быть открыт в Excel. Закройте файл и попробуйте снова."
                 messagebox.showerror("Ошибка сохранения", error_msg)
@@ -914,6 +3691,12 @@ class PDFProcessor:
                 error_msg = f"Не удалось сохранить Excel файл: {e}"
                 messagebox.showerror("Excel", error_msg)
                 self.log_message(f"Excel save error: {error_msg}")
+        if journal is not None:
+            journal.close()
+            if registered:
+                self.log_message("Несохранённые строки реестра остались в журнале и будут дописаны при следующем запуске")
+        if registry_index is not None:
+            registry_index.close()
         if self.problem_files:
             prob = os.path.join(folder_path, "проблемные_файлы.txt")
             try:
@@ -924,7 +3707,9 @@ class PDFProcessor:
                 self.log_message(f"Список проблем: {prob}")
             except Exception as e:
                 self.log_message(f"Не сохранил проблемные: {e}")
-        self.analyze_results(processed)
+        if error is not None:
+            raise error
+        self.analyze_results(documents)
         if moved:
             self.log_message(f"Перемещено: {moved}")
         if cancelled:
@@ -932,6 +3717,42 @@ class PDFProcessor:
         return output_path if (not self.ignore_excel and EXCEL_SUPPORTED and excel_saved) else None
 
 
+# ======================= ПАРАЛЛЕЛЬНАЯ ОБРАБОТКА =======================
+# Функции ниже выполняются в процессах-обработчиках (multiprocessing, spawn).
+
+_file_worker_state = {"processor": None, "fname": ""}
+
+
+def _init_file_worker(config, cancel_event, messages):
+    state = _file_worker_state
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    def log(message):
+        messages.put(("log", state["fname"], message))
+
+    def progress(**info):
+        messages.put(("progress", state["fname"], info))
+
+    processor = PDFProcessor(
+        log_callback=log,
+        progress_callback=progress,
+        cancel_event=cancel_event,
+        worker_mode=True,
+    )
+    processor.apply_worker_config(config)
+    state["processor"] = processor
+
+
+def _run_file_worker(folder_path, fname, index, total_files):
+    state = _file_worker_state
+    state["fname"] = fname
+    processor = state["processor"]
+    try:
+        return processor.process_file(folder_path, fname, index, total_files)
+    except ProcessingCancelled:
+        return {"ok": False, "cancelled": True}
+
+
 # ======================= УЛУЧШЕННЫЙ ИНТЕРФЕЙС =======================
 
 class ModernFileSelector(ttk.Frame):
@@ -1249,6 +4070,16 @@ class App(ttk.Frame):
         self.var_debug = tk.BooleanVar(value=False)
         self.var_ignore_excel = tk.BooleanVar(value=False)
         self.var_move = tk.BooleanVar(value=False)
+        self.var_workers = tk.IntVar(value=1)
+        self.var_ocr_workers = tk.IntVar(value=1)
+        self.var_text_cache = tk.BooleanVar(value=True)
+        self.var_lazy = tk.BooleanVar(value=False)
+        self.var_ocr_regions = tk.BooleanVar(value=False)
+        self.var_split = tk.BooleanVar(value=False)
+        self.var_prefilter = tk.BooleanVar(value=False)
+        self.var_points_store = tk.BooleanVar(value=False)
+        self.var_sinks = {name: tk.BooleanVar(value=False) for name in REGISTRY_SINKS}
+        self.processor_settings = {}
 
         self.selection_info_text = tk.StringVar(value="Выбрано: 0/0")
         self._tooltips = []
@@ -1282,6 +4113,7 @@ class App(ttk.Frame):
         self._build_bottom()
 
         self.processor = PDFProcessor(log_callback=self._append_log)
+        self.processor.apply_settings(self.processor_settings)
         self._update_selection_info()
         self.master.protocol("WM_DELETE_WINDOW", self.on_close)
 
@@ -1321,6 +4153,8 @@ class App(ttk.Frame):
         cb_import.pack(anchor="w")
         cb_sort_points = ttk.Checkbutton(rec, text="Разложить каталоги по типам", variable=self.var_sort_points)
         cb_sort_points.pack(anchor="w", padx=(18,0))
+        cb_points_store = ttk.Checkbutton(rec, text="Сводная база точек", variable=self.var_points_store, command=self._save_settings)
+        cb_points_store.pack(anchor="w", padx=(18,0))
         
         row_points = ttk.Frame(rec)
         row_points.pack(fill="x", pady=2)
@@ -1332,14 +4166,43 @@ class App(ttk.Frame):
 
         cb_debug = ttk.Checkbutton(rec, text="Режим отладки (сохранять OCR)", variable=self.var_debug)
         cb_debug.pack(anchor="w", pady=(4,0))
+        cb_lazy = ttk.Checkbutton(rec, text="Не распознавать страницы после найденных данных", variable=self.var_lazy, command=self._save_settings)
+        cb_lazy.pack(anchor="w")
+        cb_ocr_regions = ttk.Checkbutton(rec, text="OCR только шапки и каталога", variable=self.var_ocr_regions, command=self._save_settings)
+        cb_ocr_regions.pack(anchor="w")
+        cb_prefilter = ttk.Checkbutton(rec, text="Пропускать страницы без шапки и каталога", variable=self.var_prefilter, command=self._save_settings)
+        cb_prefilter.pack(anchor="w")
+        cb_split = ttk.Checkbutton(rec, text="Несколько КГС в одном PDF", variable=self.var_split, command=self._save_settings)
+        cb_split.pack(anchor="w")
 
         btn_types = ttk.Button(rec, text="Типы коммуникаций…", command=self.open_comm_types_dialog)
         btn_types.pack(anchor="w", pady=(6,0))
 
+        row_workers = ttk.Frame(rec)
+        row_workers.pack(fill="x", pady=(6,0))
+        ttk.Label(row_workers, text="Процессов:").pack(side="left")
+        spin_workers = ttk.Spinbox(row_workers, from_=1, to=32, width=4, textvariable=self.var_workers, command=self._save_settings)
+        spin_workers.pack(side="left", padx=6)
+        ttk.Label(row_workers, text="Потоков OCR:").pack(side="left", padx=(6,0))
+        spin_ocr_workers = ttk.Spinbox(row_workers, from_=1, to=32, width=4, textvariable=self.var_ocr_workers, command=self._save_settings)
+        spin_ocr_workers.pack(side="left", padx=6)
+
+        row_cache = ttk.Frame(rec)
+        row_cache.pack(fill="x", pady=(4,0))
+        cb_cache = ttk.Checkbutton(row_cache, text="Кэш распознанного текста", variable=self.var_text_cache, command=self._save_settings)
+        cb_cache.pack(side="left")
+        btn_clear_cache = ttk.Button(row_cache, text="Очистить кэш", command=self.clear_text_cache)
+        btn_clear_cache.pack(side="left", padx=(6,0))
+
         out = ttk.LabelFrame(right, text="После обработки")
         out.pack(fill="x")
         cb_ignore_excel = ttk.Checkbutton(out, text="Игнорировать запись в Excel", variable=self.var_ignore_excel)
         cb_ignore_excel.pack(anchor="w")
+        row_sinks = ttk.Frame(out)
+        row_sinks.pack(fill="x", pady=(4,0))
+        ttk.Label(row_sinks, text="Реестр также в:").pack(side="left")
+        for name, sink_cls in REGISTRY_SINKS.items():
+            ttk.Checkbutton(row_sinks, text=sink_cls.label, variable=self.var_sinks[name], command=self._save_settings).pack(side="left", padx=(6,0))
         cb_move = ttk.Checkbutton(out, text="Переместить обработанные файлы", variable=self.var_move, command=self._toggle_move)
         cb_move.pack(anchor="w", pady=(4,0))
         row_move = ttk.Frame(out)
@@ -1353,9 +4216,19 @@ class App(ttk.Frame):
         self._tooltips.extend([
             Tooltip(cb_import, "Ищет и сохраняет таблицу координат точек в TXT."),
             Tooltip(cb_sort_points, "Складывает каталоги координат по подпапкам типа коммуникации."),
+            Tooltip(cb_points_store, "Все каталоги дополнительно пишутся в points.sqlite в папке каталогов; в колонке «Пересечения» реестра — съёмки, с точками которых совпадают точки этой."),
             Tooltip(cb_debug, "Сохраняет полный распознанный OCR-текст для каждого PDF."),
+            Tooltip(cb_lazy, "Как только найдены все поля реестра и конец каталога координат, остальные страницы PDF не читаются и не распознаются."),
+            Tooltip(cb_ocr_regions, "Сначала страница распознаётся в низком разрешении, чтобы найти шапку с полями реестра и каталог координат; в полном разрешении распознаются только они. Если найти не удалось — страница распознаётся целиком."),
+            Tooltip(cb_prefilter, "Перед OCR страница без текстового слоя просматривается в низком разрешении; если на ней нет подписей полей реестра, заголовка каталога или строк с координатами, она не распознаётся."),
+            Tooltip(cb_split, "Сборный PDF делится на съёмки по подписи «№ КГС»: для каждой — своя строка реестра и свой каталог точек. Страницы читаются до конца файла."),
             Tooltip(btn_types, "Настройка ожидаемых типов коммуникаций."),
+            Tooltip(spin_workers, "Сколько PDF обрабатывать одновременно (отдельные процессы)."),
+            Tooltip(spin_ocr_workers, "Сколько сканированных страниц одного PDF распознавать одновременно."),
+            Tooltip(cb_cache, "Повторная обработка неизменённых PDF берёт текст страниц из кэша, без OCR."),
+            Tooltip(btn_clear_cache, "Удаляет сохранённый текст страниц (text_cache.sqlite)."),
             Tooltip(cb_ignore_excel, "Не записывает результаты в Excel, только лог/координаты."),
+            Tooltip(row_sinks, "Строки реестра дополнительно дописываются в Реестр_геодезических_съемок.csv / .jsonl / .sqlite по мере обработки файлов (в том числе при отключённом Excel)."),
             Tooltip(cb_move, "Перемещает обработанные PDF в указанную папку."),
         ])
 
@@ -1564,6 +4437,18 @@ class App(ttk.Frame):
             self.var_debug.set(bool(data.get("var_debug", False)))
             self.var_ignore_excel.set(bool(data.get("var_ignore_excel", False)))
             self.var_move.set(bool(data.get("var_move", False)))
+            self.var_workers.set(self._clamp_workers(data.get("var_workers", 1)))
+            self.var_ocr_workers.set(self._clamp_workers(data.get("var_ocr_workers", 1)))
+            self.var_text_cache.set(bool(data.get("var_text_cache", True)))
+            self.var_lazy.set(bool(data.get("var_lazy", False)))
+            self.var_ocr_regions.set(bool(data.get("var_ocr_regions", False)))
+            self.var_split.set(bool(data.get("var_split", False)))
+            self.var_prefilter.set(bool(data.get("var_prefilter", False)))
+            self.var_points_store.set(bool(data.get("var_points_store", False)))
+            sinks = data.get("var_output_sinks", [])
+            for name, var in self.var_sinks.items():
+                var.set(isinstance(sinks, list) and name in sinks)
+            self.processor_settings = {k: data[k] for k in PDFProcessor.SETTINGS_DEFAULTS if k in data}
             geometry = str(data.get("window_geometry", "") or "").strip()
             if geometry:
                 try:
@@ -1573,6 +4458,19 @@ class App(ttk.Frame):
         except Exception:
             pass
 
+    @staticmethod
+    def _clamp_workers(value):
+        try:
+            return max(1, min(int(value), 32))
+        except (TypeError, ValueError):
+            return 1
+
+    def _get_workers(self, var=None):
+        try:
+            return self._clamp_workers((var or self.var_workers).get())
+        except tk.TclError:
+            return 1
+
     def _save_settings(self):
         try:
             data = {
@@ -1584,13 +4482,30 @@ class App(ttk.Frame):
                 "var_debug": bool(self.var_debug.get()),
                 "var_ignore_excel": bool(self.var_ignore_excel.get()),
                 "var_move": bool(self.var_move.get()),
+                "var_workers": self._get_workers(),
+                "var_ocr_workers": self._get_workers(self.var_ocr_workers),
+                "var_text_cache": bool(self.var_text_cache.get()),
+                "var_lazy": bool(self.var_lazy.get()),
+                "var_ocr_regions": bool(self.var_ocr_regions.get()),
+                "var_split": bool(self.var_split.get()),
+                "var_prefilter": bool(self.var_prefilter.get()),
+                "var_points_store": bool(self.var_points_store.get()),
+                "var_output_sinks": [name for name, var in self.var_sinks.items() if var.get()],
                 "window_geometry": self.master.winfo_geometry(),
             }
+            processor = getattr(self, "processor", None)
+            data.update(processor.export_settings() if processor is not None else self.processor_settings)
             with open(self.settings_path, "w", encoding="utf-8") as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
         except Exception:
             pass
 
+    def clear_text_cache(self):
+        if str(self.btn_cancel.cget("state")) == "normal":
+            messagebox.showinfo("Кэш", "Дождитесь окончания обработки.")
+            return
+        self.processor.clear_text_cache()
+
     def on_close(self):
         self._save_settings()
         self.master.destroy()
@@ -1817,6 +4732,15 @@ class App(ttk.Frame):
         self.processor.debug_mode = self.var_debug.get()
         self.processor.ignore_excel = self.var_ignore_excel.get()
         self.processor.points_folder = self.points_folder.get().strip()
+        self.processor.workers = self._get_workers()
+        self.processor.ocr_workers = self._get_workers(self.var_ocr_workers)
+        self.processor.use_text_cache = self.var_text_cache.get()
+        self.processor.lazy_extraction = self.var_lazy.get()
+        self.processor.ocr_regions = self.var_ocr_regions.get()
+        self.processor.split_documents = self.var_split.get()
+        self.processor.ocr_prefilter = self.var_prefilter.get()
+        self.processor.use_points_store = self.var_points_store.get()
+        self.processor.output_sinks = [name for name, var in self.var_sinks.items() if var.get()]
 
         error_happened = False
         try:
@@ -1862,6 +4786,7 @@ class App(ttk.Frame):
 # ======================= ЗАПУСК =======================
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = App(root)
     app.pack(fill="both", expand=True)
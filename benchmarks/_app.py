@@ -0,0 +1,20 @@
+# Загрузка "KGS_Reader v6.py" как модуля (в имени файла пробел, обычный import не подходит)
+import importlib.util
+import os
+import sys
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "KGS_Reader v6.py")
+
+
+def load_app():
+    spec = importlib.util.spec_from_file_location("kgs_reader", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def quiet_processor(app, **kwargs):
+    processor = app.PDFProcessor(log_callback=lambda message: None, worker_mode=True, **kwargs)
+    processor.use_text_cache = False
+    return processor
@@ -0,0 +1,127 @@
+# Постобработка большого каталога координат (длинная линейная трасса): прежний способ
+# (строка-словарь на точку, замыкание на каждую строку) против обработки по столбцам.
+# Файлы каталога и _issues.txt должны совпасть.
+#
+#   python benchmarks/bench_catalog.py [--points N]
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+from _app import load_app, quiet_processor
+
+app = load_app()
+
+
+def catalog_text(points, seed=0):
+    r = random.Random(seed)
+    lines = ["КАТАЛОГ КООРДИНАТ", "№ точки X, м Y, м H, м"]
+    x, y = -12000.0, 25000.0
+    for i in range(1, points + 1):
+        x -= r.uniform(0.5, 3)
+        y += r.uniform(-2, 2)
+        xs = f"{x:.3f}" if r.random() > 0.001 else f"{-x:.3f}"  # потерянный минус
+        h = f"{r.uniform(120, 160):.2f}" if r.random() > 0.001 else str(r.randint(12000, 15999))
+        row = f"{i} {xs} {y:.3f} {h}" if r.random() > 0.0005 else f"{i} {xs}"
+        lines.append(row + (" колодец" if i % 50 == 0 else ""))
+    return "\n".join(lines) + "\n"
+
+
+def legacy_save(catalog, fname, issues_name):
+    raw_rows = [
+        {"pid": p, "x": x, "y": y, "h": h, "d": d}
+        for p, x, y, h, d in zip(catalog.pids, catalog.xs, catalog.ys, catalog.hs, catalog.descs)
+    ]
+    as_float = app.as_float
+    issues = []
+    xs = [as_float(r["x"]) for r in raw_rows if r["x"]]
+    ys = [as_float(r["y"]) for r in raw_rows if r["y"]]
+
+    def majority_negative(values):
+        vs = [v for v in values if v is not None]
+        if not vs: return False
+        return sum(1 for v in vs if v < 0) > sum(1 for v in vs if v > 0)
+
+    x_should_be_negative = majority_negative(xs)
+    y_should_be_negative = majority_negative(ys)
+    fixed_rows = []
+    for r in raw_rows:
+        pid, x_s, y_s, h_s, d = r["pid"], r["x"], r["y"], r["h"], r["d"]
+        x, y, h = as_float(x_s), as_float(y_s), as_float(h_s)
+        notes = []
+        if x is None or y is None:
+            notes.append("неполная строка (нет X или Y)")
+
+        def maybe_fix_sign(val, s, should_neg, label):
+            if val is None:
+                return val, s, False
+            if should_neg and val > 0 and abs(val) > 500:
+                notes.append(f"возможен потерянный минус у {label} -> исправил")
+                return -val, "-" + s if not s.startswith("-") else s, True
+            return val, s, False
+
+        x, x_s, _ = maybe_fix_sign(x, x_s, x_should_be_negative, "X")
+        y, y_s, _ = maybe_fix_sign(y, y_s, y_should_be_negative, "Y")
+        if h is not None and h > 500 and re.fullmatch(r"\d{4,6}", h_s or ""):
+            h_s_fixed = h_s[:-2] + "." + h_s[-2:]
+            h_fixed = as_float(h_s_fixed)
+            if h_fixed is not None and 0 < h_fixed < 500:
+                notes.append(f"высота без точки ({h_s}) -> {h_s_fixed}")
+                h, h_s = h_fixed, h_s_fixed
+        if ("неполная строка" in " ".join(notes)) or x is None or y is None:
+            issues.append(f"{pid}\t{x_s or ''}\t{y_s or ''}\t{h_s or ''}\t{d}    <-- ПРОБЛЕМА: {', '.join(notes) or 'не удалось распарсить'}")
+        fixed_rows.append((pid, x_s or "", y_s or "", h_s or "", d))
+    with open(fname, 'w', encoding='utf-8') as f:
+        for pid, x_s, y_s, h_s, d in fixed_rows:
+            if x_s and y_s:
+                f.write(f"{pid}\t{x_s}\t{y_s}\t{h_s}\t{d}\n")
+    if issues:
+        with open(issues_name, 'w', encoding='utf-8') as f:
+            f.write("Строки с подозрениями/ошибками (после грубых автоправок):\n")
+            for it in issues:
+                f.write(it + "\n")
+
+
+def read(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=100000)
+    args = parser.parse_args()
+    processor = quiet_processor(app)
+    text = catalog_text(args.points)
+
+    start = time.perf_counter()
+    catalog = app.CoordinateCatalogParser()
+    catalog.feed(app.NormalizedText(text))
+    parse_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir, current_dir = os.path.join(tmp, "legacy"), os.path.join(tmp, "current")
+        os.makedirs(legacy_dir)
+        start = time.perf_counter()
+        legacy_save(catalog, os.path.join(legacy_dir, "K.txt"), os.path.join(legacy_dir, "K_issues.txt"))
+        legacy_s = time.perf_counter() - start
+        start = time.perf_counter()
+        processor.save_coordinate_table(catalog, "K", current_dir, "bench.pdf")
+        current_s = time.perf_counter() - start
+        same = all(
+            read(os.path.join(legacy_dir, name)) == read(os.path.join(current_dir, name))
+            for name in ("K.txt", "K_issues.txt")
+        )
+
+    print(f"Точек: {len(catalog.pids)}, разбор текста: {parse_s * 1000:.0f} мс")
+    print(f"Постобработка построчно: {legacy_s * 1000:.0f} мс")
+    print(f"Постобработка по столбцам: {current_s * 1000:.0f} мс (x{legacy_s / current_s:.2f})")
+    print(f"Файлы совпадают: {'да' if same else 'НЕТ'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Проверка текста OCR числового каталога (validate_catalog_ocr): при распознавании только
+# цифр OCR часто теряет пробел между столбцами, и строка уходит в медленный нечёткий разбор
+# с неверными значениями. Сравнивается разбор текста как есть и после проверки.
+#
+#   python benchmarks/bench_catalog_ocr.py [--points N] [--glued 0.15]
+import argparse
+import random
+import time
+
+from _app import load_app
+
+app = load_app()
+
+HEADER = "КАТАЛОГ КООРДИНАТ\n№ точки X, м Y, м H, м\n"
+
+
+def ocr_catalog(points, glued, seed=0):
+    # (текст области каталога после OCR с whitelist, верные строки)
+    r = random.Random(seed)
+    lines, truth = [], []
+    for i in range(1, points + 1):
+        x, y, h = f"{r.uniform(10000, 99999):.2f}", f"{r.uniform(10000, 99999):.2f}", f"{r.uniform(120, 160):.2f}"
+        truth.append((str(i), x, y, h))
+        cells = [str(i), x, y, h]
+        if r.random() < glued:
+            k = r.randint(1, 2)
+            cells[k:k + 2] = [cells[k] + cells[k + 1]]
+        lines.append(" ".join(cells))
+    return "\n".join(lines) + "\n", truth
+
+
+def parse(text):
+    catalog = app.CoordinateCatalogParser()
+    catalog.feed(app.NormalizedText(HEADER + text))
+    return list(zip(catalog.pids, catalog.xs, catalog.ys, catalog.hs))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--glued", type=float, default=0.15)
+    args = parser.parse_args()
+    text, truth = ocr_catalog(args.points, args.glued)
+
+    start = time.perf_counter()
+    raw = parse(text)
+    raw_s = time.perf_counter() - start
+    start = time.perf_counter()
+    validated_text, valid = app.validate_catalog_ocr(text)
+    validated = parse(validated_text)
+    validated_s = time.perf_counter() - start
+
+    def fuzzy(t):
+        return sum(1 for line in t.splitlines() if not app.CATALOG_ROW_RE.match(line))
+
+    def correct(rows):
+        return sum(1 for a, b in zip(rows, truth) if a == b)
+
+    print(f"Точек: {args.points}, строк со склеенными числами: {fuzzy(text)}")
+    print(f"Как есть: {raw_s * 1000:.0f} мс, нечёткий разбор строк: {fuzzy(text)}, верных строк: {correct(raw)}")
+    print(
+        f"После проверки: {validated_s * 1000:.0f} мс, нечёткий разбор строк: {fuzzy(validated_text)}, "
+        f"верных строк: {correct(validated)} (доля строк каталога {valid:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
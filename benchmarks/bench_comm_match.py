@@ -0,0 +1,76 @@
+# Нечёткий поиск типа коммуникации по фразам текста: полный перебор «фраза × тип»
+# через similarity() против индекса CommunicationTypeIndex. Результаты должны совпадать.
+#
+#   python benchmarks/bench_comm_match.py [--docs N]
+import argparse
+import random
+import time
+
+from _app import load_app, quiet_processor
+from corpus import TYPES, make_document
+
+app = load_app()
+
+
+def legacy_score(processor, text, allowed, best_score=0.6):
+    best_match = None
+    phrases = list(app.communication_phrases(text))
+    for phrase in phrases:
+        for comm_type in allowed:
+            score = processor.similarity(phrase.lower(), comm_type.lower())
+            if score > best_score:
+                best_score = score
+                best_match = comm_type
+    return best_match, best_score
+
+
+def ocr_noise(r, words):
+    # Слова типов и шума с заменами букв, как после OCR
+    out = []
+    for _ in range(r.randint(200, 600)):
+        word = r.choice(words)
+        if r.random() < 0.2 and len(word) > 2:
+            k = r.randrange(len(word))
+            word = word[:k] + r.choice("аеоилнр1") + word[k + 1:]
+        out.append(word)
+        if r.random() < 0.1:
+            out.append("\n")
+    return " ".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200)
+    args = parser.parse_args()
+    processor = quiet_processor(app)
+    allowed = processor.get_allowed_comm_types()
+    words = [w for t in TYPES + allowed for w in t.split()] + ["труба", "колодец", "ООО", "лист", "съемка"]
+    texts = []
+    for seed in range(args.docs):
+        r = random.Random(seed)
+        pages = make_document(seed)
+        texts.append(app.normalize_text("".join(page + "\n" for page in pages) + ocr_noise(r, words)))
+
+    start = time.perf_counter()
+    legacy = [legacy_score(processor, text, allowed) for text in texts]
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    current = [processor.score_communication_phrases(text, allowed) for text in texts]
+    current_s = time.perf_counter() - start
+
+    values = [w for t in TYPES for w in [t, t.lower(), t + " связи", "сети " + t]] + allowed
+    normalize_mismatches = sum(
+        1 for v in values
+        if processor.normalize_communication_type(v, allowed)
+        != next((ct for ct in allowed if processor.similarity(v.strip().lower(), ct.lower()) > 0.9), None)
+        and not any(p.search(v.strip()) for p, _ in processor.get_field_rules().synonyms)
+    )
+    mismatches = sum(1 for a, b in zip(legacy, current) if a != b)
+    print(f"Документов: {args.docs}, типов: {len(allowed)}")
+    print(f"Полный перебор: {legacy_s / args.docs * 1000:.2f} мс/док.")
+    print(f"Индекс типов: {current_s / args.docs * 1000:.2f} мс/док. (x{legacy_s / current_s:.2f})")
+    print(f"Расхождений в результатах: {mismatches + normalize_mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Время извлечения полей реестра на документ: прежний способ (re.search по строке каждого
+# шаблона по всему тексту, таблица синонимов при каждом вызове) против правил
+# field_rules.json, скомпилированных один раз, с общим предфильтром на поле.
+#
+#   python benchmarks/bench_field_extraction.py [--docs N]
+import argparse
+import re
+import time
+
+from _app import load_app, quiet_processor
+from corpus import make_document
+
+app = load_app()
+
+
+def legacy_extract(processor, text, allowed):
+    # Как до field_rules.json: строки шаблонов и синонимов, поиск по всему тексту
+    spec = app.DEFAULT_FIELD_RULES
+
+    def normalize(value):
+        value = value.strip()
+        for item in list(spec["communication_synonyms"]):
+            if re.search(item["pattern"], value, re.IGNORECASE):
+                if not allowed or item["type"] in allowed:
+                    return item["type"]
+        for comm_type in allowed:
+            if processor.similarity(value.lower(), comm_type.lower()) > 0.9:
+                return comm_type
+        return None
+
+    value_functions = {
+        "match": app._match_value,
+        "contract": processor._contract_value,
+        "kgs": processor._kgs_value,
+        "communication": lambda m: normalize(app._match_value(m)),
+    }
+    data = {}
+    for field in spec["fields"]:
+        patterns = list(field["patterns"])
+        if field.get("allowed_types"):
+            patterns += [rf"{re.escape(ct)}\b" for ct in allowed if ct]
+        value = None
+        for pattern in patterns:
+            m = re.search(pattern, text, re.IGNORECASE)
+            if m:
+                value = value_functions[field["value"]](m)
+                if value is not None:
+                    break
+        data[field["name"]] = value
+    if not data["Тип коммуникации"]:
+        data["Тип коммуникации"] = processor.score_communication_phrases(app.normalize_text(text), allowed)[0]
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=300)
+    args = parser.parse_args()
+    processor = quiet_processor(app)
+    allowed = processor.get_allowed_comm_types()
+    texts = ["".join(page + "\n" for page in make_document(seed)) for seed in range(args.docs)]
+
+    start = time.perf_counter()
+    legacy = [legacy_extract(processor, text, allowed) for text in texts]
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    current = [processor.extract_data(text) for text in texts]
+    current_s = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, current) if a != b)
+    print(f"Документов: {args.docs}")
+    print(f"Прежний способ: {legacy_s / args.docs * 1000:.2f} мс/док.")
+    print(f"Правила field_rules.json: {current_s / args.docs * 1000:.2f} мс/док. (x{legacy_s / current_s:.2f})")
+    print(f"Расхождений в результатах: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
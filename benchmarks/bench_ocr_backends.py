@@ -0,0 +1,59 @@
+# Сравнение OCR-движков на небольших изображениях (например, области шапки), где
+# запуск отдельного процесса tesseract на каждую страницу заметнее самого распознавания.
+#
+#   python benchmarks/bench_ocr_backends.py [--pages N] [--size 1200x400]
+#
+# Недоступные движки (нет tesseract или tesserocr) пропускаются; fake доступен всегда.
+import argparse
+import time
+
+from _app import load_app, quiet_processor
+
+app = load_app()
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+
+
+def sample_image(width, height, seed):
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    draw.text((20, 20), f"Dogovor No 12/{seed:05d}-7  KGS 1234-{seed % 100:02d}", fill=0)
+    draw.text((20, 60), f"Data s'emki 0{seed % 9 + 1}.03.2024", fill=0)
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--size", default="1200x400")
+    args = parser.parse_args()
+    if Image is None:
+        print("Pillow не установлен — бенчмарк пропущен")
+        return
+    width, height = (int(v) for v in args.size.split("x"))
+    images = [sample_image(width, height, i) for i in range(args.pages)]
+    for name in app.OCR_BACKENDS:
+        processor = quiet_processor(app)
+        processor.ocr_backend = name
+        backend = processor.get_ocr_backend()
+        if backend is None or backend.name != name:
+            print(f"{name}: недоступен")
+            continue
+        try:
+            processor.ocr_image(images[0], 300)  # загрузка traineddata не входит в замер
+        except Exception as e:
+            print(f"{name}: недоступен ({e})")
+            continue
+        start = time.perf_counter()
+        for image in images:
+            processor.ocr_image(image, 300)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed / len(images) * 1000:.1f} мс/стр. ({len(images)} стр. {width}x{height})")
+        processor.close_ocr_backend()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Предварительный отбор страниц перед OCR: сканированный PDF, где шапка и каталог только
+# на нескольких страницах. Без отбора распознаются все страницы, с отбором — только
+# нужные (остальные — только уменьшенный рендер). Время OCR имитирует движок,
+# которому нужно время пропорционально числу пикселей.
+#
+#   python benchmarks/bench_ocr_prefilter.py [--pages N] [--relevant K] [--workers W]
+import argparse
+import os
+import tempfile
+import time
+
+from _app import load_app, quiet_processor
+
+app = load_app()
+
+
+class ScriptedOcrBackend(app.OcrBackend):
+    # Страница с тёмным квадратом в левом верхнем углу «содержит» шапку и каталог
+    name = "scripted"
+    seconds_per_megapixel = 0.05
+
+    def image_to_data(self, img, dpi, psm=3, whitelist=None):
+        width, height = img.size
+        time.sleep(width * height / 1e6 * self.seconds_per_megapixel)
+        if img.getpixel((width // 100, height // 100)) < 128:
+            lines = [["Каталог", "координат"], ["№", "КГС:", "1234-22"]] + [
+                [str(i), f"{1000 + i}.25", f"{2000 + i}.50"] for i in range(1, 6)
+            ]
+        else:
+            lines = [["Пояснительная", "записка"], ["Лист", "2"]]
+        data = {key: [] for key in ("block_num", "par_num", "line_num", "left", "top", "width", "height", "conf", "text")}
+        for n, words in enumerate(lines):
+            for k, word in enumerate(words):
+                data["block_num"].append(1)
+                data["par_num"].append(1)
+                data["line_num"].append(n + 1)
+                data["left"].append(10 + k * 60)
+                data["top"].append(10 + n * 20)
+                data["width"].append(50)
+                data["height"].append(14)
+                data["conf"].append(95.0)
+                data["text"].append(word)
+        return data
+
+
+app.OCR_BACKENDS[ScriptedOcrBackend.name] = ScriptedOcrBackend
+
+
+def make_pdf(path, pages, relevant):
+    doc = app.fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        if i in relevant:
+            page.draw_rect(app.fitz.Rect(0, 0, 60, 60), color=(0, 0, 0), fill=(0, 0, 0))
+        page.draw_rect(app.fitz.Rect(100, 300, 400, 320), color=(0.5, 0.5, 0.5), fill=(0.5, 0.5, 0.5))
+    doc.save(path)
+
+
+def run(path, prefilter, workers):
+    processor = quiet_processor(app)
+    processor.ocr_backend = ScriptedOcrBackend.name
+    processor.ocr_prefilter = prefilter
+    processor.ocr_workers = workers
+    start = time.perf_counter()
+    texts = [page.text for page in processor.iter_pages(path)]
+    return time.perf_counter() - start, texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--relevant", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    if app.fitz is None or app.Image is None:
+        print("PyMuPDF или Pillow не установлены — бенчмарк пропущен")
+        return
+    relevant = set(range(0, args.pages, max(1, args.pages // max(1, args.relevant)))[:args.relevant])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan.pdf")
+        make_pdf(path, args.pages, relevant)
+        full_s, full = run(path, False, args.workers)
+        filtered_s, filtered = run(path, True, args.workers)
+    same = all(filtered[i] == full[i] for i in relevant)
+    kept = [i for i, text in enumerate(filtered) if text]
+    print(f"Страниц: {args.pages}, с шапкой/каталогом: {len(relevant)}, потоков OCR: {args.workers}")
+    print(f"OCR всех страниц: {full_s:.2f} с")
+    print(f"С предварительным отбором: {filtered_s:.2f} с (x{full_s / filtered_s:.1f})")
+    print(f"Распознаны нужные страницы: {'да' if kept == sorted(relevant) and same else 'НЕТ'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Микробенчмарк предобработки страницы перед OCR: прежняя цепочка ImageEnhance по RGB
+# против текущей enhance_image (полутоновое изображение, таблицы и одно ядро свёртки).
+#
+#   python benchmarks/bench_ocr_preprocess.py [file.pdf] [--repeat N]
+#
+# Без PDF используется синтетический лист с текстом и шумом. С PDF дополнительно
+# сравнивается рендеринг первой страницы в RGB и сразу в оттенках серого.
+import argparse
+import random
+import time
+
+from _app import load_app, quiet_processor
+
+app = load_app()
+
+try:
+    from PIL import Image, ImageChops, ImageDraw, ImageEnhance, ImageFilter
+except ImportError:
+    Image = None
+
+
+def legacy_enhance(image):
+    image = ImageEnhance.Contrast(image).enhance(2.0)
+    image = ImageEnhance.Sharpness(image).enhance(2.0)
+    image = image.convert('L')
+    image = image.filter(ImageFilter.MedianFilter(size=3))
+    image = image.point(lambda x: 0 if x < 140 else 255)
+    return image
+
+
+def synthetic_page(width=3508, height=2480, seed=1):
+    # A4 при 300 dpi: серый фон, строки «текста», линии таблицы и шум
+    rnd = random.Random(seed)
+    image = Image.new("RGB", (width, height), (235, 232, 225))
+    draw = ImageDraw.Draw(image)
+    for y in range(100, height - 100, 40):
+        x = 100
+        while x < width - 300:
+            w = rnd.randint(20, 160)
+            shade = rnd.randint(10, 90)
+            draw.rectangle([x, y, x + w, y + 18], fill=(shade, shade, shade + 10))
+            x += w + rnd.randint(15, 40)
+    for x in range(100, width, 400):
+        draw.line([x, 100, x, height - 100], fill=(40, 40, 40), width=3)
+    for _ in range(width * height // 200):
+        gray = rnd.randint(0, 255)
+        draw.point((rnd.randrange(width), rnd.randrange(height)), fill=(gray, gray, gray))
+    return image
+
+
+def best_time(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def diff_ratio(a, b):
+    # доля различающихся пикселей бинарных изображений
+    hist = ImageChops.difference(a, b).histogram()
+    return 1.0 - hist[0] / float(a.size[0] * a.size[1])
+
+
+def report(name, legacy_s, current_s, megapixels):
+    print(f"{name}: прежняя {legacy_s / megapixels * 1000:.1f} мс/Мп, "
+          f"текущая {current_s / megapixels * 1000:.1f} мс/Мп, ускорение x{legacy_s / current_s:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdf", nargs="?")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if not app.OCR_SUPPORTED or Image is None:
+        print("Pillow и pytesseract не установлены — бенчмарк пропущен")
+        return
+    processor = quiet_processor(app)
+
+    rgb = synthetic_page()
+    gray = rgb.convert("L")
+    megapixels = rgb.size[0] * rgb.size[1] / 1e6
+    legacy_s, legacy_img = best_time(lambda: legacy_enhance(rgb), args.repeat)
+    current_s, current_img = best_time(lambda: processor.enhance_image(gray), args.repeat)
+    print(f"Синтетический лист {rgb.size[0]}x{rgb.size[1]} ({megapixels:.1f} Мп)")
+    report("Предобработка", legacy_s, current_s, megapixels)
+    print(f"Различающихся пикселей: {diff_ratio(legacy_img, current_img) * 100:.3f}%")
+
+    if not args.pdf:
+        return
+    if app.fitz is None:
+        print("PyMuPDF не установлен — сравнение рендеринга пропущено")
+        return
+    doc = app.fitz.open(args.pdf)
+    try:
+        page = doc[0]
+
+        def legacy_render():
+            pix = page.get_pixmap(dpi=300)
+            return legacy_enhance(Image.frombytes("RGB", [pix.width, pix.height], pix.samples))
+
+        legacy_s, legacy_img = best_time(legacy_render, args.repeat)
+        current_s, current_img = best_time(
+            lambda: processor.enhance_image(processor.render_page_for_ocr(page, 300)), args.repeat)
+        megapixels = legacy_img.size[0] * legacy_img.size[1] / 1e6
+        print(f"{args.pdf}, стр. 1 при 300 dpi ({megapixels:.1f} Мп)")
+        report("Рендеринг + предобработка", legacy_s, current_s, megapixels)
+        print(f"Различающихся пикселей: {diff_ratio(legacy_img, current_img) * 100:.3f}%")
+    finally:
+        doc.close()
+
+
+if __name__ == "__main__":
+    main()
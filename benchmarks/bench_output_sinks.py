@@ -0,0 +1,80 @@
+# Вывод реестра: запись строк по одному файлу (с записью на диск после каждого) в CSV,
+# JSONL и SQLite против сохранения xlsx через openpyxl, и чтение результата обратно.
+# Прочитанные строки всех форматов должны совпасть.
+#
+#   python benchmarks/bench_output_sinks.py [--rows N]
+import argparse
+import csv
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from _app import load_app, quiet_processor
+
+app = load_app()
+
+from bench_registry_append import registry_row  # noqa: E402
+
+
+def write_xlsx(path, rows, processor):
+    wb = app.Workbook()
+    ws = wb.active
+    ws.title = "Геодезия"
+    ws.append(list(app.REGISTRY_HEADERS))
+    for row in rows:
+        ws.append(row)
+    processor.adjust_columns(ws)
+    processor.apply_standard_excel_style(ws, list(app.REGISTRY_HEADERS))
+    wb.save(path)
+
+
+def write_sink(sink_cls, path, rows):
+    sink = sink_cls(path, app.REGISTRY_HEADERS)
+    for row in rows:
+        sink.write([row])
+    sink.close()
+
+
+READERS = {
+    "xlsx": lambda path: [[("" if v is None else v) for v in row]
+                          for row in app.load_workbook(path, read_only=True).active.iter_rows(min_row=2, values_only=True)],
+    "csv": lambda path: list(csv.reader(open(path, encoding="utf-8-sig", newline="")))[1:],
+    "jsonl": lambda path: [list(json.loads(line).values()) for line in open(path, encoding="utf-8")],
+    "sqlite": lambda path: [list(row) for row in sqlite3.connect(path).execute("SELECT * FROM registry ORDER BY rowid")],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+    if not app.EXCEL_SUPPORTED:
+        print("openpyxl не установлен — бенчмарк пропущен")
+        return
+    processor = quiet_processor(app)
+    r = random.Random(0)
+    rows = [registry_row(r, i) for i in range(args.rows)]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("xlsx", *app.REGISTRY_SINKS):
+            path = os.path.join(tmp, "registry." + name)
+            start = time.perf_counter()
+            if name == "xlsx":
+                write_xlsx(path, rows, processor)
+            else:
+                write_sink(app.REGISTRY_SINKS[name], path, rows)
+            write_s = time.perf_counter() - start
+            start = time.perf_counter()
+            back = READERS[name](path)
+            read_s = time.perf_counter() - start
+            results[name] = (write_s, read_s, back == rows)
+    print(f"Строк реестра: {args.rows} (запись по одному файлу)")
+    for name, (write_s, read_s, same) in results.items():
+        print(f"{name:>6}: запись {write_s:.2f} с, чтение {read_s:.2f} с, строки совпадают: {'да' if same else 'НЕТ'}")
+
+
+if __name__ == "__main__":
+    main()
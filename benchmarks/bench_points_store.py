@@ -0,0 +1,99 @@
+# Сводная база точек: поиск совпадающих точек других съёмок и запросы по прямоугольнику
+# и радиусу через сеточный индекс PointsStore против перебора всех каталогов (как при
+# чтении всех <КГС>.txt). Результаты должны совпасть.
+#
+#   python benchmarks/bench_points_store.py [--surveys N]
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from _app import load_app
+
+app = load_app()
+
+
+def make_surveys(count, seed=0):
+    # Линейные трассы по району 20×20 км; часть съёмок повторяет точки предыдущих
+    r = random.Random(seed)
+    surveys = {}
+    for k in range(count):
+        kgs = f"{1000 + k}-22"
+        if surveys and r.random() < 0.2:
+            base = r.choice(list(surveys.values()))
+            start = r.randrange(len(base))
+            points = [(f"{i + 1}", x + r.uniform(-0.1, 0.1), y + r.uniform(-0.1, 0.1), h)
+                      for i, (_, x, y, h) in enumerate(base[start:start + r.randint(5, 40)])]
+        else:
+            points = []
+        x, y = r.uniform(-20000, 0), r.uniform(0, 20000)
+        dx, dy = r.uniform(-3, 3), r.uniform(-3, 3)
+        for i in range(len(points), r.randint(50, 400)):
+            x += dx + r.uniform(-0.5, 0.5)
+            y += dy + r.uniform(-0.5, 0.5)
+            points.append((f"{i + 1}", x, y, r.uniform(120, 160)))
+        surveys[kgs] = points
+    return surveys
+
+
+def brute_duplicates(surveys, kgs, tolerance):
+    counts = {}
+    t2 = tolerance * tolerance
+    own = surveys[kgs]
+    for other, points in surveys.items():
+        if other == kgs:
+            continue
+        n = sum(1 for _, x, y, _ in own if any((ox - x) ** 2 + (oy - y) ** 2 <= t2 for _, ox, oy, _ in points))
+        if n:
+            counts[other] = n
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--surveys", type=int, default=300)
+    parser.add_argument("--checks", type=int, default=10)
+    args = parser.parse_args()
+    surveys = make_surveys(args.surveys)
+    total = sum(map(len, surveys.values()))
+    r = random.Random(1)
+    checked = r.sample(list(surveys), min(args.checks, len(surveys)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = app.PointsStore(os.path.join(tmp, "points.sqlite"))
+        start = time.perf_counter()
+        for kgs, points in surveys.items():
+            store.add_survey(kgs, "bench.pdf", points)
+        add_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed = [store.duplicates(kgs, 0.5) for kgs in checked]
+        indexed_s = time.perf_counter() - start
+        start = time.perf_counter()
+        brute = [brute_duplicates(surveys, kgs, 0.5) for kgs in checked]
+        brute_s = time.perf_counter() - start
+
+        queries = [(r.uniform(-20000, 0), r.uniform(0, 20000), r.uniform(50, 500)) for _ in range(200)]
+        start = time.perf_counter()
+        found = [sorted(row[:2] for row in store.radius(x, y, radius)) for x, y, radius in queries]
+        radius_s = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = [
+            sorted((kgs, pid) for kgs, points in surveys.items()
+                   for pid, px, py, _ in points if (px - x) ** 2 + (py - y) ** 2 <= radius * radius)
+            for x, y, radius in queries
+        ]
+        scan_s = time.perf_counter() - start
+        store.close()
+
+    mismatches = sum(a != b for a, b in zip(indexed, brute)) + sum(a != b for a, b in zip(found, expected))
+    print(f"Съёмок: {len(surveys)}, точек: {total}; запись в базу: {add_s * 1000:.0f} мс")
+    print(f"Совпадающие точки, перебор: {brute_s / len(checked) * 1000:.1f} мс/съёмку")
+    print(f"Совпадающие точки, сетка: {indexed_s / len(checked) * 1000:.1f} мс/съёмку (x{brute_s / indexed_s:.1f})")
+    print(f"Запрос по радиусу, перебор: {scan_s / len(queries) * 1000:.2f} мс; сетка: {radius_s / len(queries) * 1000:.2f} мс")
+    print(f"Расхождений: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Дозапись строк в большой реестр xlsx: прежний способ (load_workbook, append, ширины и
+# стиль всех ячеек, save) против RegistryAppender, который меняет только XML листа.
+# Значения всех строк и стиль новых строк должны совпасть.
+#
+#   python benchmarks/bench_registry_append.py [--rows N] [--new K]
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from _app import load_app, quiet_processor
+
+app = load_app()
+
+
+def registry_row(r, i):
+    return [
+        f"scan_{i:06d}.pdf", r.choice(["Водопровод", "Канализация", "Газопровод", "Теплосеть"]),
+        f"{r.randint(1, 99)}/{r.randint(10000, 99999)}-{r.randint(1, 9)}", f"{r.randint(1000, 9999)}-{r.randint(10, 24)}",
+        f"{r.randint(1, 28):02d}.{r.randint(1, 12):02d}.20{r.randint(10, 24)}", f"{r.randint(5, 400)}/{r.randint(5, 400)}",
+        "Успешно", "Точки сохранены", "",
+    ]
+
+
+def make_registry(path, rows, processor):
+    r = random.Random(0)
+    wb = app.Workbook()
+    ws = wb.active
+    ws.title = "Геодезия"
+    ws.append(list(app.REGISTRY_HEADERS))
+    for i in range(rows):
+        ws.append(registry_row(r, i))
+    processor.adjust_columns(ws)
+    processor.apply_standard_excel_style(ws, list(app.REGISTRY_HEADERS))
+    wb.save(path)
+
+
+def legacy_append(path, new_rows, processor):
+    wb = app.load_workbook(path)
+    ws = wb.active
+    for row in new_rows:
+        ws.append(row)
+    processor.adjust_columns(ws)
+    processor.apply_standard_excel_style(ws, list(app.REGISTRY_HEADERS))
+    wb.save(path)
+
+
+def appender_append(path, new_rows):
+    appender = app.RegistryAppender(path)
+    for row in new_rows:
+        appender.append(row)
+    appender.save()
+
+
+def cell_style(cell):
+    return (cell.font.b, cell.font.sz, cell.border.left.style, cell.alignment.horizontal, cell.number_format)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--new", type=int, default=20)
+    args = parser.parse_args()
+    if not app.EXCEL_SUPPORTED:
+        print("openpyxl не установлен — бенчмарк пропущен")
+        return
+    processor = quiet_processor(app)
+    r = random.Random(1)
+    new_rows = [registry_row(r, args.rows + i) for i in range(args.new)]
+    new_rows[-1][6] = "Успешно (стр. 1–2); каталог на отдельных листах приложения"  # шире колонки «Статус»
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "base.xlsx")
+        make_registry(base, args.rows, processor)
+        legacy, current = os.path.join(tmp, "legacy.xlsx"), os.path.join(tmp, "current.xlsx")
+        shutil.copy(base, legacy)
+        shutil.copy(base, current)
+
+        start = time.perf_counter()
+        legacy_append(legacy, new_rows, processor)
+        legacy_s = time.perf_counter() - start
+        start = time.perf_counter()
+        appender_append(current, new_rows)
+        current_s = time.perf_counter() - start
+
+        a, b = app.load_workbook(legacy).active, app.load_workbook(current).active
+        values = [[c if c is not None else "" for c in row] for row in a.iter_rows(values_only=True)]
+        same_values = values == [[c if c is not None else "" for c in row] for row in b.iter_rows(values_only=True)]
+        last = b.max_row
+        same_style = all(cell_style(b.cell(last, c)) == cell_style(a.cell(last, c)) for c in range(1, len(app.REGISTRY_HEADERS) + 1))
+        same_widths = {k: d.width for k, d in a.column_dimensions.items()} == {k: d.width for k, d in b.column_dimensions.items()}
+        size = os.path.getsize(base) / 1e6
+
+    print(f"Реестр: {args.rows} строк ({size:.1f} МБ), новых строк: {args.new}")
+    print(f"load_workbook + стиль всех ячеек + save: {legacy_s:.2f} с")
+    print(f"RegistryAppender: {current_s:.2f} с (x{legacy_s / current_s:.1f})")
+    print(f"Значения совпадают: {'да' if same_values else 'НЕТ'}; стиль новых строк: {'да' if same_style else 'НЕТ'}; "
+          f"ширины колонок: {'да' if same_widths else 'НЕТ'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Проверка «файл уже в реестре» перед обработкой пакета: прежний способ (load_workbook и
+# перебор колонки A всего листа) против индекса реестра в SQLite (RegistryIndex).
+# Множества пропускаемых файлов должны совпасть.
+#
+#   python benchmarks/bench_registry_index.py [--rows N] [--batch K]
+import argparse
+import os
+import tempfile
+import time
+
+from _app import load_app, quiet_processor
+
+app = load_app()
+
+from bench_registry_append import make_registry  # noqa: E402
+
+
+def legacy_existing(path):
+    ws = app.load_workbook(path).active
+    return {row[0] for row in ws.iter_rows(min_row=2, values_only=True) if row and row[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--batch", type=int, default=200)
+    args = parser.parse_args()
+    if not app.EXCEL_SUPPORTED:
+        print("openpyxl не установлен — бенчмарк пропущен")
+        return
+    processor = quiet_processor(app)
+    # половина пакета уже в реестре
+    batch = [f"scan_{i:06d}.pdf" for i in range(args.rows - args.batch // 2, args.rows + args.batch - args.batch // 2)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "registry.xlsx")
+        make_registry(path, args.rows, processor)
+
+        start = time.perf_counter()
+        existing = legacy_existing(path)
+        legacy = [name for name in batch if name in existing]
+        legacy_s = time.perf_counter() - start
+
+        index = processor.open_registry_index(path)
+        start = time.perf_counter()
+        index.rebuild(app.RegistryAppender(path).existing, path)
+        rebuild_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed = [name for name in batch if name in index] if index.in_sync(path) else None
+        indexed_s = time.perf_counter() - start
+        index.close()
+
+    print(f"Реестр: {args.rows} строк, файлов в пакете: {len(batch)}")
+    print(f"load_workbook + колонка A: {legacy_s * 1000:.0f} мс")
+    print(f"Перестроение индекса (один раз): {rebuild_s * 1000:.0f} мс")
+    print(f"Индекс реестра: {indexed_s * 1000:.1f} мс (x{legacy_s / indexed_s:.0f})")
+    print(f"Пропускаемые файлы совпадают: {'да' if indexed == legacy else 'НЕТ'}")
+
+
+if __name__ == "__main__":
+    main()
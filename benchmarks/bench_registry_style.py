@@ -0,0 +1,127 @@
+# Оформление реестра при сохранении через openpyxl: прежний способ (Font/Alignment/Border
+# на каждую ячейку всех строк и пересчёт ширин по всем ячейкам) против именованных стилей
+# только для новых строк и ширин, которые растут по новым значениям. Оформление всех
+# ячеек и ширины колонок в сохранённых файлах должны совпасть.
+#
+#   python benchmarks/bench_registry_style.py [--rows N] [--new K]
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from _app import load_app, quiet_processor
+
+app = load_app()
+
+from bench_registry_append import registry_row  # noqa: E402
+
+
+def legacy_adjust_columns(ws):
+    for col in ws.columns:
+        width = min(max((len(str(c.value)) for c in col if c.value), default=0) + 2, 50)
+        ws.column_dimensions[app.get_column_letter(col[0].column)].width = width
+
+
+def legacy_style(ws, headers):
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+    header_fill = PatternFill("solid", fgColor="4F81BD")
+    header_font = Font(bold=True, color="FFFFFF", size=11, name="Calibri")
+    body_font = Font(size=11, name="Calibri")
+    center = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    thin = Side(style="thin", color="9E9E9E")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    for c in range(1, ws.max_column + 1):
+        cell = ws.cell(row=1, column=c)
+        cell.fill, cell.font, cell.alignment, cell.border = header_fill, header_font, center, border
+    ws.row_dimensions[1].height = 22
+    for r in range(2, ws.max_row + 1):
+        for c in range(1, ws.max_column + 1):
+            cell = ws.cell(row=r, column=c)
+            cell.font, cell.alignment, cell.border = body_font, center, border
+    date_col = headers.index("Дата съемки") + 1
+    for r in range(2, ws.max_row + 1):
+        ws.cell(row=r, column=date_col).number_format = "DD.MM.YYYY"
+    ws.freeze_panes = "A2"
+    ws.auto_filter.ref = ws.dimensions
+
+
+def current_format(ws, headers, first_row, processor):
+    processor.adjust_columns(ws, first_row)
+    processor.apply_standard_excel_style(ws, headers, first_row)
+
+
+def new_book(rows):
+    wb = app.Workbook()
+    ws = wb.active
+    ws.title = "Геодезия"
+    ws.append(list(app.REGISTRY_HEADERS))
+    for row in rows:
+        ws.append(row)
+    return wb, ws
+
+
+def look(path):
+    ws = app.load_workbook(path).active
+    cells = [
+        (c.font.b, c.font.sz, c.font.name, c.font.color.rgb if c.font.color else None, c.fill.fgColor.rgb,
+         c.border.left.style, c.border.left.color.rgb if c.border.left.color else None,
+         c.alignment.horizontal, c.alignment.vertical, c.alignment.wrap_text, c.number_format)
+        for row in ws.iter_rows() for c in row
+    ]
+    widths = {k: d.width for k, d in ws.column_dimensions.items()}
+    return cells, widths, ws.freeze_panes, ws.auto_filter.ref
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--new", type=int, default=20)
+    args = parser.parse_args()
+    if not app.EXCEL_SUPPORTED:
+        print("openpyxl не установлен — бенчмарк пропущен")
+        return
+    processor = quiet_processor(app)
+    headers = list(app.REGISTRY_HEADERS)
+    r = random.Random(0)
+    rows = [registry_row(r, i) for i in range(args.rows)]
+    new_rows = [registry_row(r, args.rows + i) for i in range(args.new)]
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {name: os.path.join(tmp, f"{name}.xlsx") for name in ("legacy", "current")}
+        # Новый реестр: оформляется весь лист
+        wb_a, ws_a = new_book(rows)
+        wb_b, ws_b = new_book(rows)
+        first_legacy = timed(lambda: (legacy_adjust_columns(ws_a), legacy_style(ws_a, headers)))
+        first_current = timed(lambda: current_format(ws_b, headers, 1, processor))
+        wb_a.save(paths["legacy"])
+        wb_b.save(paths["current"])
+        same_first = look(paths["legacy"]) == look(paths["current"])
+
+        # Дозапись в загруженный реестр: прежний способ переоформляет все строки
+        wb_a, wb_b = app.load_workbook(paths["legacy"]), app.load_workbook(paths["current"])
+        ws_a, ws_b = wb_a.active, wb_b.active
+        first_new_row = ws_b.max_row + 1
+        for row in new_rows:
+            ws_a.append(row)
+            ws_b.append(row)
+        append_legacy = timed(lambda: (legacy_adjust_columns(ws_a), legacy_style(ws_a, headers)))
+        append_current = timed(lambda: current_format(ws_b, headers, first_new_row, processor))
+        wb_a.save(paths["legacy"])
+        wb_b.save(paths["current"])
+        same_append = look(paths["legacy"]) == look(paths["current"])
+
+    print(f"Реестр: {args.rows} строк, новых строк: {args.new}")
+    print(f"Новый реестр, оформление: прежнее {first_legacy:.2f} с, именованные стили {first_current:.2f} с "
+          f"(x{first_legacy / first_current:.1f}); оформление совпадает: {'да' if same_first else 'НЕТ'}")
+    print(f"Дозапись, оформление: прежнее {append_legacy:.2f} с, только новые строки {append_current * 1000:.1f} мс "
+          f"(x{append_legacy / append_current:.0f}); оформление совпадает: {'да' if same_append else 'НЕТ'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Синтетические документы КГС для бенчмарков: страницы с шумом, шапкой реестра и каталогом
+import random
+
+TYPES = ["Кабель связи", "Тел канализация", "ВОЛС", "КТВ", "Эл кабель", "Водосток", "Вод-д", "Теплотрасса",
+         "Газопровод", "наружное освещение", "хоз-бытовая канализация", "Дренаж", "ЛОС", "Кабель но",
+         "Канализация", "Газ", "тепловые сети", "водопровод", "СКУД", "Воздухопровод", "неизвестно что"]
+NOISE = ["Масштаб 1:500", "Система координат МСК", "Исполнитель: ООО Геодезия", "Лист 1 из 3", "Согласовано",
+         "Примечание: N 12", "Заказчик ГУП", "Обозначение: ВОЛС и КТВ", "Инженер Иванов И.И.",
+         "Высоты Балтийская", "Тип колодца: ККС-2", "Кабельная канализация 2 отв", "трубы d=110", "Тепл. камера"]
+
+
+def header_lines(r):
+    lines = []
+    if r.random() < 0.8:
+        lines.append(f"Вид коммуникации/здания, сооружения: {r.choice(TYPES)}")
+    if r.random() < 0.8:
+        lines.append(f"№ договора (соглашения) на проведение работ: {r.randint(1, 99)}/ГС-{r.randint(1, 999)}/{r.randint(18, 24)}")
+    if r.random() < 0.8:
+        lines.append(f"№ КГС: {r.randint(100, 99999)}-{r.randint(10, 99)}")
+    if r.random() < 0.8:
+        lines.append(f"Дата съемки: {r.randint(1, 28):02d}.{r.randint(1, 12):02d}.{r.randint(2015, 2024)}")
+    r.shuffle(lines)
+    return lines
+
+
+def catalog_lines(r):
+    lines = ["КАТАЛОГ КООРДИНАТ", "№ точки X, м Y, м H, м"]
+    for i in range(1, r.randint(5, 60)):
+        lines.append(f"{i} {r.uniform(1000, 30000):.3f} {r.uniform(1000, 30000):.3f} {r.uniform(100, 180):.2f}")
+    return lines
+
+
+def make_document(seed, noise_lines=40):
+    # Список текстов страниц
+    r = random.Random(seed)
+    pages = []
+    count = r.randint(1, 5)
+    header_page, catalog_page = r.randrange(count), r.randrange(count)
+    for p in range(count):
+        lines = [r.choice(NOISE) for _ in range(r.randint(0, noise_lines))]
+        if p == header_page:
+            pos = r.randint(0, len(lines))
+            lines[pos:pos] = header_lines(r)
+        if p == catalog_page:
+            lines += catalog_lines(r)
+        pages.append("\n".join(lines) + "\n")
+    return pages
@@ -55,6 +55,7 @@ if (!(Test-Path -LiteralPath $distDir)) {
 
 # Copy editable runtime files next to exe (portable-friendly)
 Copy-Item -Force -LiteralPath (Join-Path $PSScriptRoot "comm_types.json") -Destination (Join-Path $distDir "comm_types.json")
+Copy-Item -Force -LiteralPath (Join-Path $PSScriptRoot "field_rules.json") -Destination (Join-Path $distDir "field_rules.json")
 Copy-Item -Force -LiteralPath (Join-Path $PSScriptRoot "icon.ico") -Destination (Join-Path $distDir "icon.ico")
 Copy-Item -Force -LiteralPath (Join-Path $PSScriptRoot "LICENSE") -Destination (Join-Path $distDir "LICENSE")
 Copy-Item -Force -LiteralPath (Join-Path $PSScriptRoot "README.md") -Destination (Join-Path $distDir "README.md")
@@ -0,0 +1,19 @@
+# Модуль приложения для тестов: "KGS_Reader v6.py" загружается так же, как в benchmarks/_app.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from _app import load_app, quiet_processor  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    return load_app()
+
+
+@pytest.fixture
+def processor(app):
+    return quiet_processor(app)
@@ -0,0 +1,52 @@
+# Сборный PDF: каждая КГС — отдельная строка реестра и свой каталог точек
+import pytest
+
+PAGES = [
+    "Вид коммуникации/здания, сооружения: Водосток\n"
+    "№ договора (соглашения) на проведение работ: 12/ГС-345/21\n"
+    "№ КГС: 11111-21\nДата съемки: 01.02.2021\n"
+    "КАТАЛОГ КООРДИНАТ\n№ точки X, м Y, м H, м\n"
+    "1 -12001.125 25003.410 140.20\n2 -12003.500 25001.020 140.31\n",
+    "3 -12005.250 24999.870 139.95\n",
+    "Вид коммуникации/здания, сооружения: Газопровод\n"
+    "№ КГС: 22222-21\nДата съемки: 05.03.2021\n"
+    "КАТАЛОГ КООРДИНАТ\n№ точки X, м Y, м H, м\n"
+    "1 -13001.125 26003.410 150.20\n",
+]
+
+
+@pytest.fixture
+def bundle(app, processor, tmp_path, monkeypatch):
+    def iter_pages(path, info=None):
+        for i, text in enumerate(PAGES):
+            yield app.PageText(i, text, "text")
+
+    monkeypatch.setattr(processor, "iter_pages", iter_pages)
+    processor.import_points = True
+    processor.use_points_store = False
+    processor.points_folder = str(tmp_path)
+    return tmp_path
+
+
+def test_split_documents_by_kgs_label(processor, bundle):
+    processor.split_documents = True
+    result = processor.process_file(str(bundle), "bundle.pdf", 1, 1)
+    assert result["ok"]
+    documents = result["documents"]
+    assert [d["data"]["КГС"] for d in documents] == ["11111-21", "22222-21"]
+    assert [d["data"]["Дата съемки"] for d in documents] == ["01.02.2021", "05.03.2021"]
+    assert documents[1]["data"]["Номер договора"] is None  # поля второй КГС не берутся из первой
+    assert [d["points_count_str"] for d in documents] == ["3/3", "1/1"]
+    assert documents[0]["status"].endswith("(стр. 1–2)") and documents[1]["status"].endswith("(стр. 3)")
+    first = (bundle / "11111-21.txt").read_text(encoding="utf-8").splitlines()
+    second = (bundle / "22222-21.txt").read_text(encoding="utf-8").splitlines()
+    assert [line.split("\t")[0] for line in first] == ["1", "2", "3"]
+    assert second == ["1\t-13001.125\t26003.410\t150.20\t"]
+
+
+def test_without_split_one_document(processor, bundle):
+    processor.split_documents = False
+    documents = processor.process_file(str(bundle), "bundle.pdf", 1, 1)["documents"]
+    assert len(documents) == 1
+    assert documents[0]["data"]["КГС"] == "11111-21"
+    assert "стр." not in documents[0]["status"]
@@ -0,0 +1,39 @@
+# Постобработка каталога по столбцам: файлы точек и _issues.txt такие же, как у прежней
+# построчной обработки (ожидаемое содержимое получено ею на том же каталоге)
+CATALOG = """КАТАЛОГ КООРДИНАТ
+№ точки X, м Y, м H, м
+1 -12001.125 25003.410 140.20
+2 -12003.500 25001.020 14031
+3 12005.250 24999.870 139.95 колодец
+4 -12007.010
+5 -12009.330 24997.150 141.05 угол
+6 -12011.780 24995.600 12875
+"""
+
+POINTS = (
+    "1\t-12001.125\t25003.410\t140.20\t\n"
+    "2\t-12003.500\t25001.020\t\t14031\n"
+    "3\t-12005.250\t24999.870\t139.95\tколодец\n"
+    "5\t-12009.330\t24997.150\t141.05\tугол\n"
+    "6\t-12011.780\t24995.600\t\t12875\n"
+)
+
+ISSUES = (
+    "Строки с подозрениями/ошибками (после грубых автоправок):\n"
+    "4\t\t\t\t    <-- ПРОБЛЕМА: неполная строка (нет X или Y)\n"
+)
+
+
+def test_columnar_table_matches_row_by_row_output(processor, tmp_path):
+    result = processor.extract_and_save_coordinate_table(CATALOG, "K1", str(tmp_path), "x.pdf")
+    assert result == ("Точки сохранены", "5/6", 5, 6)
+    assert (tmp_path / "K1.txt").read_text(encoding="utf-8") == POINTS
+    assert (tmp_path / "K1_issues.txt").read_text(encoding="utf-8") == ISSUES
+
+
+def test_lost_minus_only_against_majority_sign(processor, tmp_path):
+    # знак исправляется только у значения, противоположного большинству, и только |v| > 500
+    text = CATALOG.replace("3 12005.250", "3 -12005.250").replace("5 -12009.330", "5 300.000")
+    processor.extract_and_save_coordinate_table(text, "K2", str(tmp_path), "x.pdf")
+    lines = (tmp_path / "K2.txt").read_text(encoding="utf-8").splitlines()
+    assert lines[3].split("\t")[:3] == ["5", "300.000", "24997.150"]
@@ -0,0 +1,98 @@
+# Каталог на странице с текстовым слоем: строки из слов читаются так же, как текст
+import pytest
+
+
+def word_boxes(lines):
+    words = []
+    for i, line in enumerate(lines):
+        x = 0
+        for word in line.split():
+            words.append((x, i * 20, x + len(word) * 6, i * 20 + 12, word))
+            x += len(word) * 6 + 10
+    return words
+
+
+def test_word_rows_without_axis_labels_are_normalized(app):
+    # шапка без подписей X/Y: строки разбираются как текст; минус U+2212 и латинские
+    # двойники в подписях должны обрабатываться, как в тексте страницы
+    lines = [
+        "KATAЛOГ KOOPДИHAT",
+        "№ точки Координаты Отметка",
+        "1 −12341.12 5432.10 140.20",
+        "2 −12342.50 −5433.70 140.25",
+    ]
+    by_words = app.CoordinateCatalogParser()
+    by_words.feed_words(word_boxes(lines))
+    by_text = app.CoordinateCatalogParser()
+    by_text.feed(app.NormalizedText("\n".join(lines) + "\n"))
+    rows = list(zip(by_words.pids, by_words.xs, by_words.ys, by_words.hs))
+    assert by_words.columns is None
+    assert rows == [("1", "-12341.12", "5432.10", "140.20"), ("2", "-12342.50", "-5433.70", "140.25")]
+    assert rows == list(zip(by_text.pids, by_text.xs, by_text.ys, by_text.hs))
+
+
+def table_boxes(rows, starts):
+    # Слова таблицы: ячейка j строки i начинается в starts[j], слова ячейки через пробел
+    words = []
+    for i, row in enumerate(rows):
+        for start, cell in zip(starts, row):
+            x = start
+            for word in cell.split():
+                words.append((x, i * 20, x + len(word) * 6, i * 20 + 12, word))
+                x += len(word) * 6 + 4
+    return words
+
+
+def word_rows(app, rows, starts):
+    parser = app.CoordinateCatalogParser()
+    parser.feed_words(table_boxes(rows, starts))
+    return list(zip(parser.pids, parser.xs, parser.ys, parser.hs, parser.descs))
+
+
+def text_rows(app, rows):
+    parser = app.CoordinateCatalogParser()
+    parser.feed(app.NormalizedText("\n".join(" ".join(row) for row in rows) + "\n"))
+    return list(zip(parser.pids, parser.xs, parser.ys, parser.hs, parser.descs))
+
+
+STARTS = [10, 80, 180, 280, 380]
+
+
+def test_columns_by_axis_labels(app):
+    # число с пробелом-разделителем тысяч склеивается, слова правее столбцов — описание
+    rows = [
+        ["КАТАЛОГ КООРДИНАТ"],
+        ["№ точки", "X, м", "Y, м", "H, м"],
+        ["1", "12 341.12", "5432.10", "140.20", "колодец"],
+        ["2", "-12342.50", "5433.70", "140.25"],
+    ]
+    assert word_rows(app, rows, STARTS) == [
+        ("1", "12341.12", "5432.10", "140.20", "колодец"),
+        ("2", "-12342.50", "5433.70", "140.25", ""),
+    ]
+
+
+@pytest.mark.parametrize("label", ["Отметка, м", "Z", "Hг"])
+def test_height_column_with_other_label(app, label):
+    rows = [
+        ["КАТАЛОГ КООРДИНАТ"],
+        ["№ точки", "X, м", "Y, м", label],
+        ["1", "12341.12", "5432.10", "140.20"],
+        ["2", "12342.50", "5433.70", "140.25", "угол"],
+    ]
+    expected = [("1", "12341.12", "5432.10", "140.20", ""), ("2", "12342.50", "5433.70", "140.25", "угол")]
+    assert word_rows(app, rows, STARTS) == expected
+    assert text_rows(app, rows) == expected
+
+
+def test_unlabeled_height_column(app):
+    # высоты без подписи в шапке: первое дробное число правее X и Y, как в разборе текста
+    rows = [
+        ["КАТАЛОГ КООРДИНАТ"],
+        ["№ точки", "X, м", "Y, м"],
+        ["1", "12341.12", "5432.10", "140.20", "колодец 2"],
+        ["2", "12342.50", "5433.70", "ККС-2"],
+    ]
+    expected = [("1", "12341.12", "5432.10", "140.20", "колодец 2"), ("2", "12342.50", "5433.70", "", "ККС-2")]
+    assert word_rows(app, rows, STARTS) == expected
+    assert text_rows(app, rows) == expected
@@ -0,0 +1,59 @@
+# Аварийное завершение процесса-обработчика не прерывает пакет: файлы из сломанного пула
+# помечаются ошибкой, остальные обрабатываются новым пулом, реестр сохраняется
+import os
+
+import pytest
+
+from _app import APP_PATH
+
+# Модуль для процессов-обработчиков (spawn импортирует приложение по имени kgs_reader):
+# то же приложение, но process_file завершает процесс на файле с "crash" в имени
+WORKER_MODULE = f'''
+import os
+APP_PATH = {APP_PATH!r}
+exec(compile(open(APP_PATH, encoding="utf-8").read(), APP_PATH, "exec"))
+_process_file = PDFProcessor.process_file
+
+
+def _crashing_process_file(self, folder_path, fname, *args):
+    if "crash" in fname:
+        os._exit(3)
+    return _process_file(self, folder_path, fname, *args)
+
+
+PDFProcessor.process_file = _crashing_process_file
+'''
+
+
+def test_worker_crash_fails_in_flight_files_and_saves_registry(app, processor, tmp_path, monkeypatch):
+    if app.fitz is None or not app.EXCEL_SUPPORTED:
+        pytest.skip("нужны PyMuPDF и openpyxl")
+    modules = tmp_path / "modules"
+    modules.mkdir()
+    (modules / "kgs_reader.py").write_text(WORKER_MODULE, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(modules))
+    folder = tmp_path / "pdf"
+    folder.mkdir()
+    names = []
+    for i in range(1, 13):
+        name = f"{i:02d}_crash.pdf" if i == 5 else f"{i:02d}.pdf"
+        doc = app.fitz.open()
+        doc.new_page().insert_text((50, 72), f"KGS {10000 + i}-20")
+        doc.save(str(folder / name))
+        doc.close()
+        names.append(name)
+    processor.workers = 3
+    processor.ignore_excel = False
+    processor.use_points_store = False
+    output_path = processor.process_selected_files(str(folder), names)
+    assert output_path and os.path.exists(output_path)
+    ws = app.load_workbook(output_path).active
+    status = {row[0]: row[6] for row in ws.iter_rows(min_row=2, values_only=True)}
+    assert sorted(status) == names
+    failed = sorted(name for name, value in status.items() if value == "Ошибка обработки")
+    assert "05_crash.pdf" in failed
+    # в сломанном пуле могли быть только файлы из окна workers * 2 вокруг упавшего
+    assert len(failed) <= 6
+    assert all(name <= "10.pdf" for name in failed)
+    assert status["11.pdf"] != "Ошибка обработки" and status["12.pdf"] != "Ошибка обработки"
+    assert processor.problem_files == failed
@@ -0,0 +1,61 @@
+# Пул потоков OCR общий для всех файлов: движки tesserocr не копятся от файла к файлу
+import os
+import threading
+import types
+
+import pytest
+
+
+class FakeTessApi:
+    created = 0
+    live = 0
+    lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        with FakeTessApi.lock:
+            FakeTessApi.created += 1
+            FakeTessApi.live += 1
+
+    def SetPageSegMode(self, psm):
+        pass
+
+    def SetVariable(self, name, value):
+        pass
+
+    def SetImage(self, img):
+        pass
+
+    def SetSourceResolution(self, dpi):
+        pass
+
+    def GetTSVText(self, page):
+        return ""
+
+    def End(self):
+        with FakeTessApi.lock:
+            FakeTessApi.live -= 1
+
+
+def scanned_pdf(app, path, pages):
+    doc = app.fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.draw_rect(app.fitz.Rect(50, 50 + i, 300, 80 + i), color=(0, 0, 0), fill=(0, 0, 0))
+    doc.save(path)
+
+
+def test_tesserocr_engines_reused_across_files(app, processor, tmp_path, monkeypatch):
+    if app.fitz is None or app.Image is None:
+        pytest.skip("нужны PyMuPDF и Pillow")
+    monkeypatch.setattr(app, "tesserocr", types.SimpleNamespace(
+        PyTessBaseAPI=FakeTessApi, OEM=types.SimpleNamespace(DEFAULT=3)))
+    processor.ocr_backend = "tesserocr"
+    processor.ocr_workers = 4
+    processor.ocr_dpi_tiers = [50]
+    for k in range(5):
+        path = os.path.join(tmp_path, f"scan{k}.pdf")
+        scanned_pdf(app, path, 8)
+        assert len(list(processor.iter_pages(path))) == 8
+    assert FakeTessApi.created <= 4
+    processor.close_ocr_pool()
+    assert FakeTessApi.live == 0
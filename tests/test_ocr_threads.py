@@ -0,0 +1,43 @@
+# Ограничение потоков tesseract при пуле OCR передаётся только процессу tesseract:
+# окружение приложения не меняется, и обработка без пула его не наследует
+import os
+import types
+
+import pytest
+
+
+class FakePopen:
+    calls = []
+
+    def __init__(self, cmd, **kwargs):
+        FakePopen.calls.append(kwargs.get("env"))
+        self.stdin = types.SimpleNamespace(write=lambda data: None)
+        self.returncode = 0
+
+    def communicate(self):
+        return b"", b""
+
+
+@pytest.fixture
+def fake_tesseract(app, monkeypatch):
+    if app.Image is None:
+        pytest.skip("нужен Pillow")
+    fake = types.SimpleNamespace(pytesseract=types.SimpleNamespace(tesseract_cmd="tesseract"))
+    monkeypatch.setattr(app, "pytesseract", fake)
+    monkeypatch.setattr(app.subprocess, "Popen", FakePopen)
+    monkeypatch.delenv("OMP_THREAD_LIMIT", raising=False)
+    FakePopen.calls = []
+    return FakePopen.calls
+
+
+def test_thread_limit_only_for_pooled_tesseract(app, processor, fake_tesseract):
+    img = app.Image.new("L", (8, 8), 255)
+    processor.ocr_backend = "tesseract"
+    processor.get_ocr_pool(2)
+    processor.tesseract_data(img, 300)
+    processor.close_ocr_pool()
+    processor.tesseract_data(img, 300)
+    pooled, single = fake_tesseract
+    assert pooled["OMP_THREAD_LIMIT"] == "1"
+    assert single is None
+    assert "OMP_THREAD_LIMIT" not in os.environ
@@ -0,0 +1,49 @@
+# Ступени DPI: почти пустая страница не перерисовывается с большим разрешением,
+# страница с текстом низкой уверенности — перерисовывается
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def fake_ocr(app, processor, monkeypatch):
+    # OCR каждой ступени возвращает заданный для DPI результат; calls — DPI по порядку
+    calls = []
+    results = {}
+
+    def ocr_crops(crops, dpi):
+        calls.append(dpi)
+        return app.OcrResult(*results[dpi], dpi)
+
+    monkeypatch.setattr(processor, "_ocr_supported", lambda: True)
+    monkeypatch.setattr(processor, "_needs_layout_probe", lambda page, hint="": False)
+    monkeypatch.setattr(processor, "render_ocr_crops", lambda page, dpi, regions=None: [])
+    monkeypatch.setattr(processor, "ocr_crops", ocr_crops)
+    processor.ocr_dpi_tiers = [200, 300]
+    processor.ocr_min_confidence = 70
+    processor.ocr_min_chars = 50
+    return calls, results
+
+
+def test_blank_page_stops_at_first_tier(processor, fake_ocr):
+    calls, results = fake_ocr
+    results.update({200: ("  ~ ", 12.0), 300: ("", 0.0)})
+    assert processor._ocr_page(object(), 0) == "  ~ "
+    assert calls == [200]
+
+
+def test_low_confidence_text_goes_to_next_tier(processor, fake_ocr):
+    calls, results = fake_ocr
+    results.update({200: ("х" * 40, 40.0), 300: ("Дата съемки: 01.02.2020 " * 3, 90.0)})
+    assert processor._ocr_page(object(), 0).startswith("Дата съемки")
+    assert calls == [200, 300]
+
+
+@pytest.mark.parametrize("first, expected", [(("", 0.0), [200]), (("х" * 40, 40.0), [200, 300])])
+def test_pooled_pages_use_the_same_rule(app, processor, fake_ocr, first, expected):
+    calls, results = fake_ocr
+    results.update({200: first, 300: ("х" * 60, 90.0)})
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        entry = app._PendingPage(0, None, "ocr", executor.submit(processor.ocr_crops, [], 200))
+        processor._resolve_ocr_entry(entry, [object()], executor, processor._ocr_tiers(), None, None, "")
+    assert calls == expected
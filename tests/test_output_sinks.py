@@ -0,0 +1,85 @@
+# Дополнительный вывод реестра (CSV, JSONL, SQLite): повторная обработка папки не
+# дублирует строки файлов
+import csv
+import json
+import os
+import sqlite3
+
+import pytest
+
+
+def document(kgs, status="Успешно"):
+    return {
+        "data": {"Тип коммуникации": "Вод-д", "Номер договора": "12/34", "КГС": kgs, "Дата съемки": "01.02.2023"},
+        "status": status, "points_status": "", "points_count_str": "0/0",
+    }
+
+
+def run(processor, folder, results):
+    # results: {имя файла: результат process_file}
+    def fake_results(folder_path, jobs, total_files):
+        for index, fname in jobs:
+            yield index, fname, results[fname]
+    processor._iter_file_results = fake_results
+    processor.process_selected_files(str(folder), list(results))
+
+
+def read_sinks(folder):
+    base = os.path.join(folder, "Реестр_геодезических_съемок")
+    with open(base + ".csv", encoding="utf-8-sig", newline="") as f:
+        csv_rows = [(row[0], row[3], row[6]) for row in list(csv.reader(f))[1:]]
+    with open(base + ".jsonl", encoding="utf-8") as f:
+        jsonl_rows = [(r["Файл"], r["КГС"], r["Статус"]) for r in map(json.loads, f)]
+    conn = sqlite3.connect(base + ".sqlite")
+    sqlite_rows = conn.execute('SELECT "Файл", "КГС", "Статус" FROM registry ORDER BY rowid').fetchall()
+    conn.close()
+    return csv_rows, jsonl_rows, sqlite_rows
+
+
+def test_rerun_does_not_duplicate_rows(processor, tmp_path):
+    processor.ignore_excel = True
+    processor.output_sinks = ["csv", "jsonl", "sqlite"]
+    first = {
+        "a.pdf": {"ok": True, "documents": [document("1-21"), document("2-21")]},
+        "b.pdf": {"ok": False},
+    }
+    run(processor, tmp_path, first)
+    run(processor, tmp_path, first)
+    expected = [("a.pdf", "1-21", "Успешно"), ("a.pdf", "2-21", "Успешно"), ("b.pdf", "", "Ошибка обработки")]
+    csv_rows, jsonl_rows, sqlite_rows = read_sinks(tmp_path)
+    assert csv_rows == expected
+    assert jsonl_rows == expected
+    assert sqlite_rows == expected
+
+    # повторная обработка с новым результатом: во всех выводах строки файла заменяются
+    # результатом последней обработки; новый файл дописывается
+    run(processor, tmp_path, {
+        "b.pdf": {"ok": True, "documents": [document("3-21")]},
+        "c.pdf": {"ok": True, "documents": [document("4-21")]},
+    })
+    expected = expected[:2] + [("b.pdf", "3-21", "Успешно"), ("c.pdf", "4-21", "Успешно")]
+    csv_rows, jsonl_rows, sqlite_rows = read_sinks(tmp_path)
+    assert csv_rows == expected
+    assert jsonl_rows == expected
+    assert sqlite_rows == expected
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_torn_last_line_is_dropped(app, tmp_path):
+    headers = ["Файл", "КГС"]
+    path = str(tmp_path / "registry.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"Файл": "a.pdf", "КГС": "1-21"}\n{"Файл": "b.pdf", "КГ')
+    sink = app.JsonlSink(path, headers)
+    sink.write([["b.pdf", "2-21"]])
+    sink.close()
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["Файл"] for line in f] == ["a.pdf", "b.pdf"]
+
+
+def test_sink_requires_write(app, tmp_path):
+    class NoWrite(app.RegistrySink):
+        pass
+
+    with pytest.raises(TypeError):
+        NoWrite(str(tmp_path / "out"), ["Файл"])
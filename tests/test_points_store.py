@@ -0,0 +1,56 @@
+# Сводная база точек: открывается в ещё не созданной папке точек, находит совпадающие
+# точки других съёмок
+def test_store_opens_in_new_points_folder(processor, tmp_path):
+    processor.import_points = True
+    processor.use_points_store = True
+    processor.points_folder = str(tmp_path / "points" / "2024")
+    store = processor.open_points_store(str(tmp_path))
+    assert store is not None
+    try:
+        store.add_survey("1-1", "a.pdf", [("1", 100.0, 200.0, None)])
+        assert store.bbox(0, 0, 1000, 1000) == [("1-1", "1", 100.0, 200.0, None)]
+    finally:
+        store.close()
+    assert (tmp_path / "points" / "2024" / "points.sqlite").exists()
+
+
+def test_duplicates_across_surveys(app, tmp_path):
+    store = app.PointsStore(str(tmp_path / "points.sqlite"), 10)
+    try:
+        store.add_survey("1-1", "a.pdf", [("1", 99.9, 50.0, 140.0), ("2", 300.0, 300.0, None)])
+        store.add_survey("2-2", "b.pdf", [("7", 100.2, 50.1, None), ("8", 500.0, 500.0, None)])
+        assert store.duplicates("2-2", 0.5) == {"1-1": 1}
+        assert store.duplicates("2-2", 0.1) == {}
+        # повторная обработка съёмки заменяет её точки
+        store.add_survey("2-2", "b.pdf", [("8", 500.0, 500.0, None)])
+        assert store.duplicates("1-1", 0.5) == {}
+    finally:
+        store.close()
+
+
+def test_non_positive_grid_falls_back_to_default(processor, tmp_path):
+    default = processor.SETTINGS_DEFAULTS["points_grid_m"]
+    for value in (0, -5, "0"):
+        processor.points_grid_m = 25
+        processor.apply_settings({"points_grid_m": value})
+        assert processor.points_grid_m == default
+    processor.apply_settings({"points_grid_m": 25})
+    assert processor.points_grid_m == 25
+    processor.apply_settings({"points_grid_m": 0})
+    processor.import_points = processor.use_points_store = True
+    store = processor.open_points_store(str(tmp_path))
+    try:
+        store.add_survey("1-1", "a.pdf", [("1", 100.0, 200.0, None)])
+    finally:
+        store.close()
+
+
+def test_zero_cell_saved_by_old_run_is_replaced(app, tmp_path):
+    path = str(tmp_path / "points.sqlite")
+    app.PointsStore(path, 0)._connect().close()
+    store = app.PointsStore(path, 100)
+    try:
+        store.add_survey("1-1", "a.pdf", [("1", 100.0, 200.0, None)])
+        assert store.cell == 100
+    finally:
+        store.close()
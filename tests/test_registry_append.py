@@ -0,0 +1,60 @@
+# Дозапись в реестр xlsx через RegistryAppender: строки читаются обратно openpyxl без
+# потерь, новые строки оформлены как прежние, имена файлов видны при следующем открытии
+import pytest
+
+
+def registry_row(name, status="Успешно"):
+    return [name, "Водопровод", "12/34567-8", "1234-21", "01.02.2021", "5/5", status, "Точки сохранены", ""]
+
+
+@pytest.fixture
+def registry(app, processor, tmp_path):
+    if not app.EXCEL_SUPPORTED:
+        pytest.skip("нужен openpyxl")
+    path = str(tmp_path / "Реестр.xlsx")
+    wb = app.Workbook()
+    ws = wb.active
+    ws.title = "Геодезия"
+    ws.append(list(app.REGISTRY_HEADERS))
+    for i in range(3):
+        ws.append(registry_row(f"old_{i}.pdf"))
+    processor.adjust_columns(ws)
+    processor.apply_standard_excel_style(ws, list(app.REGISTRY_HEADERS))
+    wb.save(path)
+    return path
+
+
+def cell_style(cell):
+    return (cell.font.b, cell.font.sz, cell.border.left.style, cell.alignment.horizontal, cell.alignment.wrap_text)
+
+
+def test_appended_rows_round_trip(app, registry):
+    status_width = app.load_workbook(registry).active.column_dimensions["G"].width
+    appender = app.RegistryAppender(registry)
+    assert appender.headers == list(app.REGISTRY_HEADERS)
+    assert appender.data_rows == 3
+    assert appender.existing == {"old_0.pdf", "old_1.pdf", "old_2.pdf"}
+    new_rows = [
+        registry_row("new & <special>.pdf"),
+        registry_row("control\x07chars.pdf", "Успешно (стр. 1–2); каталог на отдельных листах приложения"),
+        ["007.pdf", "", "", "", "", "0/0", "Ошибка обработки", "", ""],
+    ]
+    for row in new_rows:
+        appender.append(row)
+    appender.save()
+
+    ws = app.load_workbook(registry).active
+    values = [list(row) for row in ws.iter_rows(min_row=2, values_only=True)]
+    expected = [registry_row(f"old_{i}.pdf") for i in range(3)] + new_rows
+    expected[4][0] = "controlchars.pdf"  # недопустимые в XML символы выбрасываются
+    assert [[value or "" for value in row] for row in values] == expected
+    assert ws.max_row == 7
+    assert ws.auto_filter.ref == "A1:I7"
+    for column in range(1, len(app.REGISTRY_HEADERS) + 1):
+        assert cell_style(ws.cell(7, column)) == cell_style(ws.cell(4, column))
+    # колонка «Статус» расширена под длинное значение
+    assert ws.column_dimensions["G"].width > status_width
+
+    reopened = app.RegistryAppender(registry)
+    assert reopened.data_rows == 6
+    assert {"new & <special>.pdf", "controlchars.pdf", "007.pdf"} <= reopened.existing
@@ -0,0 +1,66 @@
+# Индекс реестра (SQLite рядом с xlsx): повторный запуск пропускает внесённые файлы по
+# индексу, изменённый вне программы реестр перестраивает индекс
+import pytest
+
+
+@pytest.fixture
+def batch(app, processor, tmp_path, monkeypatch):
+    if not app.EXCEL_SUPPORTED:
+        pytest.skip("нужен openpyxl")
+    processed = []
+
+    def process_file(folder_path, fname, index=None, total_files=None):
+        processed.append(fname)
+        data = {"Тип коммуникации": "Водопровод", "Номер договора": "1/2", "КГС": fname[:1], "Дата съемки": ""}
+        return {"ok": True, "documents": [
+            {"data": data, "status": "Частично", "points_status": "Нет точек", "points_count_str": "0/0", "points": None}
+        ]}
+
+    monkeypatch.setattr(processor, "process_file", process_file)
+    processor.workers = 1
+    processor.ignore_excel = False
+    for name in "abc":
+        (tmp_path / f"{name}.pdf").write_bytes(f"%PDF-1.4 {name}".encode())
+
+    def run(*names):
+        processed.clear()
+        output = processor.process_selected_files(str(tmp_path), list(names))
+        return output, list(processed)
+
+    return run
+
+
+def registry_names(app, path):
+    return [row[0] for row in app.load_workbook(path).active.iter_rows(min_row=2, values_only=True)]
+
+
+def test_index_round_trip(app, batch, tmp_path):
+    output, processed = batch("a.pdf", "b.pdf")
+    assert processed == ["a.pdf", "b.pdf"]
+    index = app.RegistryIndex(str(tmp_path / "Реестр_геодезических_съемок.index.sqlite"))
+    try:
+        assert index.in_sync(output)
+        size, mtime_ns, digest = index.get("a.pdf")
+        assert size == (tmp_path / "a.pdf").stat().st_size and digest == app.file_content_hash(str(tmp_path / "a.pdf"))
+    finally:
+        index.close()
+
+    output, processed = batch("a.pdf", "b.pdf", "c.pdf")
+    assert processed == ["c.pdf"]
+    assert registry_names(app, output) == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_registry_edited_outside_rebuilds_index(app, batch, tmp_path):
+    output, _ = batch("a.pdf")
+    wb = app.load_workbook(output)
+    wb.active.append(["b.pdf", "", "", "", "", "", "Внесено вручную", "", ""])
+    wb.save(output)
+    output, processed = batch("a.pdf", "b.pdf", "c.pdf")
+    assert processed == ["c.pdf"]
+    index = app.RegistryIndex(str(tmp_path / "Реестр_геодезических_съемок.index.sqlite"))
+    try:
+        assert index.in_sync(output)
+        assert "b.pdf" in index and index.get("b.pdf") == (None, None, None)
+        assert index.get("a.pdf")[2] is not None  # хэш уже известного файла сохранён
+    finally:
+        index.close()
@@ -0,0 +1,70 @@
+# Журнал реестра: строки файлов, обработанных до сбоя, дописываются в реестр при
+# следующем запуске; промежуточное сохранение оставляет их в xlsx уже во время обработки
+import json
+
+import pytest
+
+
+class Crash(BaseException):
+    """Аварийное завершение: не перехватывается как обычная ошибка обработки."""
+
+
+@pytest.fixture
+def batch(app, processor, tmp_path, monkeypatch):
+    if not app.EXCEL_SUPPORTED:
+        pytest.skip("нужен openpyxl")
+    state = {"crash_on": None, "processed": []}
+
+    def process_file(folder_path, fname, index=None, total_files=None):
+        if fname == state["crash_on"]:
+            raise Crash()
+        state["processed"].append(fname)
+        data = {"Тип коммуникации": "Газопровод", "Номер договора": "", "КГС": f"{fname[0]}-1", "Дата съемки": ""}
+        return {"ok": True, "documents": [
+            {"data": data, "status": "Частично", "points_status": "Нет точек", "points_count_str": "0/0", "points": None}
+        ]}
+
+    monkeypatch.setattr(processor, "process_file", process_file)
+    processor.workers = 1
+    processor.ignore_excel = False
+    processor.registry_checkpoint_files = 0
+    processor.registry_checkpoint_minutes = 0
+    for name in "abcd":
+        (tmp_path / f"{name}.pdf").write_bytes(f"%PDF-1.4 {name}".encode())
+    return state
+
+
+def registry_rows(app, path):
+    return [(row[0], row[3]) for row in app.load_workbook(path).active.iter_rows(min_row=2, values_only=True)]
+
+
+def test_rows_from_journal_are_recovered_after_crash(app, processor, batch, tmp_path):
+    output = tmp_path / "Реестр_геодезических_съемок.xlsx"
+    journal = tmp_path / "Реестр_геодезических_съемок.journal.jsonl"
+    batch["crash_on"] = "c.pdf"
+    with pytest.raises(Crash):
+        processor.process_selected_files(str(tmp_path), ["a.pdf", "b.pdf", "c.pdf"])
+    assert not output.exists()
+    entries = [json.loads(line) for line in journal.read_text(encoding="utf-8").splitlines()]
+    assert [entry["file"] for entry in entries] == ["a.pdf", "b.pdf"]
+    with open(journal, "ab") as f:
+        f.write(b'{"file": "d.pdf", "rows": [["d.pdf"')  # строка, оборванная сбоем
+
+    batch["crash_on"] = None
+    batch["processed"].clear()
+    path = processor.process_selected_files(str(tmp_path), ["a.pdf", "b.pdf", "c.pdf", "d.pdf"])
+    assert batch["processed"] == ["c.pdf", "d.pdf"]  # a и b взяты из журнала, не обработаны заново
+    assert registry_rows(app, path) == [("a.pdf", "a-1"), ("b.pdf", "b-1"), ("c.pdf", "c-1"), ("d.pdf", "d-1")]
+    assert not journal.exists()
+
+
+def test_checkpoint_saves_registry_during_batch(app, processor, batch, tmp_path):
+    output = tmp_path / "Реестр_геодезических_съемок.xlsx"
+    processor.registry_checkpoint_files = 2
+    batch["crash_on"] = "d.pdf"
+    with pytest.raises(Crash):
+        processor.process_selected_files(str(tmp_path), ["a.pdf", "b.pdf", "c.pdf", "d.pdf"])
+    # после двух файлов реестр сохранён, третий остался только в журнале
+    assert registry_rows(app, str(output)) == [("a.pdf", "a-1"), ("b.pdf", "b-1")]
+    journal = tmp_path / "Реестр_геодезических_съемок.journal.jsonl"
+    assert [json.loads(line)["file"] for line in journal.read_text(encoding="utf-8").splitlines()] == ["c.pdf"]
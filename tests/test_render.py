@@ -0,0 +1,40 @@
+# Рендер страницы для OCR: изображение не держит пиксмап PyMuPDF (его освобождение в потоке
+# OCR небезопасно), совпадает с пикселями пиксмапа и копирует их один раз
+import gc
+import weakref
+
+import pytest
+
+
+def test_render_copies_pixels_and_releases_pixmap(app, processor, monkeypatch):
+    if app.fitz is None or app.Image is None:
+        pytest.skip("нужны PyMuPDF и Pillow")
+    doc = app.fitz.open()
+    page = doc.new_page(width=200, height=150)
+    page.draw_rect(app.fitz.Rect(20, 20, 120, 60), color=(0, 0, 0), fill=(0.3, 0.3, 0.3))
+    pixmaps = []
+    get_pixmap = type(page).get_pixmap
+
+    def tracked(self, *args, **kwargs):
+        pix = get_pixmap(self, *args, **kwargs)
+        pixmaps.append((weakref.ref(pix), pix.samples, pix.width, pix.height))
+        return pix
+
+    buffers = []
+    frombytes = app.Image.frombytes
+
+    def tracked_frombytes(mode, size, data, *args):
+        buffers.append(type(data))
+        return frombytes(mode, size, data, *args)
+
+    monkeypatch.setattr(type(page), "get_pixmap", tracked)
+    monkeypatch.setattr(app.Image, "frombytes", tracked_frombytes)
+    img = processor.render_page_for_ocr(page, dpi=72)
+    gc.collect()
+    ref, samples, width, height = pixmaps[0]
+    assert ref() is None
+    assert not hasattr(img, "pixmap")
+    # без промежуточной копии pix.samples: в Image.frombytes уходит память самого пиксмапа
+    assert buffers == [memoryview]
+    assert img.size == (width, height) and img.tobytes() == samples
+    doc.close()
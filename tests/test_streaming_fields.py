@@ -0,0 +1,38 @@
+# Поля, собранные по страницам, совпадают с поиском по всему тексту документа
+import pytest
+
+from corpus import make_document
+
+
+def streaming_fields(app, processor, pages):
+    fields = app.StreamingFieldExtractor(processor)
+    for text in pages:
+        fields.feed(app.NormalizedText(text))
+    return fields.result()
+
+
+def document_fields(processor, pages):
+    return processor.extract_data("".join(text + "\n" for text in pages))
+
+
+@pytest.mark.parametrize("seed", range(0, 300, 7))
+def test_streaming_matches_full_text(app, processor, seed):
+    pages = make_document(seed)
+    assert streaming_fields(app, processor, pages) == document_fields(processor, pages)
+
+
+def test_label_and_value_split_by_page_break(app, processor):
+    pages = [
+        "№ КГС: 12345-67\nСогласовано 15.03.2019\nДата съемки:\n",
+        "01.02.2020\nМасштаб 1:500\n",
+    ]
+    data = streaming_fields(app, processor, pages)
+    assert data["Дата съемки"] == "01.02.2020"
+    assert data == document_fields(processor, pages)
+
+
+def test_tail_does_not_leak_into_next_document(app, processor):
+    # хвост страницы переносится только внутри одного извлечения
+    fields = app.StreamingFieldExtractor(processor)
+    fields.feed(app.NormalizedText("Дата съемки: 01.02.2020\n"))
+    assert fields.result()["КГС"] is None
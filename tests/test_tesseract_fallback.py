@@ -0,0 +1,53 @@
+# Отказ tesseract на одном изображении не отключает передачу изображений через stdin
+import types
+
+import pytest
+
+
+@pytest.fixture
+def backend(app, monkeypatch):
+    calls = []
+
+    def image_to_data(img, config=None, output_type=None):
+        calls.append(img)
+        return {"text": ["pytesseract"]}
+
+    fake = types.SimpleNamespace(image_to_data=image_to_data, Output=types.SimpleNamespace(DICT="dict"))
+    monkeypatch.setattr(app, "pytesseract", fake)
+    backend = app.TesseractCliBackend(log=lambda message: None)
+    backend.fallback_calls = calls
+    return backend
+
+
+def test_other_errors_fall_back_for_one_call(app, backend, monkeypatch):
+    def run_raw(img, args):
+        if img == "bad":
+            raise RuntimeError("Error, could not create TSV output file")
+        return {"text": ["raw"]}
+
+    monkeypatch.setattr(backend, "_run_raw", run_raw)
+    assert backend.image_to_data("bad", 300) == {"text": ["pytesseract"]}
+    assert backend.raw_input
+    assert backend.image_to_data("good", 300) == {"text": ["raw"]}
+    assert backend.fallback_calls == ["bad"]
+
+
+def test_unsupported_input_disables_raw_input(app, backend, monkeypatch):
+    def run_raw(img, args):
+        raise app.TesseractInputError("Error in pixReadStream: Unknown format: no pix returned")
+
+    monkeypatch.setattr(backend, "_run_raw", run_raw)
+    assert backend.image_to_data("a", 300) == {"text": ["pytesseract"]}
+    assert not backend.raw_input
+    assert backend.image_to_data("b", 300) == {"text": ["pytesseract"]}
+    assert backend.fallback_calls == ["a", "b"]
+
+
+@pytest.mark.parametrize("message, unsupported", [
+    ("Error in pixReadStream: Unknown format: no pix returned", True),
+    ("Error in pixReadMem: Pnm: function not present", True),
+    ("Image file stdin cannot be read!", True),
+    ("Error opening data file /usr/share/tessdata/rus.traineddata", False),
+])
+def test_input_error_detection(app, message, unsupported):
+    assert bool(app.TESSERACT_INPUT_ERROR_RE.search(message)) == unsupported